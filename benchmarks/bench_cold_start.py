@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Verifier cold start: import time of the app per scorer backend, time to the
+first score, and the heaviest imports (python -X importtime)
+
+Each measurement runs in a fresh interpreter. With --budget-ms the script
+exits with status 1 when importing the verifier app (lazy backends) takes
+longer, so it can guard against a heavy import creeping back in.
+
+Usage:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --runs 5 --budget-ms 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import verifier.app.main
+from verifier.app import nlp
+imported = time.perf_counter()
+if {warm_up}:
+    nlp.warm_up_scorer()
+ready = time.perf_counter()
+nlp.similarity_scores("5G networks cause COVID-19", ["5G is a cellular network standard", "COVID-19 is a disease"])
+scored = time.perf_counter()
+print(json.dumps({{"import": imported - started, "warm_up": ready - imported, "first_score": scored - ready}}))
+"""
+
+
+def run_child(backend, warm_up):
+    env = dict(os.environ, SCORER_BACKEND=backend, SCORER_WARMUP="false")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(warm_up=warm_up)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def heaviest_imports(backend, top):
+    """
+    Top-level packages by import time (µs, the modules' own time summed)
+    when the app is imported and scores once
+    """
+    env = dict(os.environ, SCORER_BACKEND=backend, SCORER_WARMUP="false")
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "import verifier.app.main; from verifier.app import nlp; nlp.warm_up_scorer()"],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(own)
+    return sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per row (median reported)")
+    parser.add_argument("--top", type=int, default=6, help="heaviest imports listed per backend")
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail when the app import takes longer")
+    args = parser.parse_args()
+
+    print("⏱️  Verifier cold start benchmark")
+    print("=" * 50)
+    print(f"{'backend':>8} {'warm-up':>8} {'import ms':>10} {'warm-up ms':>11} {'first score ms':>15}")
+    lazy_imports = []
+    for backend in ("jaccard", "tfidf"):
+        for warm_up in (False, True):
+            runs = [run_child(backend, warm_up) for _ in range(args.runs)]
+            timings = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+            if not warm_up:
+                lazy_imports.append(timings["import"])
+            print(f"{backend:>8} {'yes' if warm_up else 'no':>8} {timings['import']:>10.1f} "
+                  f"{timings['warm_up']:>11.1f} {timings['first_score']:>15.1f}")
+
+    for backend in ("jaccard", "tfidf"):
+        heaviest = ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in heaviest_imports(backend, args.top))
+        print(f"heaviest imports ({backend}): {heaviest}")
+
+    if args.budget_ms:
+        worst = max(lazy_imports)
+        verdict = "within" if worst <= args.budget_ms else "over"
+        print(f"app import: {worst:.1f} ms, {verdict} the {args.budget_ms:.0f} ms budget")
+        if worst > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: gateway -> verifier -> evidence -> fake MediaWiki on
+localhost, driven at fixed concurrency levels, plus microbenchmarks of the
+verifier's NLP helpers
+
+For every concurrency level, the fake MediaWiki (benchmarks/fake_mediawiki.py,
+with --wiki-latency-ms and --wiki-error-rate), the evidence service, the
+verifier (on a fresh SQLite file, or --database-url) and the gateway are
+started as separate uvicorn processes. Each client loops POST
+/claims/verify followed by GET /claims/{id} through the gateway over a
+fixed set of claims for --duration seconds. The verdict cache is off and,
+unless --evidence-cache, so is the evidence service's cache, so every
+request goes all the way to the fake wiki.
+
+Results (throughput, p50/p95/p99 per endpoint, the verifier's pipeline
+stages from GET /pipeline/stats, and microbenchmarks in µs per call) are
+printed and written as JSON to --out. --compare prints the change against
+an earlier result file, e.g. from the previous commit.
+
+Usage:
+    python benchmarks/bench_e2e.py --out bench-e2e.json
+    python benchmarks/bench_e2e.py --concurrency 1,10,50 --duration 20 --wiki-latency-ms 50 \\
+        --wiki-error-rate 0.02 --out new.json --compare bench-e2e.json
+    python benchmarks/bench_e2e.py --micro-only
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+import httpx
+
+from shared.stats import percentile
+
+PORTS = {"wiki": 18200, "evidence": 18201, "verifier": 18202, "gateway": 18203}
+ENDPOINTS = ("POST /claims/verify", "GET /claims/{id}")
+
+
+def claims():
+    from benchmarks.bench_query_planner import LABELED_CLAIMS
+    return list(LABELED_CLAIMS)
+
+
+def serve(name, args):
+    import uvicorn
+
+    if name == "wiki":
+        from benchmarks.bench_query_planner import PAGES
+        from benchmarks.fake_mediawiki import create_app
+        app = create_app(pages=PAGES, latency=args.wiki_latency_ms / 1000, error_rate=args.wiki_error_rate)
+    elif name == "evidence":
+        from evidence.app.main import app
+    elif name == "verifier":
+        if os.environ["DATABASE_URL"].startswith("sqlite"):
+            from sqlalchemy import event
+            from sqlalchemy.dialects.postgresql import UUID
+            from sqlalchemy.ext.compiler import compiles
+
+            @compiles(UUID, "sqlite")
+            def _compile_uuid_sqlite(type_, compiler, **kw):
+                return "CHAR(32)"
+
+            from verifier.app.database import engine
+
+            @event.listens_for(engine.sync_engine, "connect")
+            def sqlite_connect(conn, _):
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA busy_timeout=30000")
+
+        from verifier.app.main import app
+    else:
+        from gateway.app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def start(name, args, env, workdir):
+    # The services' own logging (upstream errors, ...) goes to <workdir>/<name>.log
+    log_path = os.path.join(workdir, f"{name}.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", name, "--port", str(PORTS[name]),
+             "--wiki-latency-ms", str(args.wiki_latency_ms), "--wiki-error-rate", str(args.wiki_error_rate)],
+            cwd=ROOT, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT,
+        )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            with open(log_path) as log:
+                tail = "".join(log.readlines()[-20:])
+            raise RuntimeError(f"{name} exited with status {process.returncode}:\n{tail}")
+        try:
+            httpx.get(f"http://127.0.0.1:{PORTS[name]}/docs", timeout=1.0)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{name} did not start on port {PORTS[name]}")
+
+
+def start_services(args, workdir):
+    url = {name: f"http://127.0.0.1:{port}" for name, port in PORTS.items()}
+    database_url = args.database_url or f"sqlite+aiosqlite:///{workdir}/claims.db"
+    environments = {
+        "wiki": {},
+        "evidence": {
+            "WIKIPEDIA_API_URL": f"{url['wiki']}/api/rest_v1",
+            "WIKIPEDIA_ACTION_API_URL": f"{url['wiki']}/w/api.php",
+            "EVIDENCE_BACKEND": "wikipedia",
+            "EVIDENCE_STORE_PATH": "",
+            **({} if args.evidence_cache else {"EVIDENCE_CACHE_MAX_ENTRIES": "0"}),
+        },
+        "verifier": {
+            "DATABASE_URL": database_url,
+            "EVIDENCE_URL": url["evidence"],
+            "VERDICT_CACHE_SECONDS": "0",
+            "JOB_WORKERS": "0",
+        },
+        "gateway": {"VERIFIER_URL": url["verifier"]},
+    }
+    processes = []
+    try:
+        for name, env in environments.items():
+            processes.append(start(name, args, env, workdir))
+    except Exception:
+        stop_services(processes)
+        raise
+    return processes
+
+
+def stop_services(processes):
+    for process in reversed(processes):
+        process.terminate()
+        process.wait()
+
+
+async def drive(concurrency, args, token):
+    """
+    concurrency clients, each verifying a claim and reading it back, until
+    the duration is over
+    """
+    texts = claims()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{PORTS['gateway']}", headers={"Authorization": f"Bearer {token}"},
+        limits=limits, timeout=60.0,
+    ) as client:
+        async def timed(endpoint, request):
+            started = time.perf_counter()
+            try:
+                response = await request
+            except httpx.HTTPError:
+                response = None
+            latencies[endpoint].append((time.perf_counter() - started) * 1000)
+            if response is None or response.status_code != 200:
+                errors[endpoint] += 1
+                return None
+            return response.json()
+
+        async def user(i, deadline):
+            n = i
+            while time.perf_counter() < deadline:
+                text = texts[n % len(texts)]
+                n += concurrency
+                result = await timed(ENDPOINTS[0], client.post(
+                    "/claims/verify", json={"input_type": "text", "raw_input": text}
+                ))
+                if result is not None:
+                    await timed(ENDPOINTS[1], client.get(f"/claims/{result['claim_id']}"))
+
+        # Warm up connections, the scorer and the query planner
+        await asyncio.gather(*(user(i, time.perf_counter() + args.warmup) for i in range(concurrency)))
+        latencies.clear()
+        errors.clear()
+        stats_url = f"http://127.0.0.1:{PORTS['verifier']}/pipeline/stats"
+        (await client.delete(stats_url)).raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(i, started + args.duration) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        stages = (await client.get(stats_url)).json()
+
+    return {
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": sum(len(values) for values in latencies.values()) / elapsed,
+        "verifications_per_second": len(latencies[ENDPOINTS[0]]) / elapsed,
+        "endpoints": {
+            endpoint: {
+                "count": len(latencies[endpoint]),
+                "errors": errors[endpoint],
+                "p50_ms": percentile(latencies[endpoint], 50),
+                "p95_ms": percentile(latencies[endpoint], 95),
+                "p99_ms": percentile(latencies[endpoint], 99),
+            }
+            for endpoint in ENDPOINTS
+        },
+        # Reset after the warm-up, so they cover the same interval as the endpoints
+        "stages": stages,
+    }
+
+
+def microbenchmarks(repeat):
+    """
+    µs per call of the NLP helpers over the claims and the fake wiki's pages
+    """
+    from benchmarks.bench_query_planner import PAGES
+    from verifier.app.nlp import detect_refutation_terms, similarity_score, simple_keywords, warm_up_scorer
+
+    warm_up_scorer()
+    texts = claims()
+    extracts = list(PAGES.values())
+    pairs = [(claim, extract) for claim in texts for extract in extracts[:10]]
+    cases = {
+        "simple_keywords": (lambda: [simple_keywords(text) for text in texts + extracts], len(texts) + len(extracts)),
+        "similarity_score": (lambda: [similarity_score(claim, extract) for claim, extract in pairs], len(pairs)),
+        "detect_refutation_terms": (lambda: [detect_refutation_terms(extract) for extract in extracts], len(extracts)),
+    }
+    results = {}
+    for name, (fn, calls) in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results[name] = {"calls": calls, "us_per_call": best / calls * 1e6}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def change(new, old):
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+def compare(result, baseline):
+    print(f"compared with {baseline.get('commit') or 'baseline'}:")
+    old_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in result["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"  c={level['concurrency']}: throughput {change(level['throughput_rps'], old['throughput_rps'])}")
+        for endpoint, stats in level["endpoints"].items():
+            before = old["endpoints"].get(endpoint)
+            if before:
+                print(f"    {endpoint}: " + "  ".join(
+                    f"{key[:-3]} {change(stats[key], before[key])}" for key in ("p50_ms", "p95_ms", "p99_ms")
+                ))
+    for name, stats in result.get("micro", {}).items():
+        before = baseline.get("micro", {}).get(name)
+        if before:
+            print(f"  {name}: {change(stats['us_per_call'], before['us_per_call'])} µs/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,10,50", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of load before measuring")
+    parser.add_argument("--wiki-latency-ms", type=float, default=20.0, help="added to every fake wiki request")
+    parser.add_argument("--wiki-error-rate", type=float, default=0.0, help="share of fake wiki requests failing")
+    parser.add_argument("--evidence-cache", action="store_true", help="keep the evidence service's cache on")
+    parser.add_argument("--database-url", default="", help="throwaway database (default: a fresh SQLite file)")
+    parser.add_argument("--micro-repeat", type=int, default=5)
+    parser.add_argument("--micro-only", action="store_true", help="only run the microbenchmarks")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--out", help="write the results as JSON")
+    parser.add_argument("--compare", help="earlier JSON results to compare with")
+    parser.add_argument("--serve", choices=list(PORTS), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args)
+
+    from gateway.app.security.jwt import create_access_token
+    token = create_access_token({"sub": "bench@example.com"})
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("duration", "warmup", "wiki_latency_ms", "wiki_error_rate", "evidence_cache")
+        },
+        "levels": [],
+    }
+
+    print("⏱️  End-to-end benchmark (gateway -> verifier -> evidence -> fake MediaWiki)")
+    print("=" * 50)
+    if not args.micro_only:
+        print(f"wiki latency: {args.wiki_latency_ms:.0f} ms  wiki errors: {args.wiki_error_rate:.0%}  "
+              f"evidence cache: {'on' if args.evidence_cache else 'off'}  {args.duration:.0f} s per level")
+        print(f"{'clients':>7} {'req/s':>8} {'endpoint':>20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            with tempfile.TemporaryDirectory() as workdir:
+                processes = start_services(args, workdir)
+                try:
+                    level = asyncio.run(drive(concurrency, args, token))
+                finally:
+                    stop_services(processes)
+            result["levels"].append(level)
+            for i, (endpoint, stats) in enumerate(level["endpoints"].items()):
+                prefix = f"{concurrency:>7} {level['throughput_rps']:>8.1f}" if i == 0 else " " * 16
+                print(f"{prefix} {endpoint:>20} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                      f"{stats['p99_ms']:>8.1f} {stats['errors']:>7}")
+            for stage, stats in level["stages"].items():
+                print(f"{'':>16} {'stage ' + stage:>20} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                      f"{stats['p99_ms']:>8.1f}")
+
+    if not args.skip_micro:
+        result["micro"] = microbenchmarks(args.micro_repeat)
+        for name, stats in result["micro"].items():
+            print(f"{name:>24}: {stats['us_per_call']:>9.1f} µs/call ({stats['calls']} calls)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"results -> {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Event loop responsiveness of the verifier under scoring load: /health
+latency while concurrent /verify requests score long evidence snippets,
+with the NLP stage inline on the event loop vs in a thread or process pool
+
+The verifier app runs in-process (httpx ASGITransport) on a SQLite file;
+evidence lookups return --snippets long snippets after a short delay and the
+verdict cache is off, so every request is scored. /health is probed every
+--probe-ms while the verifications run; its latency is counted from when
+the probe was due.
+
+Usage:
+    python benchmarks/bench_event_loop.py
+    python benchmarks/bench_event_loop.py --concurrency 50 --requests 100 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+
+from shared.stats import percentile
+from verifier.app import main as verifier_main
+from verifier.app import pipeline as pipeline_module
+from verifier.app.database import get_db
+from verifier.app.models import Base
+from verifier.app.nlp import NLPExecutor
+
+VOCABULARY = (
+    "network cellular virus pandemic radio frequency tower signal health study evidence claim "
+    "spread infection vaccine disease mobile phone standard technology research scientist report "
+    "government agency conspiracy theory misinformation outbreak symptom transmission wave"
+).split()
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+def sqlite_connect(conn, _):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+
+
+class SlowWikiClient:
+    """Evidence lookups with a delay, returning long snippets"""
+
+    def __init__(self, snippets, words, latency):
+        rng = random.Random(42)
+        self.pages = [
+            {
+                "title": f"Page {i}",
+                "url": f"https://en.wikipedia.org/wiki/Page_{i}",
+                "snippet": " ".join(rng.choice(VOCABULARY) for _ in range(words)),
+                "score": 0.0,
+            }
+            for i in range(snippets)
+        ]
+        self.latency = latency
+
+    async def search_evidence(self, query, limit=5):
+        await asyncio.sleep(self.latency)
+        return [dict(page) for page in self.pages]
+
+
+async def run(kind, args, client):
+    executor = NLPExecutor(kind, workers=args.workers, max_queue=args.requests)
+    pipeline_module.nlp_executor = executor
+    verifier_main.nlp_executor = executor
+    semaphore = asyncio.Semaphore(args.concurrency)
+    probes = []
+    failed = 0
+
+    async def verify(i):
+        nonlocal failed
+        async with semaphore:
+            response = await client.post("/verify", json={
+                "input_type": "text", "raw_input": f"5G networks cause COVID-19 outbreak {kind} {i}", "user_id": "bench",
+            })
+            failed += response.status_code != 200
+
+    async def probe(done):
+        # Measured from when the probe was due, so time spent waiting for a
+        # blocked loop to wake the prober counts as well
+        while not done.is_set():
+            due = time.perf_counter() + args.probe_ms / 1000
+            await asyncio.sleep(args.probe_ms / 1000)
+            await client.get("/health")
+            probes.append((time.perf_counter() - due) * 1000)
+
+    if kind == "process":
+        # Start the workers before the clock runs
+        await executor.run(len, [])
+    done = asyncio.Event()
+    prober = asyncio.create_task(probe(done))
+    started = time.perf_counter()
+    await asyncio.gather(*(verify(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    executor.shutdown()
+
+    print(f"{kind:>8} {args.requests / elapsed:>10.1f} {statistics.median(probes):>9.1f} "
+          f"{percentile(probes, 95):>9.1f} {percentile(probes, 99):>9.1f} {max(probes):>9.1f} {failed:>7}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--snippets", type=int, default=15, help="evidence snippets per lookup")
+    parser.add_argument("--words", type=int, default=400, help="words per snippet")
+    parser.add_argument("--lookup-latency-ms", type=float, default=20.0)
+    parser.add_argument("--probe-ms", type=float, default=10.0, help="pause between /health probes")
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    engine = create_async_engine(os.environ["DATABASE_URL"], poolclass=NullPool)
+    event.listen(engine.sync_engine, "connect", sqlite_connect)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_db():
+        async with session_factory() as session:
+            yield session
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    pipeline_module.wiki_client = SlowWikiClient(args.snippets, args.words, args.lookup_latency_ms / 1000)
+    pipeline_module.VERDICT_CACHE_SECONDS = 0
+
+    print("⏱️  Verifier event loop benchmark")
+    print("=" * 50)
+    print(f"concurrency: {args.concurrency}  requests: {args.requests}  workers: {args.workers}  "
+          f"evidence: {args.snippets} x {args.words} words")
+    print(f"{'executor':>8} {'verify/s':>10} {'health p50':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://verifier", timeout=None) as client:
+        for kind in args.modes.split(","):
+            await run(kind, args, client)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
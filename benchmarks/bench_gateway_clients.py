@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Requests/sec through the gateway: a new httpx client per request vs the
+shared, pooled client
+
+Starts a fake verifier and the gateway as separate uvicorn processes and
+drives GET /claims/{id} and POST /claims/verify through the gateway, first
+with the old per-request client (forced with a dependency override) and
+then with the application-wide keep-alive client.
+
+Usage:
+    python benchmarks/bench_gateway_clients.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+import httpx
+
+from shared.stats import percentile
+
+CLAIM_ID = str(uuid.uuid4())
+
+
+def fake_verifier_app():
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    verdict = {"label": "insufficient", "confidence": 0.1, "explanation": "benchmark"}
+
+    @app.get("/claims/{claim_id}")
+    async def get_claim(claim_id: str):
+        return {
+            "claim_id": claim_id, "input_type": "text", "raw_input": "5G causes COVID",
+            "status": "done", "verdict": verdict, "evidence": [],
+        }
+
+    @app.post("/verify")
+    async def verify():
+        return {"claim_id": CLAIM_ID, "verdict": verdict, "top_evidence": []}
+
+    return app
+
+
+def gateway_app(mode: str):
+    from gateway.app.main import app
+    from gateway.app.verifier_client import get_verifier_client
+
+    if mode == "per-request":
+        async def new_client_per_request():
+            # What the routers did before: a fresh client (and TCP connection) per call
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                yield client
+
+        app.dependency_overrides[get_verifier_client] = new_client_per_request
+    return app
+
+
+def serve(app, port):
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def start(args, port, env=None):
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), *args, "--port", str(port)],
+        env={**os.environ, **(env or {})},
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1.0)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def drive(url, token, args):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30.0) as client:
+        queue = asyncio.Queue()
+        for i in range(args.requests):
+            queue.put_nowait(i)
+
+        async def worker():
+            while not queue.empty():
+                i = queue.get_nowait()
+                started = time.perf_counter()
+                if i % 2:
+                    response = await client.get(f"/claims/{CLAIM_ID}")
+                else:
+                    response = await client.post(
+                        "/claims/verify", json={"input_type": "text", "raw_input": "5G causes COVID"}
+                    )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--serve", choices=["verifier", "per-request", "pooled"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve == "verifier":
+        return serve(fake_verifier_app(), args.port)
+    if args.serve:
+        return serve(gateway_app(args.serve), args.port)
+
+    from gateway.app.security.jwt import create_access_token
+    token = create_access_token({"sub": "bench@example.com"})
+
+    print("⏱️  Gateway upstream client benchmark")
+    print("=" * 50)
+    print(f"requests: {args.requests}  concurrency: {args.concurrency}")
+    print(f"{'client':>12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+    verifier = start(["--serve", "verifier"], 18101)
+    try:
+        for mode, port in (("per-request", 18102), ("pooled", 18103)):
+            gateway = start(["--serve", mode], port, env={"VERIFIER_URL": "http://127.0.0.1:18101"})
+            try:
+                asyncio.run(drive(f"http://127.0.0.1:{port}", token, argparse.Namespace(requests=50, concurrency=5)))
+                latencies, elapsed = asyncio.run(drive(f"http://127.0.0.1:{port}", token, args))
+            finally:
+                gateway.terminate()
+                gateway.wait()
+            ms = [latency * 1000 for latency in latencies]
+            print(f"{mode:>12} {len(ms) / elapsed:>9.1f} {statistics.median(ms):>9.1f} "
+                  f"{percentile(ms, 95):>9.1f} {percentile(ms, 99):>9.1f}")
+    finally:
+        verifier.terminate()
+        verifier.wait()
+
+
+if __name__ == "__main__":
+    main()
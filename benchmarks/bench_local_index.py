@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Offline evidence index: build time and peak memory, then search and
+summary latency
+
+Writes a synthetic JSONL dump (Zipf-distributed vocabulary, so common
+words have long postings lists like real text), builds the index with
+app.build_index in a child process to measure its peak RSS on its own,
+and times LocalIndex.search / get_summaries.
+
+Usage:
+    python benchmarks/bench_local_index.py --pages 200000 --memory-mb 64
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+from shared.stats import percentile
+
+
+def write_dump(path, pages, vocabulary, seed=7):
+    rng = random.Random(seed)
+    words = [f"w{n}" for n in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(pages):
+            text = " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(40, 120)))
+            f.write(json.dumps({"title": f"Page {n}", "extract": text}) + "\n")
+    return words
+
+
+def build_in_child(dump, out, memory_mb):
+    code = (
+        "import json, resource, sys; sys.path.append(sys.argv[1]); "
+        "from evidence.app.build_index import build; "
+        "meta = build(sys.argv[2], sys.argv[3], memory_mb=int(sys.argv[4])); "
+        "meta['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024; "
+        "print(json.dumps(meta))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code, ROOT, dump, out, str(memory_mb)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--memory-mb", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    from evidence.app.local_index import LocalIndex
+
+    print("⏱️  Offline evidence index benchmark")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        dump, out = os.path.join(tmp, "pages.jsonl"), os.path.join(tmp, "index")
+        words = write_dump(dump, args.pages, args.vocabulary)
+        print(f"pages: {args.pages}  vocabulary: {args.vocabulary}  dump: {os.path.getsize(dump) / 1e6:.0f} MB")
+
+        meta = build_in_child(dump, out, args.memory_mb)
+        print(f"build: {meta['seconds']}s, {meta['runs']} runs, {meta['terms']} terms, "
+              f"{meta['postings']} postings, peak RSS {meta['max_rss_mb']:.0f} MB (--memory-mb {args.memory_mb})")
+
+        started = time.perf_counter()
+        index = LocalIndex(out)
+        print(f"open: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        rng = random.Random(11)
+        # Mix of common and rare words, like claim keywords
+        queries = [" ".join(rng.choice(words[:rank]) for rank in (100, 5000, len(words))) for _ in range(args.queries)]
+        titles = [[f"Page {rng.randrange(args.pages)}" for _ in range(20)] for _ in range(args.queries)]
+
+        print(f"{'operation':>16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, call, inputs in (
+            ("search (limit 5)", lambda query: index.search(query, 5), queries),
+            ("summaries x20", index.get_summaries, titles),
+        ):
+            timings = []
+            for value in inputs:
+                started = time.perf_counter()
+                call(value)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{name:>16} {statistics.median(timings):>9.2f} {percentile(timings, 95):>9.2f} "
+                  f"{percentile(timings, 99):>9.2f}")
+        index.close()
+    print(f"benchmark process peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Cost of the Prometheus and tracing instrumentation: a FastAPI route called
+directly over ASGI (no network, no client) with and without MetricsMiddleware
+and TracingMiddleware (sampled, or with TRACE_SAMPLE_RATIO=0), plus the cost
+of one labelled histogram observation and of one span, as recorded per
+pipeline stage
+
+The overhead per request is compared with a /verify p50 (--verify-p50-ms,
+default from bench_e2e.py against the fake upstreams) to show its share of
+a real request.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py
+    python benchmarks/bench_metrics_overhead.py --requests 50000 --verify-p50-ms 120
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+from fastapi import FastAPI
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
+
+from shared.metrics import MetricsMiddleware
+from shared.tracing import TracingMiddleware
+from verifier.app.metrics import PIPELINE_STAGE_SECONDS, REQUEST_SECONDS
+from verifier.app.tracing import tracer
+
+
+def create_app(*middleware):
+    app = FastAPI()
+    for cls in middleware:
+        if cls is MetricsMiddleware:
+            app.add_middleware(cls, histogram=REQUEST_SECONDS)
+        else:
+            app.add_middleware(cls, tracer=tracer)
+
+    @app.get("/claims/{claim_id}")
+    async def get_claim(claim_id: str):
+        return {"claim_id": claim_id}
+
+    return app
+
+
+async def call(app, path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def time_requests(app, requests):
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, f"/claims/{i}")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5, help="alternating rounds per mode; the median is reported")
+    parser.add_argument("--observations", type=int, default=200000)
+    parser.add_argument("--verify-p50-ms", type=float, default=150.0, help="/verify p50 to compare against")
+    args = parser.parse_args()
+
+    apps = {
+        "plain": create_app(),
+        "metrics": create_app(MetricsMiddleware),
+        "traced": create_app(MetricsMiddleware, TracingMiddleware),
+        "unsampled": create_app(MetricsMiddleware, TracingMiddleware),
+    }
+    samplers = {"traced": ALWAYS_ON, "unsampled": ParentBased(TraceIdRatioBased(0))}
+    for app in apps.values():
+        await time_requests(app, 1000)  # warm up
+    runs = {mode: [] for mode in apps}
+    for _ in range(args.rounds):
+        for mode, app in apps.items():
+            tracer.sampler = samplers.get(mode, ALWAYS_ON)
+            runs[mode].append(await time_requests(app, args.requests))
+    per_request = {mode: statistics.median(samples) for mode, samples in runs.items()}
+    overhead = per_request["metrics"] - per_request["plain"]
+
+    histogram = PIPELINE_STAGE_SECONDS.labels("bench")
+    started = time.perf_counter()
+    for _ in range(args.observations):
+        histogram.observe(0.01)
+    observe_us = (time.perf_counter() - started) / args.observations * 1e6
+    started = time.perf_counter()
+    for _ in range(args.observations):
+        PIPELINE_STAGE_SECONDS.labels("bench").observe(0.01)
+    labelled_us = (time.perf_counter() - started) / args.observations * 1e6
+    tracer.sampler = ALWAYS_ON
+    started = time.perf_counter()
+    for _ in range(args.observations // 10):
+        with tracer.start_as_current_span("pipeline bench"):
+            pass
+    span_us = (time.perf_counter() - started) / (args.observations // 10) * 1e6
+
+    print("⏱️  Metrics and tracing overhead benchmark")
+    print("=" * 50)
+    print(f"requests: {args.requests} x {args.rounds} rounds  observations: {args.observations}")
+    print(f"{'measurement':>28} {'µs':>8}")
+    print(f"{'request, no middleware':>28} {per_request['plain']:>8.1f}")
+    print(f"{'request, MetricsMiddleware':>28} {per_request['metrics']:>8.1f}")
+    print(f"{'request, + TracingMiddleware':>28} {per_request['traced']:>8.1f}")
+    print(f"{'request, trace not sampled':>28} {per_request['unsampled']:>8.1f}")
+    print(f"{'metrics overhead':>28} {overhead:>8.1f}")
+    print(f"{'tracing overhead':>28} {per_request['traced'] - per_request['metrics']:>8.1f}")
+    print(f"{'histogram observe':>28} {observe_us:>8.2f}")
+    print(f"{'labels() + observe':>28} {labelled_us:>8.2f}")
+    print(f"{'span start + end':>28} {span_us:>8.2f}")
+    # A verification records one request, ~7 stages, a few evidence calls and a verdict,
+    # and traces about 20 spans in the verifier
+    per_verify = overhead + 12 * labelled_us
+    traced = per_verify + per_request["traced"] - per_request["metrics"] + 20 * span_us
+    for name, cost in (("metrics", per_verify), ("metrics + tracing", traced)):
+        print(f"{name} per /verify: ~{cost:.0f} µs = {cost / (args.verify_p50_ms * 1000):.4%} "
+              f"of a {args.verify_p50_ms:.0f} ms p50")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
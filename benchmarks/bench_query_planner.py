@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Evidence query planning: upstream searches per claim and evidence precision
+on a fixed labeled claim set, single-keyword lookups vs planned queries
+
+Builds the offline BM25 index (evidence.app.local_index) over a small corpus
+of encyclopedia-style intros, with pages for the claims' topics and for the
+common words they contain ("Causality", "Technology", ...), and a
+document-frequency table over the same corpus (or --df-table). Each claim
+is looked up like the verifier does and the merged evidence is compared
+with the pages labeled relevant for it.
+
+Usage:
+    python benchmarks/bench_query_planner.py
+    python benchmarks/bench_query_planner.py --df-table /models/query-df.json.gz --verbose
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'verifier', 'app'))
+
+from benchmarks.fake_mediawiki import DEFAULT_PAGES
+from evidence.app.local_index import IndexBuilder, LocalIndex
+from nlp import simple_keywords
+from query_planner import DocumentFrequencies, QueryPlanner
+
+PAGES = dict(DEFAULT_PAGES, **{
+    "Apollo 11": "Apollo 11 was the American spaceflight that first landed humans on the Moon, "
+                 "on July 20, 1969. Commander Neil Armstrong and pilot Buzz Aldrin landed the lunar module.",
+    "Moon landing conspiracy theories": "Moon landing conspiracy theories claim that some or all elements "
+                                        "of the Apollo program and the Moon landings were hoaxes staged by NASA.",
+    "NASA": "The National Aeronautics and Space Administration (NASA) is an independent agency of the US "
+            "federal government responsible for the civil space program and space research.",
+    "Autism": "Autism is a neurodevelopmental condition characterized by differences in social "
+              "communication and repetitive behavior.",
+    "MMR vaccine and autism": "Claims of a link between the MMR vaccine and autism have been extensively "
+                              "investigated and found to be false. The scientific consensus is that there is no link.",
+    "Albert Einstein": "Albert Einstein was a German-born theoretical physicist who developed the theory of "
+                       "relativity. He excelled at mathematics at school from an early age.",
+    "Bill Gates": "Bill Gates is an American businessman and philanthropist who co-founded the software "
+                  "company Microsoft and the Gates Foundation, which funds vaccine programs.",
+    "Microchip implant (human)": "A human microchip implant is an integrated circuit device encased in "
+                                 "glass and implanted in the body of a human being.",
+    "Mobile phone radiation and health": "The health effects of mobile phone radiation have been studied; "
+                                         "there is no consistent evidence that radio waves from phones cause cancer.",
+    "Human brain": "The human brain is the central organ of the nervous system. Imaging shows that people "
+                   "use virtually all of their brain, even during sleep.",
+    "Ten percent of the brain myth": "The ten percent of the brain myth states that humans generally use "
+                                     "only one-tenth of their brains. It has been debunked by neuroscience.",
+    "Lightning": "Lightning is a natural electrostatic discharge during a thunderstorm. Lightning often "
+                 "strikes the same place repeatedly, especially tall structures.",
+    "Sun": "The Sun is the star at the centre of the Solar System. The Earth and other planets orbit the Sun.",
+    "Geocentric model": "The geocentric model is a superseded description of the universe with the Earth at "
+                        "the center, in which the Sun, Moon and planets revolve around the Earth.",
+    "Goldfish": "The goldfish is a freshwater fish. Studies have shown that goldfish have a memory span of "
+                "at least three months, not three seconds.",
+    "Bleach": "Bleach is a chemical product used to remove color and to disinfect. Drinking bleach is "
+              "dangerous and does not cure any disease.",
+    "Global warming controversy": "The global warming controversy concerns public debate over climate "
+                                  "change; some have claimed it is a hoax, which the scientific consensus rejects.",
+    # Pages for the common words of the claims
+    "Causality": "Causality is the influence by which one event or process, a cause, contributes to the "
+                 "production of another, an effect. Many causes can contribute to one effect.",
+    "Technology": "Technology is the application of knowledge to practical goals. Technology causes change "
+                  "in society, and new technology networks spread it to people.",
+    "Computer network": "A computer network is a set of computers sharing resources over network nodes. "
+                        "Networks use common communication protocols.",
+    "Outer space": "Outer space is the expanse beyond Earth and its atmosphere. Objects in space are visible "
+                   "from Earth with telescopes.",
+    "Visibility": "Visibility is the distance at which an object or light can be clearly discerned. "
+                  "Visible objects depend on light and the human eye.",
+    "Human": "Humans are the most common and widespread species of primate. People use tools, language and "
+             "have a large brain.",
+    "School": "A school is an educational institution where pupils study subjects such as mathematics; "
+              "students who failed an exam can repeat it.",
+    "Mathematics": "Mathematics is a field of study that discovers and organizes abstract objects, methods "
+                   "and theories; maths is taught at school.",
+    "Invention": "An invention is a unique device, method or process. Many inventions were invented in "
+                 "China, like paper and the compass.",
+    "China": "China is a country in East Asia. It is the second most populous country in the world.",
+    "Hoax": "A hoax is a widely publicized falsehood made to deceive people. Famous hoaxes were staged "
+            "and later admitted by their creators.",
+    "Cancer": "Cancer is a group of diseases involving abnormal cell growth. Smoking causes cancer.",
+    "Memory": "Memory is the faculty of the mind by which data is encoded, stored and retrieved. Short "
+              "term memory lasts seconds.",
+    "Percentage": "A percentage is a number or ratio expressed as a fraction of 100; ten percent is one tenth.",
+    "Place": "A place is a location in space. The same place can be described by coordinates.",
+    "Microchip": "A microchip, or integrated circuit, is a set of electronic circuits on one small flat "
+                 "piece of semiconductor. People use microchips in phones and cards.",
+    "Drinking": "Drinking is the act of ingesting water or other liquids into the body through the mouth.",
+    "Water": "Water is an inorganic compound that is transparent, tasteless and nearly colorless. People "
+             "need drinking water to live.",
+})
+
+# Claim -> pages that are useful evidence for it
+LABELED_CLAIMS = {
+    "5G networks cause COVID-19": {"5G", "COVID-19", "5G misinformation", "COVID-19 pandemic"},
+    "Is the Great Wall of China visible from space?": {"Great Wall of China"},
+    "Vaccines cause autism": {"Vaccine", "Autism", "MMR vaccine and autism"},
+    "The Apollo 11 moon landing was faked": {"Apollo 11", "Moon landing", "Moon landing conspiracy theories"},
+    "The Earth is flat": {"Flat Earth", "Earth"},
+    "Climate change is a hoax invented by China": {"Climate change", "Global warming controversy"},
+    "Einstein failed math at school": {"Albert Einstein"},
+    "Radio waves from mobile phones cause cancer": {"Radio wave", "Mobile phone", "Mobile phone radiation and health"},
+    "Bill Gates wants to microchip people with vaccines": {"Bill Gates", "Vaccine", "Microchip implant (human)"},
+    "NASA admitted the moon landing was staged": {"NASA", "Moon landing", "Moon landing conspiracy theories"},
+    "Drinking bleach cures COVID-19": {"Bleach", "COVID-19"},
+    "Humans only use 10 percent of their brain": {"Ten percent of the brain myth", "Human brain"},
+    "Lightning never strikes the same place twice": {"Lightning"},
+    "The Sun revolves around the Earth": {"Sun", "Geocentric model", "Earth"},
+    "Goldfish have a three second memory": {"Goldfish"},
+}
+
+RESULTS_PER_QUERY = 3  # EVIDENCE_RESULTS_PER_KEYWORD
+
+
+def evaluate(index, plan, verbose=False):
+    searches = retrieved = relevant = found = labeled = 0
+    for claim, labels in LABELED_CLAIMS.items():
+        queries = plan(claim)
+        titles = list(dict.fromkeys(
+            result["title"] for query in queries for result in index.search(query, RESULTS_PER_QUERY)
+        ))
+        searches += len(queries)
+        retrieved += len(titles)
+        relevant += sum(title in labels for title in titles)
+        found += len(labels & set(titles))
+        labeled += len(labels)
+        if verbose:
+            print(f"   {claim!r}: {queries} -> {titles}")
+    claims = len(LABELED_CLAIMS)
+    return {
+        "searches": searches / claims,
+        "evidence": retrieved / claims,
+        "precision": relevant / retrieved if retrieved else 0.0,
+        "recall": found / labeled,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--df-table", help="document-frequency table (default: counted over the corpus)")
+    parser.add_argument("--max-df-ratio", type=float, default=0.05)
+    parser.add_argument("--verbose", action="store_true", help="print the queries and pages per claim")
+    args = parser.parse_args()
+
+    documents = [f"{title}. {extract}" for title, extract in PAGES.items()]
+    table = DocumentFrequencies.load(args.df_table) if args.df_table else DocumentFrequencies.build(documents)
+    planner = QueryPlanner(table, max_df_ratio=args.max_df_ratio)
+
+    print("⏱️  Evidence query planning benchmark")
+    print("=" * 50)
+    print(f"pages: {len(PAGES)}  labeled claims: {len(LABELED_CLAIMS)}  df table: {table.documents} documents")
+    with tempfile.TemporaryDirectory() as tmp:
+        builder = IndexBuilder(tmp)
+        for title, extract in PAGES.items():
+            builder.add(title, extract)
+        builder.finish()
+        index = LocalIndex(tmp)
+
+        print(f"{'lookups':>22} {'searches':>9} {'evidence':>9} {'precision':>10} {'recall':>7}")
+        for name, plan in (
+            ("3 single keywords", lambda claim: simple_keywords(claim)[:3]),
+            ("planned queries", planner.plan),
+        ):
+            if args.verbose:
+                print(f"{name}:")
+            result = evaluate(index, plan, args.verbose)
+            print(f"{name:>22} {result['searches']:>9.2f} {result['evidence']:>9.2f} "
+                  f"{result['precision']:>10.2f} {result['recall']:>7.2f}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
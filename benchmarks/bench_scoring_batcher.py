@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark scoring micro-batching: concurrent verifications' scoring jobs
+sent one by one vs coalesced by the ScoringBatcher into one vectorized pass
+
+Each job scores one claim against --snippets evidence snippets with a
+vectorizer fitted offline (snippet vector cache warm, as in steady state),
+on a one-worker thread pool. Reports claims/s, per-job latency (queueing
+included) and the mean batch size.
+
+Usage:
+    python benchmarks/bench_scoring_batcher.py
+    python benchmarks/bench_scoring_batcher.py --concurrency 64 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add the verifier app (and shared/, which it imports) to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'verifier', 'app'))
+
+import nlp
+import scoring_tfidf
+from bench_similarity import CLAIM, make_snippets
+from shared.stats import percentile
+
+
+async def drive(batcher, args, snippets):
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await batcher.analyze([f"{CLAIM} {i}"], [snippets])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.jobs)))
+    return latencies, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="verifications scoring at the same time")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--snippets", type=int, default=15, help="evidence snippets per claim")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-claims", type=int, default=32)
+    args = parser.parse_args()
+
+    scoring_tfidf.set_scoring_model(scoring_tfidf.fit_scoring_model(make_snippets(1000), min_df=1))
+    nlp.get_scorer("tfidf")
+    snippets = make_snippets(args.snippets)
+
+    print("⏱️  Scoring micro-batching benchmark")
+    print("=" * 50)
+    print(f"concurrency: {args.concurrency}  jobs: {args.jobs}  snippets per claim: {args.snippets}")
+    print(f"{'mode':>8} {'claims/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'claims/batch':>13} {'wait p95 ms':>12}")
+    for mode, max_claims in (("single", 1), ("batched", args.max_claims)):
+        executor = nlp.NLPExecutor("thread", workers=1, max_queue=args.jobs)
+        batcher = nlp.ScoringBatcher(executor, max_wait_ms=args.max_wait_ms, max_claims=max_claims)
+        await batcher.analyze([CLAIM], [snippets])  # start the pool, cache the snippet vectors
+        batcher.counters.clear()
+        batcher.waits.clear()
+        latencies, elapsed = await drive(batcher, args, snippets)
+        stats = batcher.stats()
+        print(f"{mode:>8} {args.jobs / elapsed:>9.0f} {statistics.median(latencies):>8.2f} "
+              f"{percentile(latencies, 99):>8.2f} {stats['claims_per_batch'] or 1.0:>13.1f} "
+              f"{stats['queue_wait_ms']['p95']:>12.2f}")
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-claim scoring: one TF-IDF fit per snippet vs one batched fit
+vs transform() with a vectorizer fitted offline (SCORING_MODEL_PATH), cold
+and with the snippet vectors already cached
+
+Usage:
+    python benchmarks/bench_similarity.py
+"""
+import os
+import sys
+import timeit
+
+# Add the verifier app (and shared/, which it imports) to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'verifier', 'app'))
+
+import scoring_tfidf
+from scoring_tfidf import fit_scoring_model, similarity_score, similarity_scores
+
+CLAIM = "5G mobile networks cause the spread of COVID-19"
+
+SNIPPETS = [
+    "5G is the fifth generation technology standard for cellular networks.",
+    "Coronavirus disease 2019 (COVID-19) is a contagious disease caused by the virus SARS-CoV-2.",
+    "Misinformation related to 5G claimed that radio waves spread the virus; there is no evidence for this.",
+    "The COVID-19 pandemic is a global pandemic of coronavirus disease 2019.",
+    "A mobile network is a telecommunications network where the link to and from end nodes is wireless.",
+    "Radio waves are a type of electromagnetic radiation with the longest wavelengths.",
+    "Conspiracy theories about 5G were debunked by health authorities worldwide.",
+    "The World Health Organization is a specialized agency of the United Nations.",
+]
+
+SIZES = [5, 10, 50, 200]
+REPEAT = 5
+
+
+def make_snippets(n: int):
+    return [f"{SNIPPETS[i % len(SNIPPETS)]} (variant {i})" for i in range(n)]
+
+
+def pairwise(claim, snippets):
+    return [similarity_score(claim, snippet) for snippet in snippets]
+
+
+def best_of(fn, *args) -> float:
+    number = 3
+    return min(timeit.repeat(lambda: fn(*args), number=number, repeat=REPEAT)) / number
+
+
+if __name__ == "__main__":
+    print("⏱️  Similarity scoring benchmark (per claim)")
+    print("=" * 50)
+    print(f"{'N':>5} {'pairwise ms':>12} {'batched ms':>12} {'fitted ms':>10} {'warm ms':>9} {'speedup':>9}")
+
+    model = fit_scoring_model(make_snippets(1000), min_df=1)
+    for n in SIZES:
+        snippets = make_snippets(n)
+        scoring_tfidf.set_scoring_model(None)
+        pairwise_s = best_of(pairwise, CLAIM, snippets)
+        batched_s = best_of(similarity_scores, CLAIM, snippets)
+        scoring_tfidf.set_scoring_model(model)
+        model.snippet_cache.max_bytes = 0
+        fitted_s = best_of(similarity_scores, CLAIM, snippets)
+        model.snippet_cache.max_bytes = scoring_tfidf.SNIPPET_VECTOR_CACHE_BYTES
+        warm_s = best_of(similarity_scores, CLAIM, snippets)
+        print(f"{n:>5} {pairwise_s * 1000:>12.2f} {batched_s * 1000:>12.2f} {fitted_s * 1000:>10.2f} "
+              f"{warm_s * 1000:>9.2f} {pairwise_s / warm_s:>8.1f}x")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Fake MediaWiki server for tests and benchmarks
+
+Implements the small part of the Wikipedia APIs the evidence service uses:
+the action API search and intro extracts queries (/w/api.php) and the REST
+page summary endpoint (/api/rest_v1/page/summary/{title}), over a fixed
+in-memory corpus. Every request is counted so callers can check how many
+upstream calls an operation cost.
+
+Usage:
+    python benchmarks/fake_mediawiki.py --port 8100 --latency 0.05 --error-rate 0.02
+
+Then point the evidence service at it:
+    WIKIPEDIA_API_URL=http://localhost:8100/api/rest_v1
+    WIKIPEDIA_ACTION_API_URL=http://localhost:8100/w/api.php
+"""
+import argparse
+import asyncio
+import random
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+DEFAULT_PAGES: Dict[str, str] = {
+    "5G": "5G is the fifth generation technology standard for cellular networks, "
+          "which cellular phone companies began deploying worldwide in 2019.",
+    "COVID-19": "Coronavirus disease 2019 (COVID-19) is a contagious disease caused by "
+                "the coronavirus SARS-CoV-2.",
+    "COVID-19 pandemic": "The COVID-19 pandemic is a global pandemic of coronavirus disease "
+                         "2019 caused by severe acute respiratory syndrome coronavirus 2.",
+    "5G misinformation": "Misinformation related to 5G claimed that 5G networks cause COVID-19. "
+                         "There is no evidence for this and the claims have been debunked.",
+    "Radio wave": "Radio waves are a type of electromagnetic radiation with the longest "
+                  "wavelengths in the electromagnetic spectrum.",
+    "Mobile phone": "A mobile phone is a portable telephone that can make and receive calls "
+                    "over a radio frequency link.",
+    "Vaccine": "A vaccine is a biological preparation that provides active acquired immunity "
+               "to a particular infectious disease.",
+    "Earth": "Earth is the third planet from the Sun and the only astronomical object known "
+             "to harbor life.",
+    "Flat Earth": "Flat Earth is an archaic and scientifically disproven conception of "
+                  "the Earth's shape as a plane or disk.",
+    "Moon landing": "A Moon landing is the arrival of a spacecraft on the surface of the Moon. "
+                    "Apollo 11 was the first crewed Moon landing in 1969.",
+    "Climate change": "Climate change is the long-term shift in global temperatures and "
+                      "weather patterns, driven mainly by human activities since the 1800s.",
+    "Great Wall of China": "The Great Wall of China is a series of fortifications in China. "
+                           "It is not visible from space with the naked eye.",
+}
+
+# Redirects the fake resolves in extracts queries (from -> to)
+DEFAULT_REDIRECTS: Dict[str, str] = {
+    "Coronavirus disease 2019": "COVID-19",
+    "Covid": "COVID-19",
+}
+
+
+def _words(text: str):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def create_app(
+    pages: Optional[Dict[str, str]] = None,
+    redirects: Optional[Dict[str, str]] = None,
+    latency: float = 0.0,
+    multi_extracts: bool = True,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    """
+    Build a fake MediaWiki app.
+
+    latency is added to every request (seconds). With multi_extracts=False
+    the action API rejects prop=extracts, like a wiki without TextExtracts.
+    error_rate is the share of requests answered with a 503 (drawn from a
+    generator seeded with seed, so runs are repeatable).
+    """
+    pages = dict(DEFAULT_PAGES if pages is None else pages)
+    redirects = dict(DEFAULT_REDIRECTS if redirects is None else redirects)
+    app = FastAPI(title="Fake MediaWiki")
+    app.state.calls = Counter()
+    rng = random.Random(seed)
+
+    def normalize(title: str) -> str:
+        title = title.replace("_", " ").strip()
+        return title[:1].upper() + title[1:]
+
+    def search(query: str, limit: int):
+        terms = _words(query)
+        ranked = []
+        for title, extract in pages.items():
+            hits = len(terms & _words(title)) * 2 + len(terms & _words(extract))
+            if hits:
+                ranked.append((-hits, title))
+        ranked.sort()
+        return [title for _, title in ranked[:limit]]
+
+    @app.middleware("http")
+    async def add_latency(request: Request, call_next):
+        if latency:
+            await asyncio.sleep(latency)
+        if error_rate and request.url.path != "/stats" and rng.random() < error_rate:
+            app.state.calls["errors"] += 1
+            return JSONResponse({"error": "Service Unavailable"}, status_code=503)
+        return await call_next(request)
+
+    @app.get("/w/api.php")
+    async def action_api(request: Request):
+        params = request.query_params
+        if params.get("list") == "search":
+            app.state.calls["search"] += 1
+            limit = int(params.get("srlimit", 10))
+            titles = search(params.get("srsearch", ""), limit)
+            return {"query": {"search": [{"title": t, "snippet": pages[t][:80]} for t in titles]}}
+
+        if params.get("prop") == "extracts":
+            app.state.calls["extracts"] += 1
+            if not multi_extracts:
+                return {"error": {"code": "badvalue", "info": "Unrecognized value for parameter \"prop\": extracts."}}
+            normalized, resolved_redirects, result_pages = [], [], []
+            for requested in params.get("titles", "").split("|"):
+                title = normalize(requested)
+                if title != requested:
+                    normalized.append({"from": requested, "to": title})
+                if title in redirects:
+                    resolved_redirects.append({"from": title, "to": redirects[title]})
+                    title = redirects[title]
+                if title in pages:
+                    result_pages.append({"title": title, "extract": pages[title]})
+                else:
+                    result_pages.append({"title": title, "missing": True})
+            query = {"pages": result_pages}
+            if normalized:
+                query["normalized"] = normalized
+            if resolved_redirects:
+                query["redirects"] = resolved_redirects
+            return {"batchcomplete": True, "query": query}
+
+        raise HTTPException(status_code=400, detail="Unsupported query")
+
+    @app.get("/api/rest_v1/page/summary/{title:path}")
+    async def page_summary(title: str):
+        app.state.calls["summary"] += 1
+        title = normalize(title)
+        title = redirects.get(title, title)
+        if title not in pages:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"title": title, "extract": pages[title]}
+
+    @app.get("/stats")
+    async def stats():
+        return dict(app.state.calls)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a fake MediaWiki server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--no-extracts", action="store_true", help="reject multi-title extracts queries")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 503")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(latency=args.latency, multi_extracts=not args.no_extracts, error_rate=args.error_rate),
+        host=args.host,
+        port=args.port,
+    )
@@ -5,7 +5,12 @@ CREATE TABLE IF NOT EXISTS claims (
   user_id TEXT,
   input_type TEXT CHECK (input_type IN ('text','url')) NOT NULL,
   raw_input TEXT NOT NULL,
-  status TEXT CHECK (status IN ('pending','done','error')) DEFAULT 'pending',
+  status TEXT CHECK (status IN ('pending','running','done','error')) DEFAULT 'pending',
+  fingerprint TEXT,  -- sha256 of the normalized claim text
+  attempts INTEGER NOT NULL DEFAULT 0,
+  locked_at TIMESTAMPTZ,  -- when a worker (or request) started on the claim
+  next_attempt_at TIMESTAMPTZ,  -- retry backoff for pending claims
+  last_error TEXT,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
@@ -26,12 +31,17 @@ CREATE TABLE IF NOT EXISTS verdicts (
   label TEXT CHECK (label IN ('support','contradict','insufficient')) NOT NULL,
   confidence DOUBLE PRECISION NOT NULL,
   explanation TEXT,
+  model_version TEXT,  -- scoring model the evidence was scored with
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_claims_user_id ON claims(user_id);
 CREATE INDEX IF NOT EXISTS idx_claims_status ON claims(status);
+-- Job queue: oldest pending claim first, and running claims by lock age
+CREATE INDEX IF NOT EXISTS idx_claims_queue ON claims(created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_claims_running ON claims(locked_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_claims_fingerprint ON claims(fingerprint, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_evidence_claim_id ON evidence(claim_id);
 CREATE INDEX IF NOT EXISTS idx_evidence_source ON evidence(source);
 CREATE INDEX IF NOT EXISTS idx_verdicts_claim_id ON verdicts(claim_id);
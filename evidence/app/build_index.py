@@ -0,0 +1,172 @@
+"""
+Build the offline evidence index from a local Wikipedia dump
+
+Usage (inside the evidence container):
+    python -m app.build_index --dump pages.jsonl --out /data/wiki-index
+    python -m app.build_index --dump enwiki-latest-pages-articles.xml.bz2 --memory-mb 512
+
+Accepted dumps (optionally .gz or .bz2 compressed):
+- JSONL with one page per line: {"title": ..., "extract": ...}; "opening_text"
+  or "text" are used when there is no "extract", so CirrusSearch content
+  dumps work as they are. {"title": ..., "redirect": "Target"} adds a redirect.
+- MediaWiki XML exports (pages-articles); the intro of each article's
+  wikitext is turned into plain text and redirects are kept.
+
+Postings are spilled to sorted runs whenever they reach --memory-mb and
+merged at the end, so memory stays bounded for dumps of millions of pages.
+Serve the result with EVIDENCE_BACKEND=local EVIDENCE_INDEX_PATH=<out>.
+"""
+import argparse
+import bz2
+import gzip
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import IO, Iterator, Optional, Tuple
+
+from .local_index import EVIDENCE_INDEX_PATH, IndexBuilder
+
+MAX_EXTRACT_CHARS = 2000
+PROGRESS_EVERY = 100000
+
+# (title, extract, redirect target) per dump entry
+Page = Tuple[str, Optional[str], Optional[str]]
+
+
+def open_dump(path: str) -> IO[bytes]:
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_jsonl(f: IO[bytes]) -> Iterator[Page]:
+    for line in f:
+        if not line.strip():
+            continue
+        page = json.loads(line)
+        title = page.get("title")
+        if not title:  # e.g. the action lines of CirrusSearch dumps
+            continue
+        redirect = page.get("redirect")
+        if isinstance(redirect, list):  # CirrusSearch lists the titles redirecting here
+            for source in redirect:
+                if source.get("namespace", 0) == 0:
+                    yield source["title"], None, title
+            redirect = None
+        extract = page.get("extract") or page.get("opening_text") or page.get("text")
+        yield title, extract, redirect
+
+
+def read_xml(f: IO[bytes]) -> Iterator[Page]:
+    def local(tag: str) -> str:
+        return tag.rsplit("}", 1)[-1]
+
+    title, namespace, redirect, text = None, "0", None, None
+    for event, element in ElementTree.iterparse(f, events=("end",)):
+        tag = local(element.tag)
+        if tag == "title":
+            title = element.text
+        elif tag == "ns":
+            namespace = element.text
+        elif tag == "redirect":
+            redirect = element.get("title")
+        elif tag == "text":
+            text = element.text
+        elif tag == "page":
+            if title and namespace == "0":
+                yield title, None if redirect else wikitext_intro(text or ""), redirect
+            title, namespace, redirect, text = None, "0", None, None
+            element.clear()
+
+
+INNER_TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
+TABLE_RE = re.compile(r"\{\|.*?\|\}", re.S)
+REF_RE = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+TAG_RE = re.compile(r"<[^>]+>")
+INNER_LINK_RE = re.compile(r"\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]")
+EXTERNAL_LINK_RE = re.compile(r"\[https?://[^\s\]]+\s*([^\]]*)\]")
+NON_ARTICLE_LINKS = ("file:", "image:", "category:")
+
+
+def _link_text(match: re.Match) -> str:
+    target, label = match.group(1), match.group(2)
+    if target.strip().lower().startswith(NON_ARTICLE_LINKS):
+        return ""
+    return label if label is not None else target
+
+
+def _remove_nested(pattern: re.Pattern, text: str, replacement="") -> str:
+    previous = None
+    while previous != text:
+        previous = text
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def wikitext_intro(text: str, max_chars: int = MAX_EXTRACT_CHARS) -> str:
+    """
+    Plain text of the lead section of an article's wikitext (best effort)
+    """
+    text = re.split(r"\n==", text, maxsplit=1)[0]
+    text = COMMENT_RE.sub("", text)
+    text = REF_RE.sub("", text)
+    text = _remove_nested(INNER_TEMPLATE_RE, text)
+    text = TABLE_RE.sub("", text)
+    text = _remove_nested(INNER_LINK_RE, text, _link_text)
+    text = EXTERNAL_LINK_RE.sub(r"\1", text)
+    text = TAG_RE.sub("", text)
+    text = re.sub(r"'{2,}", "", text)
+    text = " ".join(text.split())
+    return text[:max_chars]
+
+
+def build(dump: str, out: str, dump_format: str = "auto", memory_mb: int = 256,
+          max_extract_chars: int = MAX_EXTRACT_CHARS, limit: int = 0) -> dict:
+    if dump_format == "auto":
+        dump_format = "xml" if ".xml" in os.path.basename(dump) else "jsonl"
+    reader = read_xml if dump_format == "xml" else read_jsonl
+
+    builder = IndexBuilder(out, memory_mb=memory_mb)
+    started = time.time()
+    pages = 0
+    with open_dump(dump) as f:
+        for title, extract, redirect in reader(f):
+            if redirect:
+                builder.add_redirect(title, redirect)
+            if extract:
+                builder.add(title, extract[:max_extract_chars])
+                pages += 1
+                if pages % PROGRESS_EVERY == 0:
+                    print(f"   {pages} pages ({pages / (time.time() - started):.0f}/s)")
+                if limit and pages >= limit:
+                    break
+    meta = builder.finish(source=os.path.abspath(dump))
+    meta["seconds"] = round(time.time() - started, 1)
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline evidence index")
+    parser.add_argument("--dump", required=True, help="JSONL or MediaWiki XML dump (.gz/.bz2 ok)")
+    parser.add_argument("--out", default=EVIDENCE_INDEX_PATH, help="index directory (default: $EVIDENCE_INDEX_PATH)")
+    parser.add_argument("--format", choices=["auto", "jsonl", "xml"], default="auto")
+    parser.add_argument("--memory-mb", type=int, default=256, help="postings buffered before spilling a run")
+    parser.add_argument("--max-extract-chars", type=int, default=MAX_EXTRACT_CHARS)
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many pages")
+    args = parser.parse_args(argv)
+
+    if not args.out:
+        parser.error("no index path: set EVIDENCE_INDEX_PATH or pass --out")
+
+    meta = build(args.dump, args.out, args.format, args.memory_mb, args.max_extract_chars, args.limit)
+    print(f"✅ Indexed {meta['documents']} pages ({meta['terms']} terms, {meta['redirects']} redirects, "
+          f"{meta['runs']} runs) into {args.out} in {meta['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+CACHE_MAX_ENTRIES = int(os.getenv("EVIDENCE_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("EVIDENCE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How long (seconds) an expired entry may still be served while it is refreshed
+CACHE_STALE_SECONDS = float(os.getenv("EVIDENCE_CACHE_STALE_SECONDS", "3600"))
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, size: int, expires_at: float, stale_until: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache with per-entry TTLs.
+
+    - Least recently used entries are evicted once either max_entries or
+      max_bytes (JSON size of the values) is exceeded.
+    - Expired entries are still served for stale_seconds while one
+      background load refreshes them (stale-while-revalidate).
+    - Concurrent misses for the same key share one load (single-flight).
+
+    Loaders take a list of keys and return a dict of key -> value, so a
+    batch of misses can be fetched with one upstream call. None and empty
+    values are returned to callers but never cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        stale_seconds: float = CACHE_STALE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._tasks = set()
+        self.bytes = 0
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "loads": 0,
+            "refreshes": 0,
+            "load_errors": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        hits = self.counters["hits"] + self.counters["stale_hits"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self._inflight),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        if not self.enabled or not value:
+            return
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        now = self.clock()
+        self._entries[key] = _Entry(value, size, now + ttl, now + ttl + self.stale_seconds)
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        Get one value, calling loader() on a miss
+        """
+        async def load_one(keys: List[Hashable]) -> Dict[Hashable, Any]:
+            return {key: await loader()}
+
+        values = await self.get_many_or_load([key], load_one, ttl)
+        return values.get(key)
+
+    async def get_many_or_load(
+        self,
+        keys: List[Hashable],
+        loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        ttl: float,
+    ) -> Dict[Hashable, Any]:
+        """
+        Get many values, loading all misses with one loader(keys) call.
+
+        Keys without a value are left out of the result.
+        """
+        now = self.clock()
+        values: Dict[Hashable, Any] = {}
+        waiting: Dict[Hashable, asyncio.Future] = {}
+        missing: List[Hashable] = []
+        stale: List[Hashable] = []
+
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key) if self.enabled else None
+            if entry is not None and now >= entry.stale_until:
+                self._remove(key)
+                self.counters["expirations"] += 1
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                values[key] = entry.value
+                if now < entry.expires_at:
+                    self.counters["hits"] += 1
+                else:
+                    self.counters["stale_hits"] += 1
+                    if key not in self._inflight:
+                        stale.append(key)
+            elif key in self._inflight:
+                self.counters["misses"] += 1
+                self.counters["coalesced"] += 1
+                waiting[key] = self._inflight[key]
+            else:
+                self.counters["misses"] += 1
+                missing.append(key)
+
+        if stale:
+            self.counters["refreshes"] += len(stale)
+            self._start_load(stale, loader, ttl)
+        if missing:
+            waiting.update(self._start_load(missing, loader, ttl))
+
+        for key, future in waiting.items():
+            # shield: a cancelled caller must not cancel a load others wait on
+            value = await asyncio.shield(future)
+            if value is not None:
+                values[key] = value
+
+        return values
+
+    def _start_load(
+        self,
+        keys: List[Hashable],
+        loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        ttl: float,
+    ) -> Dict[Hashable, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for key in keys:
+            future = loop.create_future()
+            # Mark exceptions as retrieved when nobody waits (background refresh)
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+            futures[key] = future
+        self.counters["loads"] += 1
+
+        async def run():
+            try:
+                loaded = await loader(keys)
+            except BaseException as e:
+                self.counters["load_errors"] += 1
+                for key, future in futures.items():
+                    self._inflight.pop(key, None)
+                    if not future.done():
+                        future.set_exception(e)
+                if not isinstance(e, Exception):
+                    raise
+                return
+
+            for key, future in futures.items():
+                value = loaded.get(key)
+                self.set(key, value, ttl)
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_result(value)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return futures
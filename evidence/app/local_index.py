@@ -0,0 +1,444 @@
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .wikipedia import normalize_title, page_url
+
+# "wikipedia" (live API) or "local" (index built with app.build_index)
+EVIDENCE_BACKEND = os.getenv("EVIDENCE_BACKEND", "wikipedia").lower()
+EVIDENCE_INDEX_PATH = os.getenv("EVIDENCE_INDEX_PATH", "")
+
+INDEX_FORMAT = 1
+BM25_K1 = float(os.getenv("EVIDENCE_INDEX_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("EVIDENCE_INDEX_BM25_B", "0.75"))
+# Title words count this many times towards a page's term frequencies
+TITLE_WEIGHT = 3
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from had has have he her his in is it its of on or she that the
+their there they this to was were which who will with
+""".split())
+
+EMPTY_SLOT = 0
+RUN_HEADER = struct.Struct("<HI")
+REDIRECT_CHUNK = 1 << 20
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def title_hash(title: str) -> int:
+    """
+    64-bit key of a normalised title in the title table (0 marks an empty slot)
+    """
+    value = int.from_bytes(hashlib.blake2b(title.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+def _map(path: str, dtype) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def _insert_titles(hashes: np.ndarray, docs: np.ndarray, keys: np.ndarray, doc_ids: np.ndarray) -> None:
+    """
+    Linear-probing insert of many keys at once. The first of repeated keys
+    wins, and keys already in the table are left alone.
+    """
+    mask = np.uint64(len(hashes) - 1)
+    keys, first = np.unique(keys, return_index=True)
+    doc_ids = doc_ids[first]
+    slots = keys & mask
+    while len(keys):
+        current = hashes[slots]
+        present = current == keys
+        free = np.flatnonzero(current == EMPTY_SLOT)
+        # One key claims each free slot; the others move on
+        _, claims = np.unique(slots[free], return_index=True)
+        winners = free[claims]
+        hashes[slots[winners]] = keys[winners]
+        docs[slots[winners]] = doc_ids[winners]
+        present[winners] = True
+        keys, doc_ids = keys[~present], doc_ids[~present]
+        slots = (slots[~present] + np.uint64(1)) & mask
+
+
+def _lookup_titles(hashes: np.ndarray, docs: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """
+    Doc IDs of many keys (-1 where a key is not in the table)
+    """
+    result = np.full(len(keys), -1, dtype=np.int64)
+    if not len(hashes):
+        return result
+    mask = np.uint64(len(hashes) - 1)
+    pending = np.arange(len(keys))
+    slots = keys & mask
+    while len(pending):
+        current = hashes[slots]
+        hit = current == keys[pending]
+        result[pending[hit]] = docs[slots[hit]]
+        probing = ~hit & (current != EMPTY_SLOT)
+        pending, slots = pending[probing], (slots[probing] + np.uint64(1)) & mask
+    return result
+
+
+class IndexBuilder:
+    """
+    Build an on-disk BM25 index of (title, extract) pages in bounded memory.
+
+    Postings are collected in memory until they reach memory_mb, then
+    written out as a sorted run; finish() merges the runs into one postings
+    file, so memory use does not grow with the size of the dump. The index
+    is written next to path and moved into place when complete.
+    """
+
+    def __init__(self, path: str, memory_mb: int = 256):
+        self.path = path
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self.work_dir = path.rstrip("/") + ".building"
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        os.makedirs(self.work_dir)
+
+        self._docs = open(self._file("docs.jsonl"), "wb")
+        self._redirects = open(self._file("redirects.tmp"), "wb")
+        self.doc_offsets = array("Q", [0])
+        self.doc_lengths = array("I")
+        self.title_hashes = array("Q")
+        self.redirect_count = 0
+
+        self._postings: Dict[str, array] = {}
+        self._buffered_bytes = 0
+        self._runs: List[str] = []
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    @property
+    def documents(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, title: str, extract: str) -> None:
+        title = normalize_title(title)
+        if not title or not extract:
+            return
+        doc_id = self.documents
+        line = json.dumps([title, extract], ensure_ascii=False).encode("utf-8") + b"\n"
+        self._docs.write(line)
+        self.doc_offsets.append(self.doc_offsets[-1] + len(line))
+        self.title_hashes.append(title_hash(title))
+
+        counts: Dict[str, int] = {}
+        for token in tokenize(title):
+            counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(extract):
+            counts[token] = counts.get(token, 0) + 1
+        self.doc_lengths.append(sum(counts.values()))
+
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("I")
+                self._buffered_bytes += 100 + len(term)
+            postings.append(doc_id)
+            postings.append(tf)
+            self._buffered_bytes += 8
+        if self._buffered_bytes >= self.memory_bytes:
+            self._flush_run()
+
+    def add_redirect(self, source: str, target: str) -> None:
+        """
+        Let lookups of source title return the target page's summary
+        """
+        source, target = normalize_title(source), normalize_title(target)
+        if source and target and source != target:
+            self._redirects.write(struct.pack("=QQ", title_hash(source), title_hash(target)))
+            self.redirect_count += 1
+
+    def _flush_run(self) -> None:
+        if not self._postings:
+            return
+        path = self._file(f"run-{len(self._runs):05d}.tmp")
+        with open(path, "wb") as f:
+            for term in sorted(self._postings, key=lambda term: term.encode("utf-8")):
+                encoded = term.encode("utf-8")
+                postings = self._postings[term]
+                f.write(RUN_HEADER.pack(len(encoded), len(postings)))
+                f.write(encoded)
+                postings.tofile(f)
+        self._runs.append(path)
+        self._postings.clear()
+        self._buffered_bytes = 0
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple[bytes, bytes]]:
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(RUN_HEADER.size)
+                if not header:
+                    return
+                term_length, count = RUN_HEADER.unpack(header)
+                yield f.read(term_length), f.read(count * 4)
+
+    def _merge_runs(self) -> Tuple[int, int]:
+        """
+        Merge the sorted runs into the lexicon and postings files. Runs hold
+        increasing doc IDs, so concatenating a term's postings in run order
+        keeps them sorted.
+        """
+        term_offsets, posting_offsets = array("Q", [0]), array("Q", [0])
+        terms = postings_written = 0
+        with open(self._file("terms.bin"), "wb") as terms_file, \
+                open(self._file("postings.bin"), "wb") as postings_file, \
+                open(self._file("terms.idx"), "wb") as term_index, \
+                open(self._file("postings.idx"), "wb") as posting_index:
+            merged = heapq.merge(*(self._read_run(path) for path in self._runs), key=lambda item: item[0])
+            current = None
+            for term, payload in merged:
+                if term != current:
+                    if current is not None:
+                        terms += 1
+                        term_offsets.append(term_offsets[-1] + len(current))
+                        posting_offsets.append(postings_written)
+                    terms_file.write(term)
+                    current = term
+                postings_file.write(payload)
+                postings_written += len(payload) // 4
+                if len(term_offsets) >= 65536:
+                    term_offsets[:-1].tofile(term_index)
+                    posting_offsets[:-1].tofile(posting_index)
+                    del term_offsets[:-1], posting_offsets[:-1]
+            if current is not None:
+                terms += 1
+                term_offsets.append(term_offsets[-1] + len(current))
+                posting_offsets.append(postings_written)
+            term_offsets.tofile(term_index)
+            posting_offsets.tofile(posting_index)
+        return terms, postings_written // 2
+
+    def _build_title_table(self) -> int:
+        """
+        Open-addressing table from title hash to doc ID, redirects included
+        """
+        self._redirects.close()
+        slots = 1 << max(4, math.ceil(math.log2((self.documents + self.redirect_count) * 1.5 + 1)))
+        hashes = np.zeros(slots, dtype=np.uint64)
+        docs = np.zeros(slots, dtype=np.uint32)
+
+        # A later page with the same title wins over an earlier one
+        keys = np.frombuffer(self.title_hashes, dtype=np.uint64)[::-1]
+        _insert_titles(hashes, docs, keys, np.arange(self.documents, dtype=np.uint32)[::-1])
+
+        # Real pages win over redirects; redirects to redirects are not followed
+        pairs = np.fromfile(self._file("redirects.tmp"), dtype=np.uint64).reshape(-1, 2)
+        for i in range(0, len(pairs), REDIRECT_CHUNK):
+            chunk = pairs[i:i + REDIRECT_CHUNK]
+            targets = _lookup_titles(hashes, docs, chunk[:, 1])
+            found = targets >= 0
+            _insert_titles(hashes, docs, chunk[found, 0], targets[found].astype(np.uint32))
+
+        hashes.tofile(self._file("titles.hash"))
+        docs.tofile(self._file("titles.doc"))
+        return slots
+
+    def finish(self, source: str = "") -> Dict[str, Any]:
+        self._flush_run()
+        self._docs.close()
+        terms, postings = self._merge_runs()
+        for path in self._runs:
+            os.remove(path)
+        slots = self._build_title_table()
+        os.remove(self._file("redirects.tmp"))
+
+        with open(self._file("docs.idx"), "wb") as f:
+            self.doc_offsets.tofile(f)
+        with open(self._file("doclen.bin"), "wb") as f:
+            self.doc_lengths.tofile(f)
+        meta = {
+            "format": INDEX_FORMAT,
+            "byteorder": sys.byteorder,
+            "documents": self.documents,
+            "terms": terms,
+            "postings": postings,
+            "runs": len(self._runs),
+            "redirects": self.redirect_count,
+            "title_slots": slots,
+            "avg_doc_length": sum(self.doc_lengths) / self.documents if self.documents else 0.0,
+            "source": source,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with open(self._file("meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        # Swap the finished index into place
+        previous = self.path.rstrip("/") + ".previous"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, previous)
+        os.rename(self.work_dir, self.path)
+        shutil.rmtree(previous, ignore_errors=True)
+        return meta
+
+
+class LocalIndex:
+    """
+    Read-only BM25 index of page extracts built by IndexBuilder.
+
+    Postings, the lexicon, documents and the title table are memory-mapped,
+    so opening an index is cheap and pages are shared between workers.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, path: str, k1: float = BM25_K1, b: float = BM25_B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != INDEX_FORMAT or self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Unsupported index format in {path}; rebuild it with app.build_index")
+
+        self.documents = self.meta["documents"]
+        self.postings = _map(self._file("postings.bin"), np.uint32)
+        self.posting_offsets = _map(self._file("postings.idx"), np.uint64)
+        self.term_offsets = _map(self._file("terms.idx"), np.uint64)
+        self.doc_offsets = _map(self._file("docs.idx"), np.uint64)
+        self.title_hashes = _map(self._file("titles.hash"), np.uint64)
+        self.title_docs = _map(self._file("titles.doc"), np.uint32)
+        self._terms_file = open(self._file("terms.bin"), "rb")
+        self._docs_file = open(self._file("docs.jsonl"), "rb")
+        self.terms = self._mmap(self._terms_file)
+        self.docs = self._mmap(self._docs_file)
+
+        # BM25 length normalisation per document, computed once
+        doc_lengths = _map(self._file("doclen.bin"), np.uint32).astype(np.float32)
+        avg_length = self.meta["avg_doc_length"] or 1.0
+        self.length_norms = (k1 * (1 - b + b * doc_lengths / avg_length)).astype(np.float32)
+        self.counters = {"searches": 0, "summaries": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["LocalIndex"]:
+        """
+        Open the index at EVIDENCE_INDEX_PATH if EVIDENCE_BACKEND is local
+        """
+        if EVIDENCE_BACKEND == "wikipedia":
+            return None
+        if EVIDENCE_BACKEND != "local":
+            raise ValueError(f"Unknown EVIDENCE_BACKEND {EVIDENCE_BACKEND!r} (expected wikipedia or local)")
+        if not EVIDENCE_INDEX_PATH:
+            raise ValueError("EVIDENCE_BACKEND=local needs EVIDENCE_INDEX_PATH")
+        return cls(EVIDENCE_INDEX_PATH)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @staticmethod
+    def _mmap(f) -> bytes:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _term(self, i: int) -> bytes:
+        return self.terms[int(self.term_offsets[i]):int(self.term_offsets[i + 1])]
+
+    def _postings(self, term: str) -> Optional[np.ndarray]:
+        """
+        (doc ID, term frequency) pairs of a term, by binary search in the lexicon
+        """
+        target = term.encode("utf-8")
+        low, high = 0, len(self.term_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low >= len(self.term_offsets) - 1 or self._term(low) != target:
+            return None
+        start, end = int(self.posting_offsets[low]), int(self.posting_offsets[low + 1])
+        return self.postings[start:end].reshape(-1, 2)
+
+    def _document(self, doc_id: int) -> Tuple[str, str]:
+        start, end = int(self.doc_offsets[doc_id]), int(self.doc_offsets[doc_id + 1])
+        title, extract = json.loads(self.docs[start:end])
+        return title, extract
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Pages ranked by BM25 over title and extract
+        """
+        self.counters["searches"] += 1
+        scores = None
+        for term in dict.fromkeys(tokenize(query)):
+            postings = self._postings(term)
+            if postings is None or not len(postings):
+                continue
+            doc_ids = postings[:, 0]
+            tf = postings[:, 1].astype(np.float32)
+            df = len(doc_ids)
+            idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+            if scores is None:
+                scores = np.zeros(self.documents, dtype=np.float32)
+            scores[doc_ids] += idf * tf * (self.k1 + 1) / (tf + self.length_norms[doc_ids])
+        if scores is None or limit <= 0:
+            return []
+
+        matches = np.flatnonzero(scores)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        ranked = sorted(matches.tolist(), key=lambda doc_id: (-scores[doc_id], doc_id))
+
+        results = []
+        for doc_id in ranked:
+            title, extract = self._document(doc_id)
+            results.append({
+                "title": title,
+                "url": page_url(title),
+                "snippet": extract,
+                "score": 0.0  # Will be calculated by verifier
+            })
+        return results
+
+    def get_summary(self, title: str) -> Optional[str]:
+        return self.get_summaries([title]).get(title)
+
+    def get_summaries(self, titles: Iterable[str]) -> Dict[str, str]:
+        """
+        Extracts keyed by the requested title; redirects are followed
+        """
+        titles = list(titles)
+        self.counters["summaries"] += len(titles)
+        keys = np.array([title_hash(normalize_title(title)) for title in titles], dtype=np.uint64)
+        summaries = {}
+        for title, doc_id in zip(titles, _lookup_titles(self.title_hashes, self.title_docs, keys).tolist()):
+            if doc_id >= 0:
+                summaries[title] = self._document(doc_id)[1]
+        return summaries
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            **{key: self.meta[key] for key in ("documents", "terms", "postings", "redirects", "built_at")},
+            **self.counters,
+        }
+
+    def close(self) -> None:
+        for mapped in (self.terms, self.docs):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._terms_file.close()
+        self._docs_file.close()
@@ -1,6 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any
-from .wikipedia import wiki_client
+from shared.metrics import MetricsMiddleware, metrics_response
+from shared.tracing import TracingMiddleware
+from .local_index import LocalIndex
+from .metrics import REGISTRY, REQUEST_SECONDS
+from .tracing import provider as trace_provider, tracer
+from .wikipedia import wiki_client, page_url, track_upstream_calls
+
+MAX_SUMMARY_TITLES = 100
 
 app = FastAPI(
     title="Claim-Checker Evidence Service",
@@ -8,6 +16,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_SECONDS)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
+
+class SummariesRequest(BaseModel):
+    titles: List[str] = Field(..., min_length=1, max_length=MAX_SUMMARY_TITLES)
+
 
 @app.get("/")
 async def root():
@@ -20,7 +35,7 @@ async def health_check():
 
 
 @app.get("/wikipedia/search")
-async def search_wikipedia(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+async def search_wikipedia(query: str, response: Response, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Search Wikipedia for evidence related to a query
     """
@@ -28,7 +43,9 @@ async def search_wikipedia(query: str, limit: int = 5) -> List[Dict[str, Any]]:
         raise HTTPException(status_code=400, detail="Query parameter is required")
     
     try:
-        results = await wiki_client.search_pages(query, limit)
+        with track_upstream_calls() as upstream_calls:
+            results = await wiki_client.search_pages(query, limit)
+        response.headers["X-Upstream-Calls"] = str(upstream_calls.count)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching Wikipedia: {str(e)}")
@@ -44,7 +61,7 @@ async def get_wikipedia_summary(title: str) -> Dict[str, Any]:
         if summary:
             return {
                 "title": title,
-                "url": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+                "url": page_url(title),
                 "snippet": summary
             }
         else:
@@ -55,6 +72,71 @@ async def get_wikipedia_summary(title: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Error getting summary: {str(e)}")
 
 
+@app.post("/wikipedia/summaries")
+async def get_wikipedia_summaries(request: SummariesRequest, response: Response) -> List[Dict[str, Any]]:
+    """
+    Get Wikipedia page summaries for many titles at once
+
+    Titles without a summary are left out of the result.
+    """
+    try:
+        with track_upstream_calls() as upstream_calls:
+            summaries = await wiki_client.get_page_summaries(request.titles)
+        response.headers["X-Upstream-Calls"] = str(upstream_calls.count)
+        return [
+            {
+                "title": title,
+                "url": page_url(title),
+                "snippet": summary
+            }
+            for title, summary in summaries.items()
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting summaries: {str(e)}")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics
+    """
+    return metrics_response(REGISTRY)
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss/eviction counters of the evidence cache
+    """
+    stats = wiki_client.cache.stats()
+    if wiki_client.store is not None:
+        stats["store"] = wiki_client.store.stats()
+    if wiki_client.index is not None:
+        stats["index"] = wiki_client.index.stats()
+    return stats
+
+
+@app.on_event("startup")
+async def open_local_index():
+    """
+    With EVIDENCE_BACKEND=local, answer from the offline index instead of Wikipedia
+    """
+    index = LocalIndex.from_env()
+    if index is None:
+        return
+    wiki_client.index = index
+    # Local lookups are as cheap as the store, so skip it
+    if wiki_client.store is not None:
+        wiki_client.store.close()
+        wiki_client.store = None
+    print(f"Serving evidence from local index {index.path} ({index.documents} pages)")
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     await wiki_client.close()
+    if wiki_client.store is not None:
+        wiki_client.store.close()
+    if wiki_client.index is not None:
+        wiki_client.index.close()
+    trace_provider.shutdown()
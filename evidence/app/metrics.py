@@ -0,0 +1,15 @@
+"""
+Prometheus metrics of the evidence service, served at GET /metrics
+"""
+from prometheus_client import Counter, Histogram
+
+from shared.metrics import request_histogram, service_registry
+
+REGISTRY = service_registry()
+REQUEST_SECONDS = request_histogram(REGISTRY)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "evidence_upstream_request_seconds", "Latency of calls to the Wikipedia APIs", ["call"], registry=REGISTRY
+)
+UPSTREAM_REQUESTS = Counter(
+    "evidence_upstream_requests", "Calls to the Wikipedia APIs", ["call", "outcome"], registry=REGISTRY
+)
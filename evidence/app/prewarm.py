@@ -0,0 +1,92 @@
+"""
+Pre-warm the persistent evidence store with page summaries
+
+Usage (inside the evidence container):
+    python -m app.prewarm --titles titles.txt
+    python -m app.prewarm --from-db postgresql://app:app@db:5432/claims
+
+Titles are fetched in batches through WikipediaClient, so titles already
+in the store cost nothing and the rest use multi-title extracts queries.
+The store location comes from EVIDENCE_STORE_PATH unless --store is given.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Iterable, List
+
+from .store import EvidenceStore
+from .wikipedia import WikipediaClient, normalize_title, track_upstream_calls
+
+BATCH_SIZE = 20
+
+
+def read_titles_file(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def read_titles_from_db(database_url: str, limit: int) -> List[str]:
+    """
+    Most frequently cited evidence titles from the claims database
+    """
+    try:
+        import psycopg
+    except ImportError:
+        sys.exit("psycopg is required for --from-db (pip install 'psycopg[binary]')")
+
+    # Accept SQLAlchemy style URLs (postgresql+psycopg://...)
+    database_url = database_url.replace("postgresql+psycopg://", "postgresql://")
+    with psycopg.connect(database_url) as conn:
+        rows = conn.execute(
+            "SELECT title FROM evidence WHERE title IS NOT NULL "
+            "GROUP BY title ORDER BY COUNT(*) DESC LIMIT %s",
+            (limit,),
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+async def prewarm(client: WikipediaClient, titles: Iterable[str]) -> dict:
+    titles = list(dict.fromkeys(normalize_title(title) for title in titles if title.strip()))
+    found = 0
+    with track_upstream_calls() as upstream_calls:
+        for i in range(0, len(titles), BATCH_SIZE):
+            summaries = await client.get_page_summaries(titles[i:i + BATCH_SIZE])
+            found += len(summaries)
+    return {"titles": len(titles), "found": found, "upstream_calls": upstream_calls.count}
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warm the persistent evidence store")
+    parser.add_argument("--store", default=os.getenv("EVIDENCE_STORE_PATH", ""), help="SQLite store path")
+    parser.add_argument("--titles", help="file with one page title per line")
+    parser.add_argument("--from-db", nargs="?", const=os.getenv("DATABASE_URL", ""), metavar="DATABASE_URL",
+                        help="read past evidence titles from the claims database (default: $DATABASE_URL)")
+    parser.add_argument("--db-limit", type=int, default=10000, help="max titles to read from the database")
+    args = parser.parse_args(argv)
+
+    if not args.store:
+        parser.error("no store path: set EVIDENCE_STORE_PATH or pass --store")
+    if not args.titles and not args.from_db:
+        parser.error("nothing to pre-warm: pass --titles and/or --from-db")
+
+    titles = []
+    if args.titles:
+        titles.extend(read_titles_file(args.titles))
+    if args.from_db:
+        titles.extend(read_titles_from_db(args.from_db, args.db_limit))
+
+    store = EvidenceStore(args.store)
+    client = WikipediaClient(store=store)
+    try:
+        result = await prewarm(client, titles)
+    finally:
+        await client.close()
+        store.close()
+
+    print(f"✅ Pre-warmed {result['found']}/{result['titles']} titles "
+          f"with {result['upstream_calls']} upstream calls into {args.store}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
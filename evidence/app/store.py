@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+STORE_PATH = os.getenv("EVIDENCE_STORE_PATH", "")
+STORE_TTL = float(os.getenv("EVIDENCE_STORE_TTL", str(7 * 24 * 3600)))
+STORE_MAX_BYTES = int(os.getenv("EVIDENCE_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Check the size cap after this many writes
+STORE_COMPACT_EVERY = int(os.getenv("EVIDENCE_STORE_COMPACT_EVERY", "1000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+  kind TEXT NOT NULL,          -- 'summary' | 'search'
+  key TEXT NOT NULL,           -- normalised title / query
+  value TEXT NOT NULL,         -- JSON
+  size INTEGER NOT NULL,
+  stored_at REAL NOT NULL,
+  accessed_at REAL NOT NULL,
+  PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_stored_at ON entries(stored_at);
+"""
+
+
+class EvidenceStore:
+    """
+    Persistent SQLite store of page summaries and search results.
+
+    Entries older than ttl seconds are ignored on read and removed by
+    compact(), which also drops the least recently read entries until the
+    stored values fit in max_bytes. The database uses incremental
+    auto-vacuum, so freed pages are returned to the filesystem without
+    rewriting the file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = STORE_TTL,
+        max_bytes: int = STORE_MAX_BYTES,
+        compact_every: int = STORE_COMPACT_EVERY,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compact_every = compact_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Must be set before the first table is created; existing stores are
+        # converted once here, before the store serves any request
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._conn.execute("VACUUM")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.compact()
+
+    @classmethod
+    def from_env(cls) -> Optional["EvidenceStore"]:
+        """
+        Open the store configured by EVIDENCE_STORE_PATH, or None if unset
+        """
+        if not STORE_PATH:
+            return None
+        return cls(STORE_PATH)
+
+    def get_many(self, kind: str, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE kind = ? AND key IN ({placeholders}) AND stored_at > ?",
+                    [kind, *chunk, now - self.ttl],
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE kind = ? AND key = ?",
+                    [(now, kind, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        return self.get_many(kind, [key]).get(key)
+
+    def put_many(self, kind: str, items: Iterable[Tuple[str, Any]]) -> None:
+        now = time.time()
+        rows = []
+        for key, value in items:
+            if not value:
+                continue
+            encoded = json.dumps(value)
+            rows.append((kind, key, encoded, len(encoded), now, now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (kind, key, value, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._writes += len(rows)
+            due = self._writes >= self.compact_every
+        if due:
+            self.compact()
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        self.put_many(kind, [(key, value)])
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def compact(self) -> int:
+        """
+        Drop expired entries, then least recently read ones until under the
+        size cap. Returns the number of entries removed.
+        """
+        with self._lock:
+            self._writes = 0
+            removed = self._conn.execute(
+                "DELETE FROM entries WHERE stored_at <= ?", (time.time() - self.ttl,)
+            ).rowcount
+            # Keep the most recently read entries up to the cap
+            removed += self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN ("
+                " SELECT rowid FROM ("
+                "  SELECT rowid, SUM(size) OVER (ORDER BY accessed_at DESC, rowid DESC) AS kept FROM entries"
+                " ) WHERE kept > ?"
+                ")",
+                (self.max_bytes,),
+            ).rowcount
+            self._conn.commit()
+        if removed:
+            self._release_free_pages()
+        return removed
+
+    def _release_free_pages(self) -> None:
+        """
+        Return the pages freed by compact() to the filesystem, on a connection
+        of its own so reads on the store's connection are not held up
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            # executescript steps the pragma to the end; execute() frees one page
+            conn.executescript("PRAGMA incremental_vacuum;")
+        except sqlite3.OperationalError as e:
+            print(f"Error releasing evidence store pages: {e}")
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,11 @@
+"""
+Distributed tracing of the evidence service (OpenTelemetry)
+
+Requests carrying a W3C `traceparent` header (from the verifier) continue
+the caller's trace, with a client span per Wikipedia call under the
+request's server span.
+"""
+from shared.tracing import service_provider
+
+provider = service_provider("evidence")
+tracer = provider.get_tracer("evidence")
@@ -1,23 +1,141 @@
+import asyncio
 import httpx
 import re
-from typing import List, Optional, Dict, Any
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Dict, Any, Iterator
 import os
+from opentelemetry.trace import SpanKind
+from shared.tracing import trace_headers
+from .cache import TTLCache
+from .metrics import UPSTREAM_REQUEST_SECONDS, UPSTREAM_REQUESTS
+from .store import EvidenceStore
+from .tracing import tracer
 
 WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://en.wikipedia.org/api/rest_v1")
+WIKIPEDIA_ACTION_API_URL = os.getenv("WIKIPEDIA_ACTION_API_URL", "https://en.wikipedia.org/w/api.php")
 
+# Fetch many intro extracts with one action API query; set to false for
+# upstreams without the TextExtracts extension (falls back to REST summaries)
+WIKIPEDIA_MULTI_EXTRACTS = os.getenv("WIKIPEDIA_MULTI_EXTRACTS", "true").lower() in ("1", "true", "yes")
+# TextExtracts returns at most 20 intro extracts per query
+EXTRACTS_PER_QUERY = 20
+# Concurrent REST summary fetches when multi-title extracts are unavailable
+SUMMARY_CONCURRENCY = int(os.getenv("WIKIPEDIA_SUMMARY_CONCURRENCY", "5"))
 
-class WikipediaClient:
+# Freshness (seconds) of cached search results and page summaries
+SEARCH_CACHE_TTL = float(os.getenv("EVIDENCE_CACHE_SEARCH_TTL", "3600"))
+SUMMARY_CACHE_TTL = float(os.getenv("EVIDENCE_CACHE_SUMMARY_TTL", "86400"))
+
+
+class UpstreamCallCounter:
     def __init__(self):
+        self.count = 0
+
+
+_upstream_calls: ContextVar[Optional[UpstreamCallCounter]] = ContextVar("upstream_calls", default=None)
+
+
+@contextmanager
+def track_upstream_calls() -> Iterator[UpstreamCallCounter]:
+    """
+    Count the upstream Wikipedia calls made inside the block (including
+    calls made by tasks it spawns)
+    """
+    counter = UpstreamCallCounter()
+    token = _upstream_calls.set(counter)
+    try:
+        yield counter
+    finally:
+        _upstream_calls.reset(token)
+
+
+def page_url(title: str) -> str:
+    return f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalise a page title the way MediaWiki does (underscores, first letter)
+    """
+    title = " ".join(title.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class WikipediaClient:
+    def __init__(
+        self,
+        session: Optional[httpx.AsyncClient] = None,
+        cache: Optional[TTLCache] = None,
+        store: Optional[EvidenceStore] = None,
+        index=None,
+    ):
         self.base_url = WIKIPEDIA_API_URL
-        self.session = httpx.AsyncClient(timeout=10.0)
+        self.action_api_url = WIKIPEDIA_ACTION_API_URL
+        self.multi_extracts = WIKIPEDIA_MULTI_EXTRACTS
+        self.session = session or httpx.AsyncClient(timeout=10.0)
+        self.cache = cache if cache is not None else TTLCache()
+        # Optional persistent store, read before any upstream call
+        self.store = store
+        # Optional LocalIndex answering searches and summaries instead of Wikipedia
+        self.index = index
+        self.upstream_calls = 0
+
+    async def _get(self, call: str, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        GET from Wikipedia, counted per request and per call type
+        ("search", "extracts", "summary"), timed and traced
+        """
+        self.upstream_calls += 1
+        counter = _upstream_calls.get()
+        if counter is not None:
+            counter.count += 1
+
+        started = time.perf_counter()
+        outcome = "error"
+        with tracer.start_as_current_span(f"wikipedia {call}", kind=SpanKind.CLIENT) as span:
+            try:
+                response = await self.session.get(url, params=params, headers=trace_headers())
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code == 404:
+                    outcome = "not_found"
+                response.raise_for_status()
+                outcome = "ok"
+                return response
+            finally:
+                UPSTREAM_REQUEST_SECONDS.labels(call).observe(time.perf_counter() - started)
+                UPSTREAM_REQUESTS.labels(call, outcome).inc()
 
     async def search_pages(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Search Wikipedia pages for a given query
         """
+        key = ("search", normalize_query(query), limit)
+        results = await self.cache.get_or_load(key, lambda: self._search_pages(query, limit), SEARCH_CACHE_TTL)
+        return results or []
+
+    async def _search_pages(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        store_key = f"{limit}:{normalize_query(query)}"
+        if self.store is not None:
+            stored = await asyncio.to_thread(self.store.get, "search", store_key)
+            if stored:
+                return stored
+
+        results = await self._search_upstream(query, limit)
+        if self.store is not None and results:
+            await asyncio.to_thread(self.store.put, "search", store_key, results)
+        return results
+
+    async def _search_upstream(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        if self.index is not None:
+            return await asyncio.to_thread(self.index.search, query, limit)
         try:
             # Use Wikipedia's search API
-            search_url = f"https://en.wikipedia.org/w/api.php"
             params = {
                 "action": "query",
                 "format": "json",
@@ -27,45 +145,170 @@ class WikipediaClient:
                 "srnamespace": 0,  # Main namespace only
                 "srprop": "snippet|title"
             }
-            
-            response = await self.session.get(search_url, params=params)
-            response.raise_for_status()
-            
+
+            response = await self._get("search", self.action_api_url, params=params)
+
             data = response.json()
+            titles = [item["title"] for item in data.get("query", {}).get("search", [])]
+
+            # Fetch the summaries for the whole result set at once
+            summaries = await self.get_page_summaries(titles)
+
             results = []
-            
-            for item in data.get("query", {}).get("search", []):
-                # Get page summary for each search result
-                summary = await self.get_page_summary(item["title"])
+            for title in titles:
+                summary = summaries.get(title)
                 if summary:
                     results.append({
-                        "title": item["title"],
-                        "url": f"https://en.wikipedia.org/wiki/{item['title'].replace(' ', '_')}",
+                        "title": title,
+                        "url": page_url(title),
                         "snippet": summary,
                         "score": 0.0  # Will be calculated by verifier
                     })
-            
+
             return results
-            
+
         except Exception as e:
             print(f"Error searching Wikipedia: {e}")
             return []
 
+    async def get_page_summaries(self, titles: List[str]) -> Dict[str, str]:
+        """
+        Get page summaries for many titles, keyed by the requested title.
+
+        Cached titles are served from the cache; the rest are fetched with
+        one multi-title extracts query per 20 titles where the upstream
+        supports it, otherwise bounded concurrent REST summary fetches.
+        Titles without a summary are left out.
+        """
+        keys = {title: ("summary", normalize_title(title)) for title in titles if title.strip()}
+
+        async def load(missing_keys):
+            fetched = await self._get_page_summaries([key[1] for key in missing_keys])
+            return {("summary", title): summary for title, summary in fetched.items()}
+
+        cached = await self.cache.get_many_or_load(list(keys.values()), load, SUMMARY_CACHE_TTL)
+        return {title: cached[key] for title, key in keys.items() if cached.get(key)}
+
+    async def _get_page_summaries(self, titles: List[str]) -> Dict[str, str]:
+        titles = list(dict.fromkeys(title for title in titles if title))
+        if self.store is None:
+            return await self._fetch_page_summaries(titles)
+
+        summaries = await asyncio.to_thread(self.store.get_many, "summary", titles)
+        remaining = [title for title in titles if title not in summaries]
+        if remaining:
+            fetched = await self._fetch_page_summaries(remaining)
+            await asyncio.to_thread(self.store.put_many, "summary", fetched.items())
+            summaries.update(fetched)
+        return summaries
+
+    async def _fetch_page_summaries(self, titles: List[str]) -> Dict[str, str]:
+        if self.index is not None:
+            return await asyncio.to_thread(self.index.get_summaries, titles)
+        summaries: Dict[str, str] = {}
+        remaining = titles
+
+        if self.multi_extracts:
+            remaining = []
+            for i in range(0, len(titles), EXTRACTS_PER_QUERY):
+                chunk = titles[i:i + EXTRACTS_PER_QUERY]
+                try:
+                    summaries.update(await self._get_extracts(chunk))
+                except Exception as e:
+                    print(f"Error getting extracts, falling back to summaries: {e}")
+                    remaining.extend(chunk)
+
+        if remaining:
+            semaphore = asyncio.Semaphore(max(SUMMARY_CONCURRENCY, 1))
+
+            async def fetch(title: str) -> Optional[str]:
+                async with semaphore:
+                    return await self._fetch_page_summary(title)
+
+            fetched = await asyncio.gather(*(fetch(title) for title in remaining))
+            for title, summary in zip(remaining, fetched):
+                if summary:
+                    summaries[title] = summary
+
+        return summaries
+
+    async def _get_extracts(self, titles: List[str]) -> Dict[str, str]:
+        """
+        Get intro extracts for up to 20 titles with a single action API query
+        """
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "prop": "extracts",
+            "exintro": 1,
+            "explaintext": 1,
+            "exlimit": len(titles),
+            "redirects": 1,
+            "titles": "|".join(titles)
+        }
+
+        response = await self._get("extracts", self.action_api_url, params=params)
+        data = response.json()
+        if "error" in data:
+            # e.g. the upstream has no TextExtracts extension
+            raise ValueError(data["error"].get("info", "extracts query failed"))
+        query = data.get("query", {})
+
+        # Follow title normalisation and redirects back to the requested title
+        renamed = {}
+        for mapping in query.get("normalized", []) + query.get("redirects", []):
+            renamed[mapping["from"]] = mapping["to"]
+
+        extracts = {
+            page["title"]: page.get("extract", "")
+            for page in query.get("pages", [])
+            if not page.get("missing") and not page.get("invalid")
+        }
+
+        summaries = {}
+        for title in titles:
+            resolved = title
+            for _ in range(3):  # normalised -> redirect -> target
+                if resolved not in renamed:
+                    break
+                resolved = renamed[resolved]
+            if extracts.get(resolved):
+                summaries[title] = extracts[resolved]
+        return summaries
+
     async def get_page_summary(self, title: str) -> Optional[str]:
         """
         Get page summary from Wikipedia REST API
         """
+        key = ("summary", normalize_title(title))
+        return await self.cache.get_or_load(key, lambda: self._get_page_summary(title), SUMMARY_CACHE_TTL)
+
+    async def _get_page_summary(self, title: str) -> Optional[str]:
+        store_key = normalize_title(title)
+        if self.store is not None:
+            stored = await asyncio.to_thread(self.store.get, "summary", store_key)
+            if stored:
+                return stored
+
+        summary = await self._fetch_page_summary(title)
+        if self.store is not None and summary:
+            await asyncio.to_thread(self.store.put, "summary", store_key, summary)
+        return summary
+
+    async def _fetch_page_summary(self, title: str) -> Optional[str]:
+        if self.index is not None:
+            return await asyncio.to_thread(self.index.get_summary, title)
         try:
             # Clean title for URL
             clean_title = title.replace(" ", "_")
             url = f"{self.base_url}/page/summary/{clean_title}"
-            
-            response = await self.session.get(url)
-            response.raise_for_status()
-            
+
+            response = await self._get("summary", url)
+
             data = response.json()
             return data.get("extract", "")
-            
+
         except Exception as e:
             print(f"Error getting page summary for {title}: {e}")
             return None
@@ -75,4 +318,4 @@ class WikipediaClient:
 
 
 # Global client instance
-wiki_client = WikipediaClient()
+wiki_client = WikipediaClient(store=EvidenceStore.from_env())
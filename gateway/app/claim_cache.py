@@ -0,0 +1,64 @@
+from collections import Counter, OrderedDict
+from typing import Dict, NamedTuple, Optional
+import os
+
+# Finished claims kept in each gateway process (0 disables the cache)
+CLAIM_CACHE_MAX_ENTRIES = int(os.getenv("CLAIM_CACHE_MAX_ENTRIES", "1000"))
+CLAIM_CACHE_MAX_AGE = int(os.getenv("CLAIM_CACHE_MAX_AGE", "31536000"))
+
+
+class CachedClaim(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class ClaimCache:
+    """
+    LRU cache of serialized responses for finished claims
+
+    Only claims the verifier marked cacheable (status done) are stored, as
+    the verifier sent them and under the verifier's ETag; they never change,
+    so entries have no expiry and leave only by eviction.
+    """
+
+    def __init__(self, max_entries: int = CLAIM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.counters = Counter()
+        self._entries: "OrderedDict[str, CachedClaim]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, claim_id: str) -> Optional[CachedClaim]:
+        entry = self._entries.get(claim_id)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(claim_id)
+        self.counters["hits"] += 1
+        return entry
+
+    def put(self, claim_id: str, body: bytes, etag: str) -> CachedClaim:
+        entry = CachedClaim(body, etag)
+        if self.max_entries <= 0:
+            return entry
+        self._entries[claim_id] = entry
+        self._entries.move_to_end(claim_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+claim_cache = ClaimCache()
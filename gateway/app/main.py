@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from shared.metrics import MetricsMiddleware, metrics_response
+from shared.tracing import TracingMiddleware
+from .metrics import REGISTRY, REQUEST_SECONDS
 from .routers import auth, claims
+from .tracing import provider as trace_provider, tracer
+from .verifier_client import close_verifier_client, get_verifier_client
 
 app = FastAPI(
     title="Claim-Checker Gateway",
@@ -17,16 +22,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_SECONDS)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(claims.router)
 
 
+@app.on_event("startup")
+async def open_verifier_client():
+    get_verifier_client()
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_verifier_client()
+    trace_provider.shutdown()
+
+
 @app.get("/")
 async def root():
     return {"message": "Claim-Checker Gateway API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics
+    """
+    return metrics_response(REGISTRY)
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "gateway"}
@@ -0,0 +1,7 @@
+"""
+Prometheus metrics of the gateway, served at GET /metrics
+"""
+from shared.metrics import request_histogram, service_registry
+
+REGISTRY = service_registry()
+REQUEST_SECONDS = request_histogram(REGISTRY)
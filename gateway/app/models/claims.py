@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Literal, Optional
 from uuid import UUID
+import os
+
+VERIFY_BATCH_MAX_CLAIMS = int(os.getenv("VERIFY_BATCH_MAX_CLAIMS", "100"))
 
 
 class VerifyClaimRequest(BaseModel):
@@ -20,18 +23,64 @@ class Verdict(BaseModel):
     label: Literal["support", "contradict", "insufficient"]
     confidence: float
     explanation: str
+    model_version: Optional[str] = None  # scoring model behind the evidence scores
 
 
 class VerifyClaimResponse(BaseModel):
     claim_id: UUID
     verdict: Verdict
     top_evidence: List[EvidenceItem]
+    cached: bool = False  # verdict reused from a recent identical claim
+    cached_from: Optional[UUID] = None
+
+
+class VerifyAcceptedResponse(BaseModel):
+    """A claim queued for verification; poll GET /claims/{claim_id}"""
+    claim_id: UUID
+    status: str
+
+
+class VerifyBatchRequest(BaseModel):
+    claims: List[VerifyClaimRequest] = Field(..., min_length=1, max_length=VERIFY_BATCH_MAX_CLAIMS)
+
+
+class VerifyBatchItem(BaseModel):
+    """Result for one claim of a batch: a verdict, or an error"""
+    claim_id: UUID
+    verdict: Optional[Verdict] = None
+    top_evidence: List[EvidenceItem] = []
+    cached: bool = False
+    cached_from: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class VerifyBatchResponse(BaseModel):
+    results: List[VerifyBatchItem]
+
+
+class ClaimVerdict(BaseModel):
+    """Verdict of a stored claim; empty while the claim is not done"""
+    label: Optional[Literal["support", "contradict", "insufficient"]] = None
+    confidence: Optional[float] = None
+    explanation: Optional[str] = None
+    model_version: Optional[str] = None
 
 
 class ClaimDetailResponse(BaseModel):
     claim_id: UUID
     input_type: str
     raw_input: str
-    status: str
-    verdict: Verdict
+    status: str  # pending | running | done | error
+    attempts: int = 0
+    error: Optional[str] = None
+    verdict: ClaimVerdict
     evidence: List[EvidenceItem]
+
+
+class ClaimLookupRequest(BaseModel):
+    claim_ids: List[UUID] = Field(..., min_length=1, max_length=100)
+
+
+class ClaimLookupResponse(BaseModel):
+    claims: List[ClaimDetailResponse]
+    missing: List[str]
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from ..models.auth import LoginRequest, LoginResponse
-from ..security.jwt import create_access_token
+from ..security.jwt import create_access_token, revoke_token, security, verify_token
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -22,3 +23,13 @@ async def login(login_data: LoginRequest):
     access_token = create_access_token(data={"sub": login_data.email})
     
     return LoginResponse(access_token=access_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Revoke the bearer token used for this request
+    """
+    verify_token(credentials.credentials)
+    revoke_token(credentials.credentials)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
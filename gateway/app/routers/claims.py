@@ -1,41 +1,100 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List
 import httpx
 import os
+import uuid
 from ..models.claims import (
     VerifyClaimRequest, 
     VerifyClaimResponse, 
-    ClaimDetailResponse
+    ClaimDetailResponse,
+    ClaimLookupRequest,
+    ClaimLookupResponse,
+    VerifyBatchRequest,
+    VerifyBatchResponse,
+    VerifyAcceptedResponse
 )
 from ..models.auth import TokenData
+from shared.http_cache import etag_matches
+from ..claim_cache import CLAIM_CACHE_MAX_AGE, CachedClaim, claim_cache
 from ..security.jwt import get_current_user
+from ..verifier_client import get_verifier_client, with_read_timeout
 
 router = APIRouter(prefix="/claims", tags=["claims"])
 
 VERIFIER_URL = os.getenv("VERIFIER_URL", "http://verifier:8000")
 
+# Batches and streams may take longer than VERIFIER_READ_TIMEOUT between reads
+VERIFY_BATCH_READ_TIMEOUT = float(os.getenv("VERIFY_BATCH_READ_TIMEOUT", "120"))
+VERIFY_STREAM_READ_TIMEOUT = float(os.getenv("VERIFY_STREAM_READ_TIMEOUT", "60"))
+
+# Keep proxies from buffering streamed progress events
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 
 @router.post("/verify", response_model=VerifyClaimResponse)
 async def verify_claim(
     claim_data: VerifyClaimRequest,
-    current_user: TokenData = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_verifier_client)
 ):
     """
     Verify a claim by sending it to the verifier service
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{VERIFIER_URL}/verify",
+        response = await client.post(
+            f"{VERIFIER_URL}/verify",
+            json={
+                "input_type": claim_data.input_type,
+                "raw_input": claim_data.raw_input,
+                "user_id": current_user.email
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Verifier service error: {e.response.text}"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Verifier service unavailable: {str(e)}"
+        )
+
+
+@router.post("/verify/stream")
+async def verify_claim_stream(
+    claim_data: VerifyClaimRequest,
+    request: Request,
+    current_user: TokenData = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_verifier_client)
+):
+    """
+    Verify a claim, relaying the verifier's progress events as they arrive
+
+    Send "Accept: text/event-stream" for Server-Sent Events; NDJSON otherwise.
+    """
+    try:
+        upstream = await client.send(
+            client.build_request(
+                "POST",
+                f"{VERIFIER_URL}/verify/stream",
                 json={
                     "input_type": claim_data.input_type,
                     "raw_input": claim_data.raw_input,
                     "user_id": current_user.email
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+                },
+                headers={"Accept": request.headers.get("accept", "application/x-ndjson")},
+                timeout=with_read_timeout(VERIFY_STREAM_READ_TIMEOUT)
+            ),
+            stream=True
+        )
+        upstream.raise_for_status()
     except httpx.HTTPStatusError as e:
+        await e.response.aread()
+        await e.response.aclose()
         raise HTTPException(
             status_code=e.response.status_code,
             detail=f"Verifier service error: {e.response.text}"
@@ -46,20 +105,150 @@ async def verify_claim(
             detail=f"Verifier service unavailable: {str(e)}"
         )
 
+    async def relay():
+        # Pass chunks on as they arrive instead of reading the whole body
+        try:
+            async for chunk in upstream.aiter_raw():
+                yield chunk
+        finally:
+            await upstream.aclose()
+
+    return StreamingResponse(
+        relay(),
+        media_type=upstream.headers.get("content-type", "application/x-ndjson"),
+        headers=STREAM_HEADERS
+    )
+
+
+@router.post("/verify/async", response_model=VerifyAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+async def verify_claim_async(
+    claim_data: VerifyClaimRequest,
+    current_user: TokenData = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_verifier_client)
+):
+    """
+    Queue a claim for verification and return its ID right away
+    """
+    try:
+        response = await client.post(
+            f"{VERIFIER_URL}/verify/async",
+            json={
+                "input_type": claim_data.input_type,
+                "raw_input": claim_data.raw_input,
+                "user_id": current_user.email
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Verifier service error: {e.response.text}"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Verifier service unavailable: {str(e)}"
+        )
+
+
+@router.post("/verify/batch", response_model=VerifyBatchResponse)
+async def verify_claims_batch(
+    batch: VerifyBatchRequest,
+    current_user: TokenData = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_verifier_client)
+):
+    """
+    Verify many claims with one call to the verifier service
+    """
+    try:
+        response = await client.post(
+            f"{VERIFIER_URL}/verify/batch",
+            json={
+                "claims": [claim.model_dump() for claim in batch.claims],
+                "user_id": current_user.email
+            },
+            timeout=with_read_timeout(VERIFY_BATCH_READ_TIMEOUT)
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Verifier service error: {e.response.text}"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Verifier service unavailable: {str(e)}"
+        )
+
+
+@router.post("/lookup", response_model=ClaimLookupResponse)
+async def lookup_claims(
+    lookup: ClaimLookupRequest,
+    current_user: TokenData = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_verifier_client)
+):
+    """
+    Get details of many claims in one call
+    """
+    try:
+        response = await client.post(
+            f"{VERIFIER_URL}/claims/lookup",
+            json={"claim_ids": [str(claim_id) for claim_id in lookup.claim_ids]}
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Verifier service error: {e.response.text}"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Verifier service unavailable: {str(e)}"
+        )
+
+
+def _claim_response(entry: CachedClaim, request: Request) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": f"private, max-age={CLAIM_CACHE_MAX_AGE}, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
 
 @router.get("/{claim_id}", response_model=ClaimDetailResponse)
 async def get_claim(
     claim_id: str,
-    current_user: TokenData = Depends(get_current_user)
+    request: Request,
+    current_user: TokenData = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_verifier_client)
 ):
     """
     Get claim details by ID
+
+    Finished claims are served from the gateway's cache after the first read,
+    with the verifier's ETag for conditional requests. On a cache miss the
+    client's If-None-Match is passed on, so a match costs no body transfer.
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{VERIFIER_URL}/claims/{claim_id}")
+        cache_key = str(uuid.UUID(claim_id))
+    except ValueError:
+        cache_key = None
+    entry = claim_cache.get(cache_key) if cache_key else None
+    if entry is not None:
+        return _claim_response(entry, request)
+
+    try:
+        if_none_match = request.headers.get("if-none-match")
+        response = await client.get(
+            f"{VERIFIER_URL}/claims/{claim_id}",
+            headers={"If-None-Match": if_none_match} if if_none_match else None
+        )
+        if response.status_code != status.HTTP_304_NOT_MODIFIED:
             response.raise_for_status()
-            return response.json()
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             raise HTTPException(
@@ -75,3 +264,15 @@ async def get_claim(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Verifier service unavailable: {str(e)}"
         )
+
+    if response.status_code == status.HTTP_304_NOT_MODIFIED:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={
+            "ETag": response.headers["ETag"],
+            "Cache-Control": f"private, max-age={CLAIM_CACHE_MAX_AGE}, immutable"
+        })
+    claim = ClaimDetailResponse.model_validate_json(response.content)
+    # The verifier marks unfinished claims no-store; those are passed through uncached
+    if cache_key is None or "ETag" not in response.headers or "no-store" in response.headers.get("cache-control", ""):
+        return JSONResponse(claim.model_dump(mode="json"), headers={"Cache-Control": "no-store"})
+    # Cached as the verifier sent it, so the body matches the verifier's ETag
+    return _claim_response(claim_cache.put(cache_key, response.content, response.headers["ETag"]), request)
@@ -4,12 +4,17 @@ from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from ..models.auth import TokenData
+from .token_cache import VerifiedTokenCache
 import os
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET", "change-me-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRY_HOURS", "12")) * 60
+# Verified tokens kept in memory until their exp (0 disables the cache)
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+token_cache = VerifiedTokenCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
 
 security = HTTPBearer()
 
@@ -26,11 +31,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 
 def verify_token(token: str) -> TokenData:
+    """
+    Verify a bearer token, skipping the signature check for tokens already
+    verified by this process that have not expired
+    """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if token_cache.is_revoked(token):
+        raise credentials_exception
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -39,9 +54,21 @@ def verify_token(token: str) -> TokenData:
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
+    token_cache.put(token, token_data, payload.get("exp"))
     return token_data
 
 
+def revoke_token(token: str) -> None:
+    """
+    Reject a token from now on (e.g. on logout), in this gateway process
+    """
+    try:
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        expires_at = None
+    token_cache.revoke(token, expires_at)
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
     token = credentials.credentials
     return verify_token(token)
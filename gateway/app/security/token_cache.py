@@ -0,0 +1,97 @@
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import time
+
+from ..models.auth import TokenData
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class VerifiedTokenCache:
+    """
+    LRU cache of tokens whose signature has already been verified.
+
+    Entries are keyed by the SHA-256 of the token (the token itself is not
+    kept) and are dropped at the token's exp claim: an entry is never
+    returned once exp has passed. Revoked tokens are remembered until their
+    exp so they cannot be verified again in this process.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.counters = Counter()
+        self._entries: "OrderedDict[bytes, Tuple[TokenData, float]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[TokenData]:
+        key = token_digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        token_data, expires_at = entry
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            self.counters["expirations"] += 1
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return token_data
+
+    def put(self, token: str, token_data: TokenData, expires_at: Optional[float]) -> None:
+        """
+        Remember a verified token until expires_at (its exp claim, epoch
+        seconds). Tokens without exp are not cached.
+        """
+        if self.max_entries <= 0 or expires_at is None or self.clock() >= expires_at:
+            return
+        key = token_digest(token)
+        if key in self._revoked:
+            return
+        self._entries[key] = (token_data, float(expires_at))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def revoke(self, token: str, expires_at: Optional[float] = None) -> None:
+        """
+        Revocation hook: forget the token and reject it until expires_at
+        (default: the cached entry's expiry, or for good if unknown)
+        """
+        key = token_digest(token)
+        entry = self._entries.pop(key, None)
+        if expires_at is None:
+            expires_at = entry[1] if entry else float("inf")
+        self._revoked[key] = float(expires_at)
+        self.counters["revocations"] += 1
+        self._prune_revoked()
+
+    def is_revoked(self, token: str) -> bool:
+        expires_at = self._revoked.get(token_digest(token))
+        return expires_at is not None and self.clock() < expires_at
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "revoked": len(self._revoked),
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+        }
+
+    def _prune_revoked(self) -> None:
+        now = self.clock()
+        for key in [key for key, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[key]
@@ -0,0 +1,71 @@
+"""
+Distributed tracing of the gateway (OpenTelemetry)
+
+The gateway starts the trace of a request (or continues the client's, if it
+sends a W3C `traceparent` header) and passes it on to the verifier, so one
+trace covers gateway, verifier, evidence service and Wikipedia calls.
+"""
+import httpx
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from shared.tracing import service_provider
+
+provider = service_provider("gateway")
+tracer = provider.get_tracer("gateway")
+
+
+class _SpanStream(httpx.AsyncByteStream):
+    """
+    A response body that ends its span when it is closed
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, span: trace.Span):
+        self.stream = stream
+        self.span = span
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            self.span.end()
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps a transport with a client span per request, passing the trace
+    context on in the request headers. The span ends when the response body
+    is closed, so relayed streams are covered in full.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        span = tracer.start_span(f"verifier {request.method}", kind=SpanKind.CLIENT, attributes={
+            "http.method": request.method, "http.url": str(request.url)
+        })
+        try:
+            with trace.use_span(span, end_on_exit=False):
+                propagate.inject(request.headers)
+                response = await self.transport.handle_async_request(request)
+        except BaseException:
+            span.end()
+            raise
+
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_SpanStream(response.stream, span),
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
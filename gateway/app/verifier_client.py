@@ -0,0 +1,77 @@
+from typing import Optional
+import httpx
+import os
+from .tracing import TracingTransport
+
+# Connection pool and timeouts for calls to the verifier service
+VERIFIER_MAX_CONNECTIONS = int(os.getenv("VERIFIER_MAX_CONNECTIONS", "100"))
+VERIFIER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("VERIFIER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+VERIFIER_KEEPALIVE_EXPIRY = float(os.getenv("VERIFIER_KEEPALIVE_EXPIRY", "30"))
+VERIFIER_CONNECT_TIMEOUT = float(os.getenv("VERIFIER_CONNECT_TIMEOUT", "5"))
+VERIFIER_READ_TIMEOUT = float(os.getenv("VERIFIER_READ_TIMEOUT", "30"))
+VERIFIER_POOL_TIMEOUT = float(os.getenv("VERIFIER_POOL_TIMEOUT", "10"))
+# HTTP/2 needs the h2 package and a verifier (or proxy) that speaks it
+VERIFIER_HTTP2 = os.getenv("VERIFIER_HTTP2", "false").lower() in ("1", "true", "yes")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_client() -> httpx.AsyncClient:
+    """
+    HTTP client with keep-alive connections to the verifier, tracing every
+    call
+    """
+    http2 = VERIFIER_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("VERIFIER_HTTP2 is set but h2 is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+            http2 = False
+
+    transport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=VERIFIER_MAX_CONNECTIONS,
+            max_keepalive_connections=VERIFIER_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=VERIFIER_KEEPALIVE_EXPIRY
+        )
+    )
+    return httpx.AsyncClient(
+        transport=TracingTransport(transport),
+        timeout=httpx.Timeout(
+            connect=VERIFIER_CONNECT_TIMEOUT,
+            read=VERIFIER_READ_TIMEOUT,
+            write=VERIFIER_READ_TIMEOUT,
+            pool=VERIFIER_POOL_TIMEOUT
+        )
+    )
+
+
+def with_read_timeout(read: float) -> httpx.Timeout:
+    """
+    The client's timeouts with a different read timeout, for slow endpoints
+    """
+    return httpx.Timeout(
+        connect=VERIFIER_CONNECT_TIMEOUT,
+        read=read,
+        write=VERIFIER_READ_TIMEOUT,
+        pool=VERIFIER_POOL_TIMEOUT
+    )
+
+
+def get_verifier_client() -> httpx.AsyncClient:
+    """
+    The application-wide client (a FastAPI dependency)
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def close_verifier_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,17 @@
+"""
+HTTP caching helpers shared by the gateway and the verifier, so a claim
+carries the same ETag whichever service answers
+"""
+import hashlib
+from typing import Optional
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
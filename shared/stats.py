@@ -0,0 +1,14 @@
+"""
+Summary statistics shared by the services and the benchmarks
+"""
+from typing import Iterable
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """
+    The nearest-rank percentile of values (0.0 when there are none)
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,116 @@
+"""
+Distributed tracing helpers shared by the services (OpenTelemetry): a
+tracer provider per service, the server span middleware, trace context
+propagation and the span file exporter
+"""
+import os
+import threading
+from typing import IO, Dict, Optional, Sequence
+
+from opentelemetry import propagate
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode, Tracer
+
+# Share of new traces recorded; requests with a trace context follow the caller's decision
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+# Spans are appended to this file as JSON lines; unset, they are not exported
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends one JSON span per line to `path`. The file is opened on the
+    first export and closed on shutdown (TracerProvider.shutdown()).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO[str]] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock:
+            if self._closed:
+                return SpanExportResult.FAILURE
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write("".join(span.to_json(indent=None) + "\n" for span in spans))
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def service_provider(service: str) -> TracerProvider:
+    """
+    The tracer provider of a service. Each service has its own rather than
+    the global one, so the services' spans stay apart when they share a
+    process (tests, benchmarks).
+    """
+    provider = TracerProvider(
+        sampler=ParentBased(TraceIdRatioBased(TRACE_SAMPLE_RATIO)),
+        resource=Resource.create({"service.name": service})
+    )
+    if TRACE_EXPORT_PATH:
+        provider.add_span_processor(BatchSpanProcessor(FileSpanExporter(TRACE_EXPORT_PATH)))
+    return provider
+
+
+def trace_headers() -> Dict[str, str]:
+    """
+    Headers passing the current trace context on to another service
+    """
+    headers: Dict[str, str] = {}
+    propagate.inject(headers)
+    return headers
+
+
+class TracingMiddleware:
+    """
+    A server span per HTTP request from `tracer`, continuing the caller's
+    trace and named after the route template ("POST /verify")
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        context = propagate.extract({key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]})
+        with self.tracer.start_as_current_span(scope["method"], context=context, kind=SpanKind.SERVER) as span:
+            status = 500
+
+            async def send_with_status(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                span.update_name(f"{scope['method']} {route}")
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.status_code", status)
+                if status >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
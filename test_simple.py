@@ -12,7 +12,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'verifier', 'app'))
 def test_simple_nlp():
     """Test simplified NLP functions"""
     try:
-        from nlp_simple import simple_keywords, simple_similarity_score, detect_refutation_terms
+        from nlp import JaccardScorer, simple_keywords, detect_refutation_terms
         
         print("🧪 Testing Simplified NLP Functions")
         print("=" * 40)
@@ -25,7 +25,7 @@ def test_simple_nlp():
         # Test similarity scoring
         text1 = "5G causes COVID"
         text2 = "5G technology and coronavirus"
-        similarity = simple_similarity_score(text1, text2)
+        similarity = JaccardScorer().similarity(text1, text2)
         print(f"✅ Similarity score: {similarity:.3f}")
         
         # Test refutation detection
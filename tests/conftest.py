@@ -0,0 +1,100 @@
+import asyncio
+import json
+import pytest
+
+try:
+    import pytest_asyncio
+    from sqlalchemy.dialects.postgresql import UUID
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.pool import StaticPool
+except ImportError:  # pragma: no cover - component tests skip without sqlalchemy
+    pytest_asyncio = None
+else:
+    @compiles(UUID, "sqlite")
+    def _compile_uuid_sqlite(type_, compiler, **kw):
+        # The verifier models use the PostgreSQL UUID type; store it as hex on SQLite
+        return "CHAR(32)"
+
+
+if pytest_asyncio is not None:
+    @pytest_asyncio.fixture
+    async def db():
+        """Verifier database session on a throwaway in-memory SQLite database"""
+        pytest.importorskip("aiosqlite")
+        from verifier.app.models import Base
+
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        async with session_factory() as session:
+            yield session
+        await engine.dispose()
+
+
+async def _asgi_stream(app, path, body, headers=None):
+    """
+    POST to an ASGI app and record (seconds since start, chunk) for every body
+    chunk as it is sent. httpx's ASGITransport buffers the whole response,
+    which hides when the first byte went out.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    payload = json.dumps(body).encode()
+    raw_headers = [(b"content-type", b"application/json")]
+    raw_headers += [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": raw_headers, "client": ("test", 1), "server": ("test", 80),
+    }
+    response = {"status": None, "headers": {}, "chunks": []}
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body" and message.get("body"):
+            response["chunks"].append((loop.time() - started, message["body"]))
+
+    await app(scope, receive, send)
+    return response
+
+
+@pytest.fixture
+def asgi_stream():
+    return _asgi_stream
+
+
+_span_exporter = None
+
+
+@pytest.fixture
+def spans():
+    """
+    In-process collector of the spans finished by the gateway, verifier and
+    evidence service during the test
+    """
+    global _span_exporter
+    pytest.importorskip("opentelemetry.sdk")
+    if _span_exporter is None:
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        from evidence.app import tracing as evidence_tracing
+        from gateway.app import tracing as gateway_tracing
+        from verifier.app import tracing as verifier_tracing
+
+        _span_exporter = InMemorySpanExporter()
+        for tracing in (gateway_tracing, verifier_tracing, evidence_tracing):
+            tracing.provider.add_span_processor(SimpleSpanProcessor(_span_exporter))
+    _span_exporter.clear()
+    return _span_exporter
@@ -2,7 +2,8 @@ import pytest
 import sys
 import os
 
-# Add the verifier app to the path
+# Add the verifier app (and shared/, which it imports) to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'verifier', 'app'))
 
 
@@ -44,6 +45,322 @@ def test_nlp_similarity_scoring():
         pytest.skip(f"Missing dependencies: {e}")
 
 
+def test_nlp_batch_similarity_scoring():
+    """Test batched similarity scoring of one claim against many snippets"""
+    try:
+        from nlp import similarity_scores
+        
+        claim = "5G causes COVID"
+        snippets = [
+            "5G technology and coronavirus",
+            "The history of the Roman Empire",
+            "",
+        ]
+        scores = similarity_scores(claim, snippets)
+        
+        assert len(scores) == len(snippets)
+        assert all(isinstance(score, float) for score in scores)
+        assert all(0.0 <= score <= 1.0 + 1e-9 for score in scores)
+        assert scores[0] > scores[1]
+        assert scores[2] == 0.0
+        assert similarity_scores(claim, []) == []
+        assert similarity_scores("   ", snippets) == [0.0, 0.0, 0.0]
+        
+        print(f"✅ Batch similarity scoring working: {scores}")
+        
+    except ImportError as e:
+        pytest.skip(f"Missing dependencies: {e}")
+
+
+def test_nlp_multi_claim_similarity_scoring():
+    """Test scoring many claims against their snippets in one pass"""
+    try:
+        from nlp import batch_similarity_scores
+
+        claims = ["5G causes COVID", "The moon landing was faked", "   "]
+        snippet_lists = [
+            ["5G technology and coronavirus", "Apollo 11 moon landing"],
+            ["Apollo 11 moon landing", "5G technology and coronavirus", ""],
+            ["5G technology and coronavirus"],
+        ]
+        scores = batch_similarity_scores(claims, snippet_lists)
+
+        assert [len(row) for row in scores] == [2, 3, 1]
+        assert scores[0][0] > scores[0][1]
+        assert scores[1][0] > scores[1][1]
+        assert scores[1][2] == 0.0
+        assert scores[2] == [0.0]
+        assert batch_similarity_scores(["5G"], [[]]) == [[]]
+
+        print(f"✅ Multi-claim similarity scoring working: {scores}")
+
+    except ImportError as e:
+        pytest.skip(f"Missing dependencies: {e}")
+
+
+def test_nlp_fitted_scoring_model(tmp_path, monkeypatch):
+    """Test scoring with a vectorizer fitted offline and loaded from its artifact"""
+    try:
+        import nlp
+        import scoring_tfidf
+        from nlp import scoring_model_version
+        from scoring_tfidf import ScoringModel, fit_scoring_model, load_scoring_model
+
+        corpus = [
+            "5G is the fifth generation technology standard for cellular networks",
+            "Coronavirus disease 2019 is a contagious disease caused by a virus",
+            "Misinformation claimed that 5G networks cause coronavirus disease",
+            "The Apollo 11 moon landing took place in 1969",
+        ]
+        model = fit_scoring_model(corpus, min_df=1)
+        path = str(tmp_path / f"scoring-{model.version}.joblib")
+        model.save(path)
+
+        monkeypatch.setattr(scoring_tfidf, "_scoring_model", None)
+        loaded = load_scoring_model(path)
+        assert loaded.version == model.version == ScoringModel(model.vectorizer).version
+        assert scoring_model_version() == model.version
+
+        # Request-time scoring only transforms: nothing is fitted any more
+        monkeypatch.setattr(scoring_tfidf, "TfidfVectorizer", None)
+        claim = "5G networks cause coronavirus"
+        snippets = [corpus[2], corpus[3], ""]
+        scores = nlp.similarity_scores(claim, snippets)
+        assert scores[0] > scores[1] and scores[2] == 0.0
+        # Fixed IDF weights: a claim scores the same alone or in a batch
+        assert nlp.batch_similarity_scores([claim, "moon landing"], [snippets, [corpus[3]]])[0] == scores
+
+        load_scoring_model("")
+        assert scoring_model_version() == nlp.PER_REQUEST_MODEL_VERSION
+
+    except ImportError as e:
+        pytest.skip(f"Missing dependencies: {e}")
+
+
+def test_nlp_snippet_vector_cache(monkeypatch):
+    """Test that warm scoring only vectorizes the claim and the cache stays in budget"""
+    try:
+        import nlp
+        import scoring_tfidf
+        from nlp import similarity_scores
+        from scoring_tfidf import SnippetVectorCache, fit_scoring_model
+
+        snippets = [
+            "5G is the fifth generation technology standard for cellular networks",
+            "Misinformation claimed that 5G networks cause coronavirus disease",
+            "The Apollo 11 moon landing took place in 1969",
+        ]
+        model = fit_scoring_model(snippets, min_df=1)
+        monkeypatch.setattr(scoring_tfidf, "_scoring_model", model)
+        cold = similarity_scores("5G causes coronavirus", snippets)
+
+        transformed = []
+        transform = model.vectorizer.transform
+        monkeypatch.setattr(model.vectorizer, "transform", lambda texts: transformed.extend(texts) or transform(texts))
+        assert similarity_scores("5G causes coronavirus", snippets) == cold
+        assert transformed == ["5G causes coronavirus"]
+        assert nlp.batch_similarity_scores(["moon landing"], [snippets[::-1]]) == [
+            similarity_scores("moon landing", snippets[::-1])
+        ]
+        assert transformed == ["5G causes coronavirus", "moon landing", "moon landing"]
+
+        stats = nlp.scoring_stats()
+        assert stats["model_version"] == model.version
+        assert stats["snippet_cache"]["entries"] == 3 and stats["snippet_cache"]["misses"] == 3
+        assert stats["snippet_cache"]["hit_rate"] == 9 / 12
+
+        # Least recently used rows are evicted to stay within the byte budget
+        model.snippet_cache.max_bytes = model.snippet_cache.bytes
+        similarity_scores("moon landing", ["The Apollo 11 crew landed on the moon"])
+        assert model.snippet_cache.counters["evictions"] >= 1
+        assert model.snippet_cache.bytes <= model.snippet_cache.max_bytes
+        assert model.snippet_cache.get_many([SnippetVectorCache.key(snippets[2])]) == {}
+
+    except ImportError as e:
+        pytest.skip(f"Missing dependencies: {e}")
+
+
+def test_scorer_backends_are_imported_on_first_use(monkeypatch):
+    """Test the scorer registry and that scikit-learn is only imported by the tfidf backend"""
+    import subprocess
+    import nlp
+
+    root = os.path.join(os.path.dirname(__file__), '..')
+    code = (
+        "import sys; import verifier.app.main; from verifier.app import nlp; "
+        "assert not {'sklearn', 'numpy', 'scipy'} & set(sys.modules), 'imported at startup'; "
+        "assert nlp.similarity_scores('5G causes COVID', ['COVID causes 5G']) == [1.0]; "
+        "assert 'sklearn' not in sys.modules; "
+        "nlp.get_scorer('tfidf'); assert 'sklearn' in sys.modules"
+    )
+    env = dict(os.environ, SCORER_BACKEND="jaccard", SCORER_WARMUP="false")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+    monkeypatch.setattr(nlp, "SCORER_BACKEND", "jaccard")
+    assert nlp.scoring_model_version() == "jaccard"
+    assert nlp.batch_similarity_scores(["5G causes COVID", ""], [["covid cures", "moon"], ["covid"]]) == [
+        [1 / 3, 0.0], [0.0]
+    ]
+
+    class ConstantScorer(nlp.JaccardScorer):
+        name = version = "constant"
+
+        def scores(self, claim, snippets):
+            return [0.5] * len(snippets)
+
+    monkeypatch.setitem(nlp.SCORER_BACKENDS, "constant", ConstantScorer)
+    monkeypatch.setattr(nlp, "SCORER_BACKEND", "constant")
+    assert nlp.similarity_scores("anything", ["a", "b"]) == [0.5, 0.5]
+    assert nlp.scoring_stats() == {"backend": "constant", "loaded": True, "model_version": "constant"}
+
+    monkeypatch.setattr(nlp, "SCORER_BACKEND", "bert")
+    with pytest.raises(ValueError, match="Unknown scorer backend 'bert'"):
+        nlp.similarity_scores("anything", ["a"])
+
+
+@pytest.mark.asyncio
+async def test_scorer_is_loaded_off_the_event_loop(monkeypatch):
+    """Test that a backend not warmed up is created in a thread, not on the event loop"""
+    import threading
+    import nlp
+
+    loaded_in = []
+
+    class SlowScorer(nlp.JaccardScorer):
+        name = version = "slow"
+
+        def __init__(self):
+            loaded_in.append(threading.current_thread())
+
+    monkeypatch.setattr(nlp, "_scorers", {})
+    monkeypatch.setitem(nlp.SCORER_BACKENDS, "slow", SlowScorer)
+    monkeypatch.setattr(nlp, "SCORER_BACKEND", "slow")
+
+    assert await nlp.current_model_version() == "slow"
+    assert await nlp.ScoringBatcher(nlp.NLPExecutor("inline")).analyze(["5G causes COVID"], [["covid"]])
+    assert loaded_in == [loaded_in[0]] and loaded_in[0] is not threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_scoring_batcher_coalesces_concurrent_jobs(monkeypatch):
+    """Test that concurrent scoring jobs share one scoring pass and get their own results back"""
+    import asyncio
+    import nlp
+
+    real = nlp.analyze_evidence
+    calls = []
+
+    def recording(claims, snippet_lists):
+        calls.append(list(claims))
+        return real(claims, snippet_lists)
+
+    monkeypatch.setattr(nlp, "SCORER_BACKEND", "jaccard")
+    monkeypatch.setattr(nlp, "analyze_evidence", recording)
+    # Warmed up, as at startup: jobs are queued in the order they arrive
+    nlp.warm_up_scorer()
+    batcher = nlp.ScoringBatcher(nlp.NLPExecutor("inline"), max_wait_ms=50, max_claims=3)
+    jobs = [
+        (["5G causes COVID"], [["COVID causes 5G", "there is no link"]]),
+        (["moon landing"], [["the moon landing"]]),
+        (["vaccines autism", "earth flat"], [["vaccines"], ["flat earth"]]),
+    ]
+
+    # The third job reaches max_claims: all three are sent at once
+    results = await asyncio.gather(*(batcher.analyze(claims, snippets) for claims, snippets in jobs))
+    assert calls == [["5G causes COVID", "moon landing", "vaccines autism", "earth flat"]]
+    assert results == [real(claims, snippets) for claims, snippets in jobs]
+    assert results[0] == [[(1.0, False), (0.0, True)]]
+
+    # A job on its own is sent after max_wait_ms
+    await batcher.analyze(["moon landing"], [["moon"]])
+    stats = batcher.stats()
+    assert (stats["batches"], stats["jobs"], stats["claims"]) == (2, 4, 5)
+    assert stats["batch_sizes"]["1"] == stats["batch_sizes"]["4"] == 1
+    assert stats["queue_wait_ms"]["max"] >= 40
+
+    # Failures reach every caller of the batch
+    def broken(claims, snippet_lists):
+        raise RuntimeError("scoring failed")
+
+    monkeypatch.setattr(nlp, "analyze_evidence", broken)
+    outcomes = await asyncio.gather(
+        batcher.analyze(["a claim"], [["x"]]), batcher.analyze(["another claim"], [["y"]]), return_exceptions=True
+    )
+    assert [str(outcome) for outcome in outcomes] == ["scoring failed", "scoring failed"]
+
+    # Scores that depend on the rest of the batch are not batched
+    class BatchDependentScorer(nlp.JaccardScorer):
+        name = version = "batch-dependent"
+        batch_invariant = False
+
+    monkeypatch.setitem(nlp.SCORER_BACKENDS, "batch-dependent", BatchDependentScorer)
+    monkeypatch.setattr(nlp, "SCORER_BACKEND", "batch-dependent")
+    nlp.warm_up_scorer()
+    monkeypatch.setattr(nlp, "analyze_evidence", recording)
+    calls.clear()
+    await asyncio.gather(*(batcher.analyze(claims, snippets) for claims, snippets in jobs[:2]))
+    assert calls == [["5G causes COVID"], ["moon landing"]]
+    assert batcher.stats()["unbatched"] == 2
+
+
+def test_query_planner_ranks_terms_by_document_frequency(tmp_path):
+    """Test that claims become one or two compound queries without common words"""
+    try:
+        from query_planner import DocumentFrequencies, QueryPlanner
+        from scoring_tfidf import fit_scoring_model
+
+        corpus = [
+            "Smoking causes cancer according to many studies",
+            "Poverty causes stress in many families",
+            "The new technology causes concern about privacy",
+            "Climate change is the long-term shift in global temperatures",
+            "Scientists agree that climate change is driven by human activity",
+            "The Great Wall of China is a series of fortifications",
+            "Radio waves are a type of electromagnetic radiation",
+            "COVID-19 is a contagious disease caused by a coronavirus",
+        ] + [f"Many other documents about technology number {n}" for n in range(20)]
+        table = DocumentFrequencies.build(corpus, min_df=1)
+        path = str(tmp_path / "query-df.json.gz")
+        table.save(path)
+        loaded = DocumentFrequencies.load(path)
+        assert (loaded.documents, loaded.df) == (table.documents, table.df)
+
+        planner = QueryPlanner(loaded)
+        assert planner.plan("5G technology causes COVID-19") == ["5G COVID-19", "5G"]
+        assert planner.plan("Is the Great Wall of China visible from space?") == [
+            "Great Wall of China visible", "Great Wall of China"
+        ]
+        # Phrases the table knows stay together
+        assert [unit.text for unit in planner.units("Climate change is a hoax")] == ["climate change", "hoax"]
+        assert all(len(planner.plan(claim)) <= 2 for claim in corpus)
+        assert planner.stats()["queries_per_claim"] <= 2
+
+        # The same ranking can come from the fitted scoring model's IDF weights
+        model = fit_scoring_model(corpus, min_df=1)
+        derived = DocumentFrequencies.from_vectorizer(model.vectorizer, model.info["documents"])
+        assert derived.df["causes"] == table.df["causes"] == 3
+        assert QueryPlanner(derived).plan("5G technology causes COVID-19")[0] == "5G COVID-19"
+
+    except ImportError as e:
+        pytest.skip(f"Missing dependencies: {e}")
+
+
+def test_query_planner_without_table_searches_keywords(capsys):
+    """Test that without a frequency table or fitted model claims are searched for by keyword"""
+    try:
+        from query_planner import load_query_planner, plan_queries, set_query_planner, QueryPlanner
+
+        planner = load_query_planner(path="", scoring_model=None)
+        assert "Warning: no document-frequency table" in capsys.readouterr().out
+        assert plan_queries("Vaccines cause autism in children") == ["vaccines", "cause", "autism"]
+        assert planner.stats()["keyword_claims"] == 1
+        set_query_planner(QueryPlanner())
+
+    except ImportError as e:
+        pytest.skip(f"Missing dependencies: {e}")
+
+
 def test_nlp_refutation_detection():
     """Test NLP refutation detection function"""
     try:
@@ -0,0 +1,406 @@
+import asyncio
+import sqlite3
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from benchmarks.fake_mediawiki import DEFAULT_PAGES, DEFAULT_REDIRECTS, create_app as create_fake_mediawiki
+from evidence.app import main as evidence_main
+from evidence.app.build_index import build as build_index
+from evidence.app.cache import TTLCache
+from evidence.app.prewarm import prewarm
+from evidence.app.local_index import IndexBuilder, LocalIndex
+from evidence.app.store import EvidenceStore
+from evidence.app.wikipedia import WikipediaClient, track_upstream_calls
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(fake, cache=None, store=None) -> WikipediaClient:
+    session = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), timeout=5.0)
+    client = WikipediaClient(session=session, cache=cache, store=store)
+    client.base_url = "http://fake/api/rest_v1"
+    client.action_api_url = "http://fake/w/api.php"
+    return client
+
+
+@pytest.mark.asyncio
+async def test_search_pages_fetches_summaries_in_one_call():
+    fake = create_fake_mediawiki()
+    client = make_client(fake)
+
+    with track_upstream_calls() as upstream_calls:
+        results = await client.search_pages("5G COVID", limit=5)
+    await client.close()
+
+    assert 0 < len(results) <= 5
+    assert all(result["snippet"] for result in results)
+    assert upstream_calls.count == 2
+    assert dict(fake.state.calls) == {"search": 1, "extracts": 1}
+
+
+@pytest.mark.asyncio
+async def test_summaries_fall_back_to_concurrent_rest_fetches():
+    fake = create_fake_mediawiki(multi_extracts=False)
+    client = make_client(fake)
+
+    summaries = await client.get_page_summaries(["5G", "Radio wave", "No such page"])
+    await client.close()
+
+    assert set(summaries) == {"5G", "Radio wave"}
+    assert fake.state.calls["extracts"] == 1
+    assert fake.state.calls["summary"] == 3
+
+
+@pytest.mark.asyncio
+async def test_fake_mediawiki_injects_errors():
+    fake = create_fake_mediawiki(error_rate=0.5, seed=1)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake") as client:
+        statuses = [(await client.get("/api/rest_v1/page/summary/5G")).status_code for _ in range(40)]
+        stats = (await client.get("/stats")).json()
+
+    assert set(statuses) == {200, 503}
+    assert stats["errors"] == statuses.count(503)
+    assert 5 < stats["errors"] < 35
+
+
+@pytest.mark.asyncio
+async def test_summaries_follow_normalisation_and_redirects():
+    fake = create_fake_mediawiki()
+    client = make_client(fake)
+
+    summaries = await client.get_page_summaries(["covid", "5G", "flat_Earth"])
+    await client.close()
+
+    assert summaries["covid"].startswith("Coronavirus disease 2019")
+    assert set(summaries) == {"covid", "5G", "flat_Earth"}
+    assert fake.state.calls["extracts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_summaries_endpoint(monkeypatch):
+    fake = create_fake_mediawiki()
+    monkeypatch.setattr(evidence_main, "wiki_client", make_client(fake))
+
+    transport = httpx.ASGITransport(app=evidence_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://evidence") as client:
+        response = await client.post("/wikipedia/summaries", json={"titles": ["5G", "Vaccine", "Nope"]})
+        assert response.status_code == 200
+        assert response.headers["X-Upstream-Calls"] == "1"
+        assert [item["title"] for item in response.json()] == ["5G", "Vaccine"]
+
+        response = await client.get("/wikipedia/search", params={"query": "moon landing", "limit": 3})
+        assert response.status_code == 200
+        assert response.headers["X-Upstream-Calls"] == "2"
+
+        response = await client.post("/wikipedia/summaries", json={"titles": []})
+        assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_make_one_upstream_call():
+    fake = create_fake_mediawiki(latency=0.05)
+    client = make_client(fake)
+
+    summaries = await asyncio.gather(*(client.get_page_summary("5G") for _ in range(100)))
+    await client.close()
+
+    assert all(summary.startswith("5G is") for summary in summaries)
+    assert fake.state.calls["summary"] == 1
+    stats = client.cache.stats()
+    assert stats["misses"] == 100
+    assert stats["coalesced"] == 99
+    assert stats["loads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_and_summaries_are_served_from_cache():
+    fake = create_fake_mediawiki()
+    client = make_client(fake)
+
+    first = await client.search_pages("flat earth", limit=3)
+    with track_upstream_calls() as upstream_calls:
+        second = await client.search_pages("  Flat EARTH ", limit=3)
+        summaries = await client.get_page_summaries([result["title"] for result in first])
+    await client.close()
+
+    assert first == second
+    assert set(summaries) == {result["title"] for result in first}
+    assert upstream_calls.count == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_and_stale_while_revalidate():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, max_bytes=10_000, stale_seconds=60, clock=clock)
+    loads = []
+
+    async def loader(keys):
+        loads.append(list(keys))
+        return {key: f"v{len(loads)}" for key in keys}
+
+    assert await cache.get_many_or_load(["a"], loader, ttl=10) == {"a": "v1"}
+    clock.now += 5
+    assert await cache.get_many_or_load(["a"], loader, ttl=10) == {"a": "v1"}
+    assert len(loads) == 1
+
+    # Expired but within the stale window: old value now, refresh in background
+    clock.now += 10
+    assert await cache.get_many_or_load(["a"], loader, ttl=10) == {"a": "v1"}
+    await asyncio.sleep(0)
+    assert await cache.get_many_or_load(["a"], loader, ttl=10) == {"a": "v2"}
+    assert cache.counters["stale_hits"] == 1
+    assert cache.counters["refreshes"] == 1
+
+    # Past the stale window: a plain miss
+    clock.now += 100
+    assert await cache.get_many_or_load(["a"], loader, ttl=10) == {"a": "v3"}
+    assert cache.counters["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_lru_eviction_by_entries_and_bytes():
+    cache = TTLCache(max_entries=2, max_bytes=1_000)
+    for key in ("a", "b"):
+        cache.set(key, key, ttl=60)
+    await cache.get_or_load("a", lambda: None, ttl=60)  # touch "a"
+    cache.set("c", "c", ttl=60)
+    assert "b" not in cache._entries and "a" in cache._entries
+    assert cache.counters["evictions"] == 1
+
+    cache = TTLCache(max_entries=100, max_bytes=100)
+    cache.set("big", "x" * 60, ttl=60)
+    cache.set("bigger", "y" * 60, ttl=60)
+    assert list(cache._entries) == ["bigger"]
+    assert cache.bytes <= 100
+    cache.set("huge", "z" * 500, ttl=60)
+    assert "huge" not in cache._entries
+
+
+@pytest.mark.asyncio
+async def test_cache_does_not_store_failures():
+    cache = TTLCache()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("k", failing, ttl=60)
+    assert len(calls) == 2
+    assert await cache.get_or_load("k", lambda: asyncio.sleep(0, result=None), ttl=60) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_endpoint(monkeypatch):
+    fake = create_fake_mediawiki()
+    monkeypatch.setattr(evidence_main, "wiki_client", make_client(fake))
+
+    transport = httpx.ASGITransport(app=evidence_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://evidence") as client:
+        for _ in range(3):
+            assert (await client.get("/wikipedia/summary/Vaccine")).status_code == 200
+        stats = (await client.get("/cache/stats")).json()
+
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 0
+    assert stats["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_and_upstream_calls(monkeypatch):
+    from evidence.app.metrics import REGISTRY
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    summary_route = dict(method="GET", route="/wikipedia/summary/{title:path}")
+    before = {
+        "ok": sample("http_request_duration_seconds_count", status="200", **summary_route),
+        "missing": sample("http_request_duration_seconds_count", status="404", **summary_route),
+        "upstream_ok": sample("evidence_upstream_requests_total", call="summary", outcome="ok"),
+        "upstream_missing": sample("evidence_upstream_requests_total", call="summary", outcome="not_found"),
+    }
+    fake = create_fake_mediawiki()
+    monkeypatch.setattr(evidence_main, "wiki_client", make_client(fake))
+
+    transport = httpx.ASGITransport(app=evidence_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://evidence") as client:
+        assert (await client.get("/wikipedia/summary/Vaccine")).status_code == 200
+        assert (await client.get("/wikipedia/summary/Nope")).status_code == 404
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "evidence_upstream_request_seconds_bucket" in response.text
+    assert sample("http_request_duration_seconds_count", status="200", **summary_route) == before["ok"] + 1
+    assert sample("http_request_duration_seconds_count", status="404", **summary_route) == before["missing"] + 1
+    assert sample("evidence_upstream_requests_total", call="summary", outcome="ok") == before["upstream_ok"] + 1
+    assert sample("evidence_upstream_requests_total", call="summary", outcome="not_found") == before["upstream_missing"] + 1
+
+
+@pytest.mark.asyncio
+async def test_store_survives_restart(tmp_path):
+    path = str(tmp_path / "evidence.db")
+    fake = create_fake_mediawiki()
+
+    client = make_client(fake, store=EvidenceStore(path))
+    first = await client.search_pages("5G", limit=3)
+    summary = await client.get_page_summary("Vaccine")
+    await client.close()
+    client.store.close()
+    calls_before_restart = sum(fake.state.calls.values())
+
+    # New process: empty memory cache, same store file
+    client = make_client(fake, store=EvidenceStore(path))
+    assert await client.search_pages(" 5g ", limit=3) == first
+    assert await client.get_page_summary("vaccine") == summary
+    assert await client.get_page_summaries([result["title"] for result in first])
+    await client.close()
+    client.store.close()
+
+    assert sum(fake.state.calls.values()) == calls_before_restart
+
+
+def test_store_ttl_and_size_cap(tmp_path):
+    store = EvidenceStore(str(tmp_path / "evidence.db"), ttl=3600, max_bytes=100)
+    store.put_many("summary", [("A", "a" * 40), ("B", "b" * 40)])
+    assert set(store.get_many("summary", ["A", "B", "C"])) == {"A", "B"}
+
+    store.get("summary", "A")  # A is now the most recently read
+    store.put("summary", "C", "c" * 40)
+    assert store.size() > 100
+    assert store.compact() == 1
+    assert set(store.get_many("summary", ["A", "B", "C"])) == {"A", "C"}
+
+    store.ttl = 0
+    assert store.get("summary", "A") is None
+    assert store.compact() == 2
+    assert store.stats()["entries"] == 0
+    store.close()
+
+
+def test_store_compaction_evicts_in_sql_and_releases_pages(tmp_path):
+    path = str(tmp_path / "evidence.db")
+    store = EvidenceStore(path, max_bytes=100_000, compact_every=10 ** 9)
+    store.put_many("summary", [(str(i), "x" * 2000) for i in range(500)])
+    store.get("summary", "0")  # the oldest write is the most recently read
+
+    assert store.compact() == 500 - 49
+    assert "0" in store.get_many("summary", ["0", "1"])
+    assert store.size() <= 100_000
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # incremental
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_prewarm_fills_store(tmp_path):
+    fake = create_fake_mediawiki()
+    store = EvidenceStore(str(tmp_path / "evidence.db"))
+    client = make_client(fake, store=store)
+
+    result = await prewarm(client, ["5G", "covid", "Radio_wave", "Not a page", "5G"])
+    await client.close()
+
+    assert result == {"titles": 4, "found": 3, "upstream_calls": 1}
+    assert set(store.get_many("summary", ["5G", "Covid", "Radio wave"])) == {"5G", "Covid", "Radio wave"}
+    store.close()
+
+
+def build_local_index(path, memory_bytes=None):
+    builder = IndexBuilder(str(path))
+    if memory_bytes is not None:
+        builder.memory_bytes = memory_bytes
+    for title, extract in DEFAULT_PAGES.items():
+        builder.add(title, extract)
+    for source, target in DEFAULT_REDIRECTS.items():
+        builder.add_redirect(source, target)
+    meta = builder.finish()
+    return LocalIndex(str(path)), meta
+
+
+def test_local_index_ranks_with_bm25_and_merges_runs(tmp_path):
+    index, meta = build_local_index(tmp_path / "one-run")
+    spilled, spilled_meta = build_local_index(tmp_path / "spilled", memory_bytes=1000)
+
+    assert meta["runs"] == 1 and spilled_meta["runs"] > 1
+    assert meta["documents"] == len(DEFAULT_PAGES)
+    assert spilled_meta["terms"] == meta["terms"] and spilled_meta["postings"] == meta["postings"]
+
+    results = index.search("5G COVID", limit=3)
+    assert results[0]["title"] == "5G misinformation"
+    assert results[0]["url"] == "https://en.wikipedia.org/wiki/5G_misinformation"
+    assert results[0]["snippet"] == DEFAULT_PAGES["5G misinformation"]
+    for query in ("5G COVID", "moon landing apollo", "electromagnetic radiation", "vaccine"):
+        assert spilled.search(query, limit=5) == index.search(query, limit=5)
+    assert index.search("zzz unknown words", limit=5) == []
+
+    assert index.get_summary("radio_wave") == DEFAULT_PAGES["Radio wave"]
+    assert index.get_summaries(["covid", "Earth", "No such page"]) == {
+        "covid": DEFAULT_PAGES["COVID-19"], "Earth": DEFAULT_PAGES["Earth"],
+    }
+    index.close()
+    spilled.close()
+
+
+@pytest.mark.asyncio
+async def test_local_backend_answers_without_upstream_calls(tmp_path):
+    index, _ = build_local_index(tmp_path / "index")
+
+    def offline(request):
+        raise AssertionError(f"unexpected upstream call to {request.url}")
+
+    client = WikipediaClient(session=httpx.AsyncClient(transport=httpx.MockTransport(offline)), index=index)
+    with track_upstream_calls() as upstream_calls:
+        results = await client.search_pages("Is the Great Wall of China visible from space?", limit=2)
+        summaries = await client.get_page_summaries(["Coronavirus disease 2019", "Nope"])
+        summary = await client.get_page_summary("flat_Earth")
+    await client.close()
+    index.close()
+
+    assert results[0]["title"] == "Great Wall of China"
+    assert set(summaries) == {"Coronavirus disease 2019"}
+    assert summary == DEFAULT_PAGES["Flat Earth"]
+    assert upstream_calls.count == 0
+
+
+XML_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">
+  <page><title>Radio wave</title><ns>0</ns><revision><text>{{Short description|Type of radiation}}
+{{Infobox|name={{nowrap|Radio}}}}
+'''Radio waves''' are a type of [[electromagnetic radiation]] with the longest
+[[wavelength|wavelengths]].&lt;ref&gt;Source&lt;/ref&gt; [[File:Wave.png|thumb|A [[wave]]]]
+== History ==
+Later sections are left out.</text></revision></page>
+  <page><title>Radio waves</title><ns>0</ns><redirect title="Radio wave" />
+    <revision><text>#REDIRECT [[Radio wave]]</text></revision></page>
+  <page><title>Wikipedia:About</title><ns>4</ns><revision><text>Project page</text></revision></page>
+</mediawiki>"""
+
+
+def test_build_index_from_xml_dump(tmp_path):
+    dump = tmp_path / "pages-articles.xml"
+    dump.write_text(XML_DUMP, encoding="utf-8")
+
+    meta = build_index(str(dump), str(tmp_path / "index"))
+    index = LocalIndex(str(tmp_path / "index"))
+
+    assert (meta["documents"], meta["redirects"]) == (1, 1)
+    expected = "Radio waves are a type of electromagnetic radiation with the longest wavelengths."
+    assert index.get_summary("Radio wave") == expected
+    assert index.get_summary("Radio waves") == expected
+    assert index.get_summary("Wikipedia:About") is None
+    assert [result["title"] for result in index.search("wavelengths", limit=5)] == ["Radio wave"]
+    index.close()
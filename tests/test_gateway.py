@@ -0,0 +1,299 @@
+import asyncio
+import json
+from datetime import timedelta
+import threading
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("jose")
+pytest.importorskip("email_validator")
+uvicorn = pytest.importorskip("uvicorn")
+pytest_asyncio = pytest.importorskip("pytest_asyncio")
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+from gateway.app.claim_cache import ClaimCache
+from gateway.app.main import app as gateway_app
+from gateway.app.models.auth import TokenData
+from gateway.app.routers import claims as claims_router
+from gateway.app.security import jwt as jwt_module
+from gateway.app.security.jwt import create_access_token, get_current_user, verify_token
+from gateway.app.security.token_cache import VerifiedTokenCache
+from gateway.app.verifier_client import close_verifier_client, get_verifier_client
+
+EVENT_GAP = 0.3
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fresh_verifier_client():
+    """The shared client's connections belong to one test's event loop"""
+    yield
+    await close_verifier_client()
+
+
+def slow_verifier_app() -> FastAPI:
+    """Verifier stand-in whose stream sends one event every EVENT_GAP seconds"""
+    app = FastAPI()
+
+    @app.post("/verify/stream")
+    async def verify_stream():
+        async def events():
+            for event in ("claim", "keywords", "evidence", "verdict"):
+                yield json.dumps({"event": event}) + "\n"
+                if event != "verdict":
+                    await asyncio.sleep(EVENT_GAP)
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    return app
+
+
+@pytest.fixture
+def slow_verifier_url():
+    """Serve the slow verifier over real HTTP so nothing in between buffers it"""
+    # loop="asyncio": uvloop would replace the event loop policy pytest-asyncio uses
+    config = uvicorn.Config(slow_verifier_app(), host="127.0.0.1", port=0, log_level="warning", loop="asyncio")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        thread.join(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(5)
+
+
+@pytest.mark.asyncio
+async def test_gateway_relays_stream_without_buffering(slow_verifier_url, monkeypatch, asgi_stream):
+    monkeypatch.setattr(claims_router, "VERIFIER_URL", slow_verifier_url)
+    gateway_app.dependency_overrides[get_current_user] = lambda: TokenData(email="alice@example.com")
+    try:
+        response = await asgi_stream(
+            gateway_app, "/claims/verify/stream", {"input_type": "text", "raw_input": "5G causes COVID"}
+        )
+    finally:
+        gateway_app.dependency_overrides.clear()
+
+    assert response["status"] == 200
+    assert response["headers"]["content-type"] == "application/x-ndjson"
+    assert response["headers"]["x-accel-buffering"] == "no"
+    events = [json.loads(line)["event"] for _, chunk in response["chunks"] for line in chunk.decode().splitlines()]
+    assert events == ["claim", "keywords", "evidence", "verdict"]
+
+    first_byte, last_byte = response["chunks"][0][0], response["chunks"][-1][0]
+    assert first_byte < EVENT_GAP
+    assert last_byte >= 3 * EVENT_GAP
+
+
+@pytest.mark.asyncio
+async def test_gateway_stream_reports_verifier_unavailable(monkeypatch, asgi_stream):
+    monkeypatch.setattr(claims_router, "VERIFIER_URL", "http://127.0.0.1:9")
+    gateway_app.dependency_overrides[get_current_user] = lambda: TokenData(email="alice@example.com")
+    try:
+        response = await asgi_stream(
+            gateway_app, "/claims/verify/stream", {"input_type": "text", "raw_input": "5G causes COVID"}
+        )
+    finally:
+        gateway_app.dependency_overrides.clear()
+
+    assert response["status"] == 503
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=100)
+    monkeypatch.setattr(jwt_module, "token_cache", cache)
+    return cache
+
+
+def test_verified_tokens_skip_signature_check(token_cache, monkeypatch):
+    decode = jwt_module.jwt.decode
+    calls = []
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_module.jwt, "decode", counting_decode)
+    token = create_access_token({"sub": "alice@example.com"})
+
+    assert verify_token(token).email == "alice@example.com"
+    assert verify_token(token).email == "alice@example.com"
+    assert len(calls) == 1
+    assert token_cache.stats()["hits"] == 1
+
+    with pytest.raises(HTTPException):
+        verify_token(token + "x")
+    assert len(token_cache) == 1
+
+    # Expired tokens are rejected by jose and never cached
+    expired = create_access_token({"sub": "alice@example.com"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException):
+        verify_token(expired)
+    assert len(token_cache) == 1
+
+
+def test_token_cache_expires_at_exp_and_evicts_lru():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_entries=2, clock=clock)
+    alice, bob = TokenData(email="alice@example.com"), TokenData(email="bob@example.com")
+
+    cache.put("a", alice, clock.now + 10)
+    clock.now += 9.9
+    assert cache.get("a") is alice
+    clock.now += 0.1
+    assert cache.get("a") is None  # never served at or after exp
+    assert cache.counters["expirations"] == 1
+
+    cache.put("a", alice, clock.now + 60)
+    cache.put("b", bob, clock.now + 60)
+    cache.get("a")
+    cache.put("c", bob, clock.now + 60)
+    assert cache.get("b") is None
+    assert cache.get("a") is alice
+    assert cache.counters["evictions"] == 1
+
+    cache.put("no-exp", alice, None)
+    cache.put("already-expired", alice, clock.now)
+    assert cache.get("no-exp") is None and cache.get("already-expired") is None
+
+
+def test_revoked_token_is_rejected_until_exp():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(clock=clock)
+    cache.put("a", TokenData(email="alice@example.com"), clock.now + 60)
+
+    cache.revoke("a")
+    assert cache.get("a") is None
+    assert cache.is_revoked("a")
+    cache.put("a", TokenData(email="alice@example.com"), clock.now + 60)
+    assert cache.get("a") is None
+
+    clock.now += 60
+    assert not cache.is_revoked("a")
+    cache.revoke("b", clock.now + 1)
+    assert cache.stats()["revoked"] == 1  # "a" was pruned
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_token(token_cache):
+    transport = httpx.ASGITransport(app=gateway_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        login = await client.post("/auth/login", json={"email": "alice@example.com", "password": "secret"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        assert (await client.post("/auth/logout", headers=headers)).status_code == 204
+        assert (await client.get(f"/claims/{'0' * 32}", headers=headers)).status_code == 401
+        assert (await client.post("/auth/logout", headers=headers)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_gateway_routes():
+    from gateway.app.metrics import REGISTRY
+
+    labels = {"method": "GET", "route": "/claims/{claim_id}", "status": "403"}
+    before = REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+    transport = httpx.ASGITransport(app=gateway_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        for claim_id in ("a" * 32, "b" * 32):
+            assert (await client.get(f"/claims/{claim_id}")).status_code == 403
+        assert (await client.get("/no/such/route")).status_code == 404
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) == before + 2
+    assert 'route="unmatched",status="404"' in response.text
+    assert "process_cpu_seconds_total" in response.text
+
+
+def claim_details(claim_id, status):
+    return {
+        "claim_id": claim_id, "input_type": "text", "raw_input": "5G causes COVID", "status": status,
+        "attempts": 1, "error": None, "evidence": [],
+        "verdict": {"label": "contradict", "confidence": 0.9, "explanation": "test"} if status == "done" else {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_finished_claims_are_served_from_the_gateway_cache(monkeypatch):
+    done_id, pending_id = "11111111-1111-1111-1111-111111111111", "22222222-2222-2222-2222-222222222222"
+    upstream_calls = []
+
+    def verifier(request):
+        claim_id = request.url.path.rsplit("/", 1)[-1]
+        upstream_calls.append(claim_id)
+        if claim_id == done_id:
+            return httpx.Response(200, json=claim_details(claim_id, "done"), headers={
+                "ETag": '"verifier"', "Cache-Control": "private, max-age=60, immutable",
+            })
+        return httpx.Response(200, json=claim_details(claim_id, "pending"), headers={"Cache-Control": "no-store"})
+
+    monkeypatch.setattr(claims_router, "claim_cache", ClaimCache(max_entries=10))
+    verifier_client = httpx.AsyncClient(transport=httpx.MockTransport(verifier))
+    gateway_app.dependency_overrides[get_current_user] = lambda: TokenData(email="alice@example.com")
+    gateway_app.dependency_overrides[get_verifier_client] = lambda: verifier_client
+    transport = httpx.ASGITransport(app=gateway_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            first = await client.get(f"/claims/{done_id}")
+            second = await client.get(f"/claims/{done_id.upper()}")
+            not_modified = await client.get(f"/claims/{done_id}", headers={"If-None-Match": first.headers["etag"]})
+            pending = [await client.get(f"/claims/{pending_id}") for _ in range(2)]
+    finally:
+        gateway_app.dependency_overrides.clear()
+        await verifier_client.aclose()
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert first.json()["verdict"]["label"] == "contradict"
+    assert second.headers["etag"] == first.headers["etag"] == '"verifier"'
+    assert second.content == first.content == json.dumps(claim_details(done_id, "done")).encode()
+    assert not_modified.status_code == 304
+    assert [response.headers["cache-control"] for response in pending] == ["no-store", "no-store"]
+    assert "etag" not in pending[0].headers
+    assert upstream_calls == [done_id, pending_id, pending_id]
+    assert claims_router.claim_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_gateway_cache_miss_forwards_if_none_match(monkeypatch):
+    claim_id = "11111111-1111-1111-1111-111111111111"
+    conditions = []
+
+    def verifier(request):
+        conditions.append(request.headers.get("if-none-match"))
+        headers = {"ETag": '"verifier"', "Cache-Control": "private, max-age=60, immutable"}
+        if request.headers.get("if-none-match") == '"verifier"':
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, json=claim_details(claim_id, "done"), headers=headers)
+
+    monkeypatch.setattr(claims_router, "claim_cache", ClaimCache(max_entries=10))
+    verifier_client = httpx.AsyncClient(transport=httpx.MockTransport(verifier))
+    gateway_app.dependency_overrides[get_current_user] = lambda: TokenData(email="alice@example.com")
+    gateway_app.dependency_overrides[get_verifier_client] = lambda: verifier_client
+    transport = httpx.ASGITransport(app=gateway_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            not_modified = await client.get(f"/claims/{claim_id}", headers={"If-None-Match": '"verifier"'})
+            full = await client.get(f"/claims/{claim_id}")
+    finally:
+        gateway_app.dependency_overrides.clear()
+        await verifier_client.aclose()
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == '"verifier"'
+    assert full.status_code == 200
+    assert conditions == ['"verifier"', None]
+    assert len(claims_router.claim_cache) == 1
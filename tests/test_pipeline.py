@@ -0,0 +1,878 @@
+import asyncio
+import re
+import time
+import pytest
+
+pytest.importorskip("sqlalchemy")
+httpx = pytest.importorskip("httpx")
+
+from sqlalchemy import event, func, select
+
+from verifier.app import nlp as nlp_module
+from verifier.app import pipeline as pipeline_module
+from verifier.app.models import Claim, Evidence, Verdict
+from verifier.app.nlp import claim_fingerprint
+from verifier.app.pipeline import VerificationPipeline, merge_evidence
+from verifier.app.query_planner import DocumentFrequencies, QueryPlanner, set_query_planner
+
+
+class FakeWikiClient:
+    """Stands in for the evidence service client"""
+
+    def __init__(self, results=None, delays=None, failures=()):
+        self.results = results or {}
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.calls = []
+
+    async def search_evidence(self, query, limit=5):
+        self.calls.append(query)
+        await asyncio.sleep(self.delays.get(query, 0))
+        if query in self.failures:
+            raise RuntimeError(f"lookup failed for {query}")
+        return [dict(ev) for ev in self.results.get(query, [])]
+
+
+def page(title):
+    return {
+        "title": title,
+        "url": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+        "snippet": f"{title} snippet",
+        "score": 0.0,
+    }
+
+
+def test_merge_evidence_dedupes_by_url_and_title():
+    merged = merge_evidence([
+        [page("5G"), page("COVID-19")],
+        [page("COVID-19"), {"title": "5g", "snippet": "no url"}, page("Radio wave")],
+    ])
+    assert [ev["title"] for ev in merged] == ["5G", "COVID-19", "5g", "Radio wave"]
+
+    merged = merge_evidence([[{"title": "5G", "snippet": "a"}], [{"title": "5g ", "snippet": "b"}]])
+    assert len(merged) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_evidence_runs_lookups_concurrently(monkeypatch):
+    fake = FakeWikiClient(
+        results={"5g": [page("5G")], "covid": [page("COVID-19"), page("5G")], "causes": [page("Causality")]},
+        delays={"5g": 0.2, "covid": 0.2, "causes": 0.2},
+    )
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    monkeypatch.setattr(pipeline_module, "EVIDENCE_CONCURRENCY", 3)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    evidence = await VerificationPipeline(db=None)._fetch_evidence(["5g", "covid", "causes"])
+    elapsed = loop.time() - started
+
+    assert elapsed < 0.5
+    assert sorted(fake.calls) == ["5g", "causes", "covid"]
+    assert [ev["title"] for ev in evidence] == ["5G", "COVID-19", "Causality"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_evidence_keeps_partial_results(monkeypatch):
+    fake = FakeWikiClient(
+        results={"5g": [page("5G")], "covid": [page("COVID-19")], "slow": [page("Slow")]},
+        delays={"slow": 5},
+        failures={"covid"},
+    )
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    monkeypatch.setattr(pipeline_module, "EVIDENCE_DEADLINE_SECONDS", 0.2)
+
+    evidence = await VerificationPipeline(db=None)._fetch_evidence(["5g", "covid", "slow"])
+
+    assert [ev["title"] for ev in evidence] == ["5G"]
+
+
+@pytest.mark.asyncio
+async def test_evidence_client_reopens_after_close():
+    from verifier.app.wiki_client import WikiClient
+
+    client = WikiClient()
+    first = client.session
+    await client.close()
+    assert first.is_closed
+
+    # A restarted app (or a second TestClient) keeps using the module's client
+    second = client.session
+    assert second is not first and not second.is_closed
+    await client.close()
+
+
+@pytest.fixture(autouse=True)
+def planned_queries():
+    """Plan compound queries with a table in which no word of the claims is common"""
+    set_query_planner(QueryPlanner(DocumentFrequencies(1000, {})))
+    yield
+    set_query_planner(QueryPlanner())
+
+
+# Keyed by the queries planned for "5G causes COVID" and "COVID causes 5G"
+CLAIM_EVIDENCE = {
+    "5G causes COVID": [page("COVID-19"), page("5G misinformation")],
+    "5G": [page("5G")],
+    "COVID causes 5G": [page("5G misinformation"), page("COVID-19")],
+    "COVID": [page("COVID-19"), page("5G")],
+}
+
+
+def test_claim_fingerprint_normalizes_text():
+    assert claim_fingerprint("5G causes COVID") == claim_fingerprint("  5g   causes covid!")
+    assert claim_fingerprint("5G causes COVID") != claim_fingerprint("5G cures COVID")
+    assert claim_fingerprint("http://a.com/x-y", "url") != claim_fingerprint("http://a.com/x_y", "url")
+    assert len(claim_fingerprint("anything")) == 64
+
+
+@pytest.mark.asyncio
+async def test_repeat_claim_is_served_from_verdict_cache(db, monkeypatch):
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE)
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    pipeline = VerificationPipeline(db)
+
+    first = await pipeline.run_pipeline("text", "5G causes COVID", "alice@example.com")
+    lookups = len(fake.calls)
+    second = await pipeline.run_pipeline("text", "5g causes covid!", "bob@example.com")
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["cached_from"] == first["claim_id"]
+    assert second["claim_id"] != first["claim_id"]
+    assert second["verdict"] == first["verdict"]
+    assert len(fake.calls) == lookups
+
+    # The repeat request is recorded for its user with its own verdict and evidence
+    details = await pipeline.get_claim_details(second["claim_id"])
+    assert details["raw_input"] == "5g causes covid!"
+    assert details["status"] == "done"
+    assert details["verdict"] == first["verdict"]
+    assert len(details["evidence"]) == len(first["top_evidence"])
+    assert await db.scalar(select(func.count()).select_from(Claim).where(Claim.user_id == "bob@example.com")) == 1
+
+
+@pytest.mark.asyncio
+async def test_verdicts_record_the_scoring_model_version(db, monkeypatch):
+    from verifier.app import nlp as nlp_module
+    from verifier.app import scoring_tfidf
+
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE)
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    pipeline = VerificationPipeline(db)
+
+    before = await pipeline.run_pipeline("text", "5G causes COVID", "alice")
+    assert before["verdict"]["model_version"] == nlp_module.PER_REQUEST_MODEL_VERSION
+
+    # After a model upgrade, verdicts scored by the old model are not reused
+    model = scoring_tfidf.fit_scoring_model(
+        [ev["snippet"] for results in CLAIM_EVIDENCE.values() for ev in results], min_df=1
+    )
+    monkeypatch.setattr(scoring_tfidf, "_scoring_model", model)
+    after = await pipeline.run_pipeline("text", "5G causes COVID", "alice")
+    again = await pipeline.run_pipeline("text", "5G causes COVID", "bob")
+
+    assert after["cached"] is False
+    assert after["verdict"]["model_version"] == model.version
+    assert again["cached_from"] == after["claim_id"]
+    assert again["verdict"]["model_version"] == model.version
+    details = await pipeline.get_claim_details(after["claim_id"])
+    assert details["verdict"]["model_version"] == model.version
+
+    # So is switching to another scorer backend
+    monkeypatch.setattr(nlp_module, "SCORER_BACKEND", "jaccard")
+    jaccard = await pipeline.run_pipeline("text", "5G causes COVID", "alice")
+    assert jaccard["cached"] is False
+    assert jaccard["verdict"]["model_version"] == "jaccard"
+
+
+@pytest.mark.asyncio
+async def test_verdict_cache_respects_freshness_window(db, monkeypatch):
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE)
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    pipeline = VerificationPipeline(db)
+
+    await pipeline.run_pipeline("text", "5G causes COVID", "alice@example.com")
+    monkeypatch.setattr(pipeline_module, "VERDICT_CACHE_SECONDS", 0)
+    result = await pipeline.run_pipeline("text", "5G causes COVID", "alice@example.com")
+
+    assert result["cached"] is False
+    assert await db.scalar(select(func.count()).select_from(Verdict)) == 2
+
+
+@pytest.mark.asyncio
+async def test_serving_a_cached_verdict_does_not_extend_its_freshness(db, monkeypatch):
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE)
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    monkeypatch.setattr(pipeline_module, "VERDICT_CACHE_SECONDS", 2)
+    pipeline = VerificationPipeline(db)
+
+    first = await pipeline.run_pipeline("text", "5G causes COVID", "alice")
+    await asyncio.sleep(1.1)
+    hit = await pipeline.run_pipeline("text", "5G causes COVID", "bob")
+    [batch_hit] = await pipeline.run_batch([{"input_type": "text", "raw_input": "5G causes COVID"}], "carol")
+    assert hit["cached_from"] == batch_hit["cached_from"] == first["claim_id"]
+
+    # Past the window of the original verification the copies are stale too
+    await asyncio.sleep(1.1)
+    lookups = len(fake.calls)
+    again = await pipeline.run_pipeline("text", "5G causes COVID", "dave")
+    assert again["cached"] is False
+    assert len(fake.calls) > lookups
+    [batch_again] = await pipeline.run_batch([{"input_type": "text", "raw_input": "5G causes COVID"}], "erin")
+    assert batch_again["cached_from"] == again["claim_id"]
+
+
+class StatementLog:
+    """Records the SQL statements and commits issued on an engine"""
+
+    def __init__(self, engine):
+        self.statements = []
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def writes(self):
+        """Write statements as "INSERT claims", "UPDATE claims", ..."""
+        writes = []
+        for statement in self.statements:
+            match = re.match(r"(INSERT) INTO (\w+)|(UPDATE) (\w+)|(DELETE) FROM (\w+)", statement)
+            if match:
+                writes.append(" ".join(part for part in match.groups() if part))
+        return writes
+
+
+@pytest.mark.asyncio
+async def test_verification_without_pending_row_is_one_transaction(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    log = StatementLog(db.bind.sync_engine)
+
+    result = await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice", write_pending=False)
+
+    assert log.commits == 1
+    assert log.writes() == ["INSERT claims", "INSERT evidence", "INSERT verdicts"]
+    assert await db.scalar(select(func.count()).select_from(Evidence)) == len(result["top_evidence"]) == 3
+    claim = await db.scalar(select(Claim))
+    assert str(claim.id) == result["claim_id"]
+    assert claim.status == "done"
+
+
+@pytest.mark.asyncio
+async def test_verification_with_pending_row_updates_status_in_final_transaction(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    log = StatementLog(db.bind.sync_engine)
+
+    await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice", write_pending=True)
+
+    assert log.commits == 2
+    assert log.writes() == ["INSERT claims", "UPDATE claims", "INSERT evidence", "INSERT verdicts"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("write_pending", [True, False])
+async def test_failed_verification_is_recorded_as_error(db, monkeypatch, write_pending):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+
+    def broken_scoring(claims, snippet_lists):
+        raise RuntimeError("scoring failed")
+
+    monkeypatch.setattr(nlp_module, "analyze_evidence", broken_scoring)
+
+    with pytest.raises(RuntimeError):
+        await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice", write_pending=write_pending)
+
+    claims = (await db.scalars(select(Claim))).all()
+    assert [claim.status for claim in claims] == ["error"]
+    assert await db.scalar(select(func.count()).select_from(Verdict)) == 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stages_are_timed(db, monkeypatch):
+    from verifier.app.timings import StageTimings
+
+    timings = StageTimings(window=2)
+    monkeypatch.setattr(pipeline_module, "stage_timings", timings)
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE, delays={"5G": 0.05}))
+
+    for _ in range(3):
+        await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice")
+
+    stats = timings.stats()
+    # Later runs are served from the verdict cache
+    assert {stage: stats[stage]["count"] for stage in stats} == {
+        "cache_lookup": 3, "claim_insert": 1, "query_planning": 1, "evidence_lookup": 1, "scoring": 1, "store": 1
+    }
+    assert stats["evidence_lookup"]["p50_ms"] >= 50
+    assert len(timings.samples["cache_lookup"]) == 2
+
+    timings.reset()
+    await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice")
+    assert {stage: stats["count"] for stage, stats in timings.stats().items()} == {"cache_lookup": 1}
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_requests_stages_and_verdicts(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+    from verifier.app.metrics import REGISTRY
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    before = {
+        "verify": sample("http_request_duration_seconds_count", method="POST", route="/verify", status="200"),
+        "claim": sample("http_request_duration_seconds_count", method="GET", route="/claims/{claim_id}", status="200"),
+        "scoring": sample("verifier_pipeline_stage_seconds_count", stage="scoring"),
+        "search": sample("verifier_evidence_requests_total", call="search", outcome="ok"),
+        "cached": sum(sample("verifier_verdicts_total", label=label, cached="true")
+                      for label in ("support", "contradict", "insufficient")),
+    }
+    fake_evidence_service(monkeypatch, latency=0)
+
+    async def override_db():
+        yield db
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://verifier") as client:
+            claim = {"input_type": "text", "raw_input": "5G networks cause the COVID-19 pandemic", "user_id": "alice"}
+            first = (await client.post("/verify", json=claim)).json()
+            await client.post("/verify", json=claim)
+            await client.get(f"/claims/{first['claim_id']}")
+            response = await client.get("/metrics")
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert sample("http_request_duration_seconds_count", method="POST", route="/verify", status="200") == before["verify"] + 2
+    # Labelled with the path template, not the claim id
+    assert sample("http_request_duration_seconds_count", method="GET", route="/claims/{claim_id}", status="200") == before["claim"] + 1
+    assert sample("verifier_pipeline_stage_seconds_count", stage="scoring") == before["scoring"] + 1
+    assert sample("verifier_evidence_requests_total", call="search", outcome="ok") > before["search"]
+    assert sum(sample("verifier_verdicts_total", label=label, cached="true")
+               for label in ("support", "contradict", "insufficient")) == before["cached"] + 1
+    assert 'verifier_db_pool_connections{state="size"}' in response.text
+    assert "verifier_nlp_queue_depth" in response.text
+
+
+async def verify_through_gateway(db, monkeypatch, raw_input):
+    """
+    POST /claims/verify through the gateway, verifier and evidence service,
+    all in process, against the fake MediaWiki
+    """
+    pytest.importorskip("fastapi")
+    from gateway.app.main import app as gateway_app
+    from gateway.app.models.auth import TokenData
+    from gateway.app.security.jwt import get_current_user
+    from gateway.app.tracing import TracingTransport
+    from gateway.app.verifier_client import get_verifier_client
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+    from verifier.app.tracing import trace_db_transactions
+
+    fake_evidence_service(monkeypatch, latency=0)
+    trace_db_transactions(db.bind)
+
+    async def override_db():
+        yield db
+
+    verifier_client = httpx.AsyncClient(transport=TracingTransport(httpx.ASGITransport(app=verifier_main.app)))
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    gateway_app.dependency_overrides[get_current_user] = lambda: TokenData(email="alice@example.com")
+    gateway_app.dependency_overrides[get_verifier_client] = lambda: verifier_client
+    transport = httpx.ASGITransport(app=gateway_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            return await client.post("/claims/verify", json={"input_type": "text", "raw_input": raw_input})
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+        gateway_app.dependency_overrides.clear()
+        await verifier_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_one_trace_covers_gateway_verifier_evidence_and_wikipedia(db, monkeypatch, spans):
+    response = await verify_through_gateway(db, monkeypatch, "5G networks cause the COVID-19 pandemic")
+    assert response.status_code == 200
+
+    finished = spans.get_finished_spans()
+    by_id = {span.context.span_id: span for span in finished}
+
+    def parent(span):
+        return by_id[span.parent.span_id].name if span.parent else None
+
+    def named(name):
+        return [span for span in finished if span.name == name]
+
+    assert len({span.context.trace_id for span in finished}) == 1
+    [root] = named("POST /claims/verify")
+    assert root.parent is None
+    assert root.resource.attributes["service.name"] == "gateway"
+    assert [parent(span) for span in named("verifier POST")] == ["POST /claims/verify"]
+    [verify] = named("POST /verify")
+    assert parent(verify) == "verifier POST"
+    assert verify.resource.attributes["service.name"] == "verifier"
+    for stage in ("cache_lookup", "query_planning", "evidence_lookup", "scoring", "store"):
+        assert [parent(span) for span in named(f"pipeline {stage}")] == ["POST /verify"]
+    assert {parent(span) for span in named("evidence search")} == {"pipeline evidence_lookup"}
+    assert {parent(span) for span in named("GET /wikipedia/search")} == {"evidence search"}
+    wikipedia = [span for span in finished if span.name.startswith("wikipedia ")]
+    assert wikipedia and {parent(span) for span in wikipedia} == {"GET /wikipedia/search"}
+    transactions = {parent(span): span.attributes for span in named("db transaction")}
+    assert set(transactions) == {"pipeline cache_lookup", "pipeline store"}
+    assert transactions["pipeline store"]["db.outcome"] == "commit"
+    assert transactions["pipeline store"]["db.statements"] == 3
+
+
+@pytest.mark.asyncio
+async def test_unsampled_traces_are_not_recorded_downstream(db, monkeypatch, spans):
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from gateway.app.tracing import tracer as gateway_tracer
+
+    # TRACE_SAMPLE_RATIO=0 on the gateway
+    monkeypatch.setattr(gateway_tracer, "sampler", ParentBased(TraceIdRatioBased(0)))
+    response = await verify_through_gateway(db, monkeypatch, "5G networks cause the COVID-19 pandemic")
+
+    assert response.status_code == 200
+    assert spans.get_finished_spans() == ()
+
+
+def test_span_file_is_closed_when_the_provider_shuts_down(tmp_path):
+    pytest.importorskip("opentelemetry.sdk")
+    import json
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from shared.tracing import FileSpanExporter
+
+    path = tmp_path / "spans.jsonl"
+    exporter = FileSpanExporter(str(path))
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    with provider.get_tracer("test").start_as_current_span("first"):
+        pass
+    provider.shutdown()
+
+    assert exporter._file is None
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["first"]
+
+
+@pytest.mark.asyncio
+async def test_full_nlp_queue_rejects_claims_before_storing_them(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+    from verifier.app.nlp import NLPExecutor, NLPQueueFull
+
+    executor = NLPExecutor("inline", max_queue=0)
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    monkeypatch.setattr(pipeline_module, "nlp_executor", executor)
+    monkeypatch.setattr(verifier_main, "nlp_executor", executor)
+
+    with pytest.raises(NLPQueueFull):
+        await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice", write_pending=True)
+
+    async def override_db():
+        yield db
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://verifier") as client:
+            response = await client.post("/verify", json={"input_type": "text", "raw_input": "5G causes COVID", "user_id": "alice"})
+            stream = await client.post("/verify/stream", json={"input_type": "text", "raw_input": "5G causes COVID", "user_id": "alice"})
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+
+    assert response.status_code == stream.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert executor.stats()["rejected"] == 3
+    assert await db.scalar(select(func.count()).select_from(Claim)) == 0
+
+
+@pytest.mark.asyncio
+async def test_nlp_queue_counts_claims_waiting_for_evidence(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+    from verifier.app.nlp import NLPExecutor
+
+    # Admitted claims count while they wait for slow evidence, before any scoring
+    executor = NLPExecutor("inline", max_queue=2)
+    slow = FakeWikiClient(results=CLAIM_EVIDENCE, delays={query: 0.2 for query in CLAIM_EVIDENCE})
+    monkeypatch.setattr(pipeline_module, "wiki_client", slow)
+    monkeypatch.setattr(pipeline_module, "nlp_executor", executor)
+    sessions = async_sessionmaker(db.bind, autoflush=False, expire_on_commit=False)
+
+    async def override_db():
+        async with sessions() as session:
+            yield session
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://verifier") as client:
+            responses = await asyncio.gather(*(
+                client.post("/verify", json={"input_type": "text", "raw_input": "5G causes COVID", "user_id": "alice"})
+                for _ in range(5)
+            ))
+            stream = await client.post("/verify/stream", json={"input_type": "text", "raw_input": "5G", "user_id": "bob"})
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+
+    assert sorted(response.status_code for response in responses) == [200, 200, 503, 503, 503]
+    assert stream.status_code == 200 and '"event": "verdict"' in stream.text
+    stats = executor.stats()
+    assert (stats["claims"], stats["max_claims"], stats["rejected"], stats["admitted"]) == (0, 2, 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_scoring_runs_off_the_event_loop(db, monkeypatch):
+    from verifier.app.nlp import NLPExecutor, ScoringBatcher, analyze_evidence
+
+    def slow_analysis(claims, snippet_lists):
+        time.sleep(0.3)
+        return analyze_evidence(claims, snippet_lists)
+
+    executor = NLPExecutor("thread", workers=1)
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    monkeypatch.setattr(nlp_module, "analyze_evidence", slow_analysis)
+    monkeypatch.setattr(pipeline_module, "scoring_batcher", ScoringBatcher(executor))
+
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    beating = asyncio.create_task(heartbeat())
+    try:
+        result = await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice")
+    finally:
+        beating.cancel()
+        executor.shutdown()
+
+    assert result["verdict"]["label"] == "insufficient"
+    # The loop kept running while the scoring thread slept
+    assert ticks >= 10
+    assert executor.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_details_are_loaded_with_one_query(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    result = await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice")
+    db.expunge_all()
+    log = StatementLog(db.bind.sync_engine)
+
+    details = await VerificationPipeline(db).get_claim_details(result["claim_id"])
+
+    assert len(log.statements) == 1
+    assert details["verdict"] == result["verdict"]
+    assert [ev["title"] for ev in details["evidence"]] == [ev["title"] for ev in result["top_evidence"]]
+
+
+@pytest.mark.asyncio
+async def test_lookup_endpoint_returns_claims_in_request_order(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    pipeline = VerificationPipeline(db)
+    done = await pipeline.run_pipeline("text", "5G causes COVID", "alice")
+    other = await pipeline.run_pipeline("text", "Vaccines cause autism", "alice")
+    db.expunge_all()
+    log = StatementLog(db.bind.sync_engine)
+
+    async def override_db():
+        yield db
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://verifier") as client:
+            unknown = "00000000-0000-0000-0000-000000000000"
+            response = await client.post("/claims/lookup", json={
+                "claim_ids": [other["claim_id"], "not-a-uuid", done["claim_id"].upper(), unknown],
+            })
+            too_many = await client.post("/claims/lookup", json={"claim_ids": [unknown] * 101})
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [claim["claim_id"] for claim in body["claims"]] == [other["claim_id"], done["claim_id"]]
+    assert body["claims"][1]["verdict"] == done["verdict"]
+    assert body["missing"] == ["not-a-uuid", unknown]
+    assert len(log.statements) == 1
+    assert too_many.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_finished_claims_get_etags_and_304s(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    done = await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice")
+    pending = await VerificationPipeline(db).enqueue("text", "Vaccines cause autism", "alice")
+
+    async def override_db():
+        yield db
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://verifier") as client:
+            first = await client.get(f"/claims/{done['claim_id']}")
+            again = await client.get(f"/claims/{done['claim_id']}")
+            etag = first.headers["etag"]
+            not_modified = await client.get(f"/claims/{done['claim_id']}", headers={"If-None-Match": f'"x", {etag}'})
+            stale = await client.get(f"/claims/{done['claim_id']}", headers={"If-None-Match": '"x"'})
+            unfinished = await client.get(f"/claims/{pending['claim_id']}")
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert first.json()["verdict"] == done["verdict"]
+    assert etag.startswith('"') and again.headers["etag"] == etag
+    assert "immutable" in first.headers["cache-control"]
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert stale.status_code == 200
+    assert unfinished.status_code == 200
+    assert unfinished.headers["cache-control"] == "no-store"
+    assert "etag" not in unfinished.headers
+
+
+@pytest.mark.asyncio
+async def test_batch_shares_lookups_and_stores_in_one_transaction(db, monkeypatch):
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE)
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    plan_queries = pipeline_module.plan_queries
+
+    def fragile_planner(text):
+        if "broken" in text:
+            raise RuntimeError("tokenizer crashed")
+        return plan_queries(text)
+
+    monkeypatch.setattr(pipeline_module, "plan_queries", fragile_planner)
+    log = StatementLog(db.bind.sync_engine)
+
+    results = await VerificationPipeline(db).run_batch([
+        {"input_type": "text", "raw_input": "5G causes COVID"},
+        {"input_type": "text", "raw_input": "COVID causes 5G"},
+        {"input_type": "text", "raw_input": "a broken claim"},
+        {"input_type": "text", "raw_input": "5g causes covid!"},
+    ], user_id="alice")
+
+    assert sorted(fake.calls) == sorted(CLAIM_EVIDENCE)  # once each for the whole batch
+    assert log.commits == 1
+    assert log.writes() == ["INSERT claims", "INSERT evidence", "INSERT verdicts"]
+
+    first, second, broken, repeat = results
+    assert first["verdict"]["label"] and first["cached"] is False
+    assert {ev["title"] for ev in second["top_evidence"]} == {ev["title"] for ev in first["top_evidence"]}
+    assert broken["error"] == "Query planning failed: tokenizer crashed"
+    assert repeat["cached_from"] == first["claim_id"]
+    assert repeat["verdict"] == first["verdict"]
+
+    statuses = dict((await db.execute(select(Claim.raw_input, Claim.status))).all())
+    assert statuses == {
+        "5G causes COVID": "done", "COVID causes 5G": "done", "a broken claim": "error", "5g causes covid!": "done",
+    }
+    assert await db.scalar(select(func.count()).select_from(Verdict)) == 3
+
+    # A later batch reuses the stored verdicts without any lookups
+    fake.calls.clear()
+    again = await VerificationPipeline(db).run_batch([{"input_type": "text", "raw_input": "5G causes COVID"}], "bob")
+    assert fake.calls == []
+    assert again[0]["cached"] is True
+    assert again[0]["verdict"] == first["verdict"]
+
+
+@pytest.mark.asyncio
+async def test_batch_scoring_failure_stores_errors_and_keeps_cached_verdicts(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    done = await VerificationPipeline(db).run_pipeline("text", "5G causes COVID", "alice")
+
+    def broken_scoring(claims, snippet_lists):
+        raise RuntimeError("model file is corrupt")
+
+    monkeypatch.setattr(nlp_module, "analyze_evidence", broken_scoring)
+    results = await VerificationPipeline(db).run_batch([
+        {"input_type": "text", "raw_input": "5G causes COVID"},
+        {"input_type": "text", "raw_input": "COVID causes 5G"},
+        {"input_type": "text", "raw_input": "covid causes 5g!"},
+    ], user_id="bob")
+
+    cached, failed, repeat = results
+    assert cached["cached_from"] == done["claim_id"]
+    assert failed["error"] == repeat["error"] == "Scoring failed: model file is corrupt"
+
+    statuses = dict((await db.execute(select(Claim.raw_input, Claim.status).where(Claim.user_id == "bob"))).all())
+    assert statuses == {"5G causes COVID": "done", "COVID causes 5G": "error", "covid causes 5g!": "error"}
+
+
+def fake_evidence_service(monkeypatch, latency):
+    """
+    Point the pipeline at the real evidence service (in process, cold caches)
+    backed by the fake MediaWiki, which adds `latency` seconds to every call
+    """
+    from benchmarks.fake_mediawiki import create_app as create_fake_mediawiki
+    from evidence.app import main as evidence_main
+    from evidence.app.wikipedia import WikipediaClient
+    from verifier.app.wiki_client import WikiClient
+
+    mediawiki = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_fake_mediawiki(latency=latency)))
+    evidence_client = WikipediaClient(session=mediawiki)
+    evidence_client.base_url = "http://fake/api/rest_v1"
+    evidence_client.action_api_url = "http://fake/w/api.php"
+    monkeypatch.setattr(evidence_main, "wiki_client", evidence_client)
+    client = WikiClient(session=httpx.AsyncClient(transport=httpx.ASGITransport(app=evidence_main.app)))
+    client.base_url = "http://evidence"
+    monkeypatch.setattr(pipeline_module, "wiki_client", client)
+    return client
+
+
+BATCH_TOPICS = [
+    "5G networks", "COVID-19 pandemic", "vaccine immunity", "flat Earth", "moon landing",
+    "climate change", "radio wave", "mobile phone", "Great Wall of China", "Earth planet",
+]
+
+
+@pytest.mark.asyncio
+async def test_batch_throughput_against_fake_evidence_service(db, monkeypatch):
+    pytest.importorskip("fastapi")
+    monkeypatch.setattr(pipeline_module, "VERDICT_CACHE_SECONDS", 0)
+    claims = [
+        {"input_type": "text", "raw_input": f"The {topic} story number {n} is true"}
+        for n in range(2) for topic in BATCH_TOPICS
+    ]
+    loop = asyncio.get_running_loop()
+    pipeline = VerificationPipeline(db)
+
+    client = fake_evidence_service(monkeypatch, latency=0.02)
+    started = loop.time()
+    for claim in claims:
+        await pipeline.run_pipeline(claim["input_type"], claim["raw_input"], "alice", write_pending=False)
+    single_rate = len(claims) / (loop.time() - started)
+    await client.close()
+
+    client = fake_evidence_service(monkeypatch, latency=0.02)
+    started = loop.time()
+    results = await pipeline.run_batch(claims, "alice")
+    batch_rate = len(claims) / (loop.time() - started)
+    await client.close()
+
+    print(f"single: {single_rate:.1f} claims/s, batch: {batch_rate:.1f} claims/s")
+    assert all("verdict" in result for result in results)
+    assert any(result["top_evidence"] for result in results)
+    assert batch_rate > 2 * single_rate
+
+
+@pytest.mark.asyncio
+async def test_stream_pipeline_emits_each_stage(db, monkeypatch):
+    from verifier.app.timings import StageTimings
+
+    timings = StageTimings()
+    monkeypatch.setattr(pipeline_module, "stage_timings", timings)
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE, delays={"5G causes COVID": 0.1, "5G": 0.0})
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+
+    events = []
+    async for event in VerificationPipeline(db).stream_pipeline("text", "5G causes COVID", "alice"):
+        events.append(event)
+        await asyncio.sleep(0.2)  # a slow reader
+
+    assert [event["event"] for event in events] == ["claim", "keywords", "evidence", "evidence", "verdict"]
+    assert events[1]["keywords"] == ["5G causes COVID", "5G"]
+    assert [event["keyword"] for event in events[2:4]] == ["5G", "5G causes COVID"]  # as they arrive
+    assert all("score" in ev for event in events[2:4] for ev in event["evidence"])
+
+    verdict = events[-1]
+    assert verdict["claim_id"] == events[0]["claim_id"]
+    details = await VerificationPipeline(db).get_claim_details(verdict["claim_id"])
+    assert details["status"] == "done"
+    assert details["verdict"] == verdict["verdict"]
+
+    # The stages are timed as in run_pipeline(), without the reader's time
+    stats = timings.stats()
+    assert {stage: stats[stage]["count"] for stage in stats} == {
+        "cache_lookup": 1, "claim_insert": 1, "query_planning": 1, "evidence_lookup": 1, "scoring": 1, "store": 1
+    }
+    assert 100 <= stats["evidence_lookup"]["p50_ms"] < 200
+
+    # A repeat is answered from the verdict cache without lookups
+    events = [event async for event in VerificationPipeline(db).stream_pipeline("text", "5G causes COVID", "bob")]
+    assert [event["event"] for event in events] == ["claim", "verdict"]
+    assert events[-1]["cached"] is True
+    assert timings.counts["cache_lookup"] == 2 and timings.counts["evidence_lookup"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_pipeline_reports_failures(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+
+    def broken_scoring(claims, snippet_lists):
+        raise RuntimeError("scoring failed")
+
+    monkeypatch.setattr(nlp_module, "analyze_evidence", broken_scoring)
+
+    events = [event async for event in VerificationPipeline(db).stream_pipeline("text", "5G causes COVID", "alice")]
+
+    assert events[-1] == {"event": "error", "claim_id": events[0]["claim_id"], "detail": "scoring failed"}
+    assert (await db.scalars(select(Claim.status))).all() == ["error"]
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_time_to_first_byte(db, monkeypatch, asgi_stream):
+    pytest.importorskip("fastapi")
+    import json
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+
+    latency = 0.3  # per MediaWiki call; a lookup costs two
+    client = fake_evidence_service(monkeypatch, latency=latency)
+
+    async def override_db():
+        yield db
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    try:
+        claim = {"input_type": "text", "raw_input": "5G networks cause COVID", "user_id": "alice"}
+        response = await asgi_stream(verifier_main.app, "/verify/stream", claim)
+        sse = await asgi_stream(verifier_main.app, "/verify/stream", dict(claim, raw_input="Vaccines cause autism"),
+                                headers={"Accept": "text/event-stream"})
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+        await client.close()
+
+    assert response["status"] == 200
+    assert response["headers"]["content-type"] == "application/x-ndjson"
+    chunks = response["chunks"]
+    events = [json.loads(line) for _, chunk in chunks for line in chunk.decode().splitlines()]
+    assert [event["event"] for event in events][:2] == ["claim", "keywords"]
+    assert events[-1]["event"] == "verdict"
+
+    first_byte, last_byte = chunks[0][0], chunks[-1][0]
+    print(f"time to first byte: {first_byte * 1000:.1f} ms, verdict after {last_byte * 1000:.1f} ms")
+    assert first_byte < latency
+    assert last_byte >= 2 * latency
+
+    assert sse["headers"]["content-type"].startswith("text/event-stream")
+    assert sse["chunks"][0][1].decode().startswith("event: claim\ndata: {")
@@ -0,0 +1,169 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("sqlalchemy")
+httpx = pytest.importorskip("httpx")
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from verifier.app import nlp as nlp_module
+from verifier.app import pipeline as pipeline_module
+from verifier.app import worker as worker_module
+from verifier.app.models import Base, Claim, Verdict
+from verifier.app.pipeline import VerificationPipeline
+from verifier.app.worker import WorkerPool, recover_stuck, take_job
+
+from test_pipeline import CLAIM_EVIDENCE, FakeWikiClient, planned_queries  # noqa: F401 (autouse fixture)
+
+
+def session_factory(db):
+    return async_sessionmaker(db.bind, autoflush=False, expire_on_commit=False)
+
+
+async def claim_row(db, claim_id):
+    db.expunge_all()
+    return await db.get(Claim, claim_id)
+
+
+@pytest.mark.asyncio
+async def test_queued_claim_is_verified_by_a_worker(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    queued = await VerificationPipeline(db).enqueue("text", "5G causes COVID", "alice")
+    assert queued["status"] == "pending"
+
+    pool = WorkerPool(session_factory(db), workers=1)
+    assert await pool.run_once() is True
+    assert await pool.run_once() is False
+
+    details = await VerificationPipeline(db).get_claim_details(queued["claim_id"])
+    assert details["status"] == "done"
+    assert details["attempts"] == 1
+    assert details["verdict"]["label"] is not None
+    assert details["evidence"]
+    assert pool.counters["done"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff_then_marked_error(db, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "wiki_client", FakeWikiClient(results=CLAIM_EVIDENCE))
+    monkeypatch.setattr(worker_module, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(worker_module, "JOB_RETRY_DELAY_SECONDS", 60)
+
+    def broken_scoring(claims, snippet_lists):
+        raise RuntimeError("scoring failed")
+
+    monkeypatch.setattr(nlp_module, "analyze_evidence", broken_scoring)
+    queued = await VerificationPipeline(db).enqueue("text", "5G causes COVID", "alice")
+    pool = WorkerPool(session_factory(db), workers=1)
+
+    assert await pool.run_once() is True
+    claim = await claim_row(db, uuid.UUID(queued["claim_id"]))
+    assert (claim.status, claim.attempts, claim.last_error) == ("pending", 1, "scoring failed")
+
+    # Not due until the backoff has passed
+    assert await pool.run_once() is False
+    monkeypatch.setattr(worker_module, "JOB_RETRY_DELAY_SECONDS", 0)
+    claim.next_attempt_at = datetime.now(timezone.utc)
+    await db.commit()
+
+    assert await pool.run_once() is True
+    claim = await claim_row(db, claim.id)
+    assert (claim.status, claim.attempts) == ("error", 2)
+    assert pool.counters == {"retried": 1, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_stuck_claims_are_requeued_or_failed(db, monkeypatch):
+    monkeypatch.setattr(worker_module, "JOB_MAX_ATTEMPTS", 3)
+    long_ago = datetime.now(timezone.utc) - timedelta(seconds=worker_module.JOB_STUCK_SECONDS + 60)
+    rows = {
+        "stuck": {"locked_at": long_ago, "attempts": 1},
+        "exhausted": {"locked_at": long_ago, "attempts": 3},
+        "busy": {"locked_at": datetime.now(timezone.utc), "attempts": 1},
+    }
+    for raw_input, values in rows.items():
+        await db.execute(insert(Claim).values(
+            input_type="text", raw_input=raw_input, user_id="alice", status="running", **values
+        ))
+    await db.commit()
+
+    assert await recover_stuck(db) == 2
+
+    statuses = dict((await db.execute(select(Claim.raw_input, Claim.status))).all())
+    assert statuses == {"stuck": "pending", "exhausted": "error", "busy": "running"}
+    job = await take_job(db)
+    assert job["raw_input"] == "stuck"
+    assert job["attempts"] == 2
+    assert job["fingerprint"]
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_processes_queue_concurrently(tmp_path, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    queries = ["causes", "covid", "vaccines", "autism", "moon", "landing", "faked"]
+    fake = FakeWikiClient(results=CLAIM_EVIDENCE, delays={query: 0.1 for query in queries})
+    monkeypatch.setattr(pipeline_module, "wiki_client", fake)
+    monkeypatch.setattr(pipeline_module, "VERDICT_CACHE_SECONDS", 0)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/jobs.db", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with factory() as db:
+        for n in range(6):
+            await VerificationPipeline(db).enqueue("text", f"5G causes COVID {n}", "alice")
+
+    pool = WorkerPool(factory, workers=3, poll_seconds=0.05)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    pool.start()
+    try:
+        async with factory() as db:
+            while await db.scalar(select(Verdict.id).limit(1).offset(5)) is None:
+                assert loop.time() - started < 5
+                await asyncio.sleep(0.02)
+        elapsed = loop.time() - started
+    finally:
+        await pool.stop()
+
+    async with factory() as db:
+        statuses = (await db.scalars(select(Claim.status))).all()
+    await engine.dispose()
+
+    assert statuses == ["done"] * 6
+    assert pool.counters["done"] == 6
+    assert elapsed < 6 * 0.1  # one at a time would take at least 0.6s
+
+
+@pytest.mark.asyncio
+async def test_async_verify_endpoint_returns_202(db):
+    pytest.importorskip("fastapi")
+    from verifier.app import main as verifier_main
+    from verifier.app.database import get_db
+
+    async def override_db():
+        yield db
+
+    verifier_main.app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=verifier_main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://verifier") as client:
+            response = await client.post("/verify/async", json={
+                "input_type": "text", "raw_input": "5G causes COVID", "user_id": "alice",
+            })
+            assert response.status_code == 202
+            claim_id = response.json()["claim_id"]
+
+            details = (await client.get(f"/claims/{claim_id}")).json()
+            stats = (await client.get("/jobs/stats")).json()
+    finally:
+        verifier_main.app.dependency_overrides.clear()
+
+    assert details["status"] == "pending"
+    assert details["attempts"] == 0
+    assert details["verdict"] == {"label": None, "confidence": None, "explanation": None, "model_version": None}
+    assert stats["pending"] == 1
@@ -0,0 +1,55 @@
+"""
+Build the document-frequency table the evidence query planner ranks terms with
+
+Usage (inside the verifier container):
+    python -m app.build_query_df --corpus /data/wiki-index/docs.jsonl --out /models/query-df.json.gz
+    python -m app.build_query_df --from-db postgresql://app:app@db:5432/claims --out /models/query-df.json.gz
+
+The corpus is read as by app.fit_scoring_model (text lines or JSONL). Words
+and adjacent word pairs found in fewer than --min-df documents are left
+out; point QUERY_DF_PATH at the result and restart the verifier.
+"""
+import argparse
+import os
+from typing import Iterator
+
+from .fit_scoring_model import read_corpus, read_snippets_from_db
+from .query_planner import DocumentFrequencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the query planner's document-frequency table")
+    parser.add_argument("--corpus", action="append", default=[], help="text or JSONL corpus (repeatable)")
+    parser.add_argument("--from-db", nargs="?", const=os.getenv("DATABASE_URL", ""), metavar="DATABASE_URL",
+                        help="add stored evidence snippets from the claims database (default: $DATABASE_URL)")
+    parser.add_argument("--out", default="models/query-df.json.gz", help="table path (.json or .json.gz)")
+    parser.add_argument("--max-documents", type=int, default=1000000, help="count at most this many documents")
+    parser.add_argument("--min-df", type=int, default=3, help="drop terms in fewer documents")
+    parser.add_argument("--max-terms", type=int, default=2000000, help="keep the most frequent terms only")
+    args = parser.parse_args(argv)
+
+    if not args.corpus and not args.from_db:
+        parser.error("nothing to count: pass --corpus and/or --from-db")
+
+    def documents() -> Iterator[str]:
+        count = 0
+        for path in args.corpus:
+            for document in read_corpus(path):
+                if count >= args.max_documents:
+                    return
+                count += 1
+                yield document
+        if args.from_db and count < args.max_documents:
+            yield from read_snippets_from_db(args.from_db, args.max_documents - count)
+
+    table = DocumentFrequencies.build(documents(), min_df=args.min_df, max_terms=args.max_terms)
+    table.info["sources"] = [os.path.abspath(path) for path in args.corpus] + (["database"] if args.from_db else [])
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    table.save(args.out)
+    print(f"✅ Counted {len(table.df)} terms over {table.documents} documents -> {args.out}")
+    print(f"   Set QUERY_DF_PATH={args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,83 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg://app:app@db:5432/claims")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connection pool and timeouts (PostgreSQL only)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
+
+
+def engine_options(url: str) -> dict:
+    """
+    Engine keyword arguments for a database URL
+    """
+    if not url.startswith("postgresql"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+    }
+
+
+# psycopg 3 serves both the sync and the asyncio dialect, so the URL is unchanged
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+# Changes since the first release, for databases created before them:
+# create_all() only creates missing tables and db/init.sql only runs on an
+# empty volume. Each statement is a no-op once applied. PostgreSQL only.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS fingerprint TEXT",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS locked_at TIMESTAMPTZ",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ",
+    "ALTER TABLE claims ADD COLUMN IF NOT EXISTS last_error TEXT",
+    # The running status; only rebuilt (and revalidated) while it is missing
+    """
+    DO $$
+    BEGIN
+      IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'claims_status_check' AND position('running' IN pg_get_constraintdef(oid)) > 0
+      ) THEN
+        ALTER TABLE claims DROP CONSTRAINT IF EXISTS claims_status_check;
+        ALTER TABLE claims ADD CONSTRAINT claims_status_check
+          CHECK (status IN ('pending','running','done','error'));
+      END IF;
+    END $$
+    """,
+    "ALTER TABLE verdicts ADD COLUMN IF NOT EXISTS model_version TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_claims_queue ON claims(created_at) WHERE status = 'pending'",
+    "CREATE INDEX IF NOT EXISTS idx_claims_running ON claims(locked_at) WHERE status = 'running'",
+    "CREATE INDEX IF NOT EXISTS idx_claims_fingerprint ON claims(fingerprint, created_at DESC)",
+    # Made redundant by idx_claims_fingerprint
+    "DROP INDEX IF EXISTS ix_claims_fingerprint",
+]
+
+
+def upgrade_schema(conn) -> None:
+    """
+    Applies SCHEMA_UPGRADES on a (sync) connection; the verifier runs it at
+    startup, after create_all()
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in SCHEMA_UPGRADES:
+        conn.exec_driver_sql(statement)
+
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,100 @@
+"""
+Fit the evidence scoring vectorizer on a reference corpus
+
+Usage (inside the verifier container):
+    python -m app.fit_scoring_model --corpus corpus.txt --out /models
+    python -m app.fit_scoring_model --corpus /data/wiki-index/docs.jsonl --out /models
+    python -m app.fit_scoring_model --from-db postgresql://app:app@db:5432/claims --out /models
+
+The corpus is a text file with one document per line, or JSONL whose lines
+are objects ("extract", "snippet", "text" or "opening_text") or
+[title, extract] pairs as in the evidence service's offline index. The
+artifact is written as <out>/scoring-<version>.joblib; point
+SCORING_MODEL_PATH at it and restart the verifier.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Iterator, List
+
+from .scoring_tfidf import fit_scoring_model
+
+TEXT_FIELDS = ("extract", "snippet", "text", "opening_text")
+
+
+def read_corpus(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] not in "[{":
+                yield line
+                continue
+            try:
+                document = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            if isinstance(document, list):
+                yield " ".join(str(part) for part in document)
+            elif isinstance(document, dict):
+                yield next((document[field] for field in TEXT_FIELDS if document.get(field)), "")
+
+
+def read_snippets_from_db(database_url: str, limit: int) -> List[str]:
+    """
+    Distinct evidence snippets stored by past verifications
+    """
+    try:
+        import psycopg
+    except ImportError:
+        sys.exit("psycopg is required for --from-db (pip install 'psycopg[binary]')")
+
+    # Accept SQLAlchemy style URLs (postgresql+psycopg://...)
+    database_url = database_url.replace("postgresql+psycopg://", "postgresql://")
+    with psycopg.connect(database_url) as conn:
+        rows = conn.execute(
+            "SELECT DISTINCT snippet FROM evidence WHERE snippet IS NOT NULL LIMIT %s",
+            (limit,),
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the evidence scoring vectorizer")
+    parser.add_argument("--corpus", action="append", default=[], help="text or JSONL corpus (repeatable)")
+    parser.add_argument("--from-db", nargs="?", const=os.getenv("DATABASE_URL", ""), metavar="DATABASE_URL",
+                        help="add stored evidence snippets from the claims database (default: $DATABASE_URL)")
+    parser.add_argument("--out", default="models", help="directory for the artifact")
+    parser.add_argument("--max-documents", type=int, default=500000, help="fit on at most this many documents")
+    parser.add_argument("--max-features", type=int, default=100000)
+    parser.add_argument("--min-df", type=int, default=2, help="ignore terms in fewer documents")
+    args = parser.parse_args(argv)
+
+    if not args.corpus and not args.from_db:
+        parser.error("nothing to fit on: pass --corpus and/or --from-db")
+
+    documents: List[str] = []
+    for path in args.corpus:
+        for document in read_corpus(path):
+            if len(documents) >= args.max_documents:
+                break
+            documents.append(document)
+    if args.from_db and len(documents) < args.max_documents:
+        documents.extend(read_snippets_from_db(args.from_db, args.max_documents - len(documents)))
+
+    model = fit_scoring_model(documents, max_features=args.max_features, min_df=args.min_df)
+    model.info["sources"] = [os.path.abspath(path) for path in args.corpus] + (["database"] if args.from_db else [])
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"scoring-{model.version}.joblib")
+    model.save(path)
+    print(f"✅ Fitted scoring model {model.version} on {model.info['documents']} documents "
+          f"({model.info['features']} features) -> {path}")
+    print(f"   Set SCORING_MODEL_PATH={path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
-from fastapi import FastAPI, HTTPException, Depends
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Literal
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+import json
+import os
+import time
+import uuid
+from shared.http_cache import etag_matches, strong_etag
+from shared.metrics import MetricsMiddleware, metrics_response
+from shared.tracing import TracingMiddleware
 from .database import get_db
 from .pipeline import VerificationPipeline
 from .models import Base
-from .database import engine
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+from .database import engine, upgrade_schema
+from .metrics import REGISTRY, REQUEST_SECONDS, track_db_pool, track_nlp_queue
+from .nlp import (
+    SCORER_BACKEND, SCORER_WARMUP, NLPQueueFull, nlp_executor, scoring_batcher, scoring_stats, warm_up_scorer
+)
+from .query_planner import load_query_planner, query_planner_stats
+from .timings import stage_timings
+from .tracing import provider as trace_provider, tracer, trace_db_transactions
+from .worker import JOB_WORKERS, job_pool, queue_depth
+from .wiki_client import wiki_client
 
 app = FastAPI(
     title="Claim-Checker Verifier",
@@ -16,6 +30,22 @@ app = FastAPI(
     version="1.0.0"
 )
 
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_SECONDS)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+track_db_pool(engine)
+track_nlp_queue(nlp_executor)
+trace_db_transactions(engine)
+
+
+MAX_LOOKUP_IDS = 100
+VERIFY_BATCH_MAX_CLAIMS = int(os.getenv("VERIFY_BATCH_MAX_CLAIMS", "100"))
+
+# Keep proxies from buffering streamed progress events
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Finished claims never change, so clients and the gateway may keep them
+CLAIM_CACHE_MAX_AGE = int(os.getenv("CLAIM_CACHE_MAX_AGE", "31536000"))
+
 
 class VerifyRequest(BaseModel):
     input_type: Literal["text", "url"]
@@ -23,6 +53,72 @@ class VerifyRequest(BaseModel):
     user_id: str
 
 
+class BatchClaim(BaseModel):
+    input_type: Literal["text", "url"]
+    raw_input: str
+
+
+class VerifyBatchRequest(BaseModel):
+    claims: List[BatchClaim] = Field(..., min_length=1, max_length=VERIFY_BATCH_MAX_CLAIMS)
+    user_id: str
+
+
+class LookupRequest(BaseModel):
+    claim_ids: List[str] = Field(..., min_length=1, max_length=MAX_LOOKUP_IDS)
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, default=str) + "\n"
+
+
+def _canonical_id(claim_id: str) -> Optional[str]:
+    try:
+        return str(uuid.UUID(claim_id))
+    except ValueError:
+        return None
+
+
+@app.on_event("startup")
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+
+@app.on_event("startup")
+async def load_model():
+    model = None
+    if SCORER_WARMUP:
+        started = time.perf_counter()
+        scorer = warm_up_scorer()
+        model = getattr(scorer, "model", None)
+        print(f"Scoring with {scorer.name} ({scorer.version}), warmed up in {time.perf_counter() - started:.2f}s")
+    else:
+        print(f"Scoring with {SCORER_BACKEND}, loaded on first use")
+    planner = load_query_planner(scoring_model=model)
+    if planner.frequencies.documents:
+        print(f"Planning evidence queries with {planner.frequencies.documents} documents of term frequencies")
+
+
+@app.on_event("startup")
+async def start_workers():
+    if JOB_WORKERS > 0:
+        job_pool.start()
+
+
+@app.on_event("shutdown")
+async def dispose_engine():
+    await job_pool.stop()
+    nlp_executor.shutdown()
+    await wiki_client.close()
+    await engine.dispose()
+    trace_provider.shutdown()
+
+
 @app.get("/")
 async def root():
     return {"message": "Claim-Checker Verifier Service"}
@@ -34,7 +130,7 @@ async def health_check():
 
 
 @app.post("/verify")
-async def verify_claim(request: VerifyRequest, db: Session = Depends(get_db)):
+async def verify_claim(request: VerifyRequest, db: AsyncSession = Depends(get_db)):
     """
     Verify a claim using the verification pipeline
     """
@@ -46,22 +142,172 @@ async def verify_claim(request: VerifyRequest, db: Session = Depends(get_db)):
             user_id=request.user_id
         )
         return result
+    except NLPQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Verification failed: {str(e)}")
 
 
+@app.post("/verify/stream")
+async def verify_claim_stream(request: VerifyRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Verify a claim, streaming an event as each pipeline stage completes
+
+    Server-Sent Events if the client accepts text/event-stream, NDJSON otherwise.
+    """
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    pipeline = VerificationPipeline(db)
+    events = pipeline.stream_pipeline(
+        input_type=request.input_type,
+        raw_input=request.raw_input,
+        user_id=request.user_id
+    )
+    # The first step admits the claim (or finds the NLP queue full) before any response is sent
+    try:
+        first = await events.__anext__()
+    except NLPQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    async def body():
+        try:
+            yield _sse(first) if sse else _ndjson(first)
+            async for event in events:
+                yield _sse(event) if sse else _ndjson(event)
+        finally:
+            # Releases the admitted claim when the client goes away mid-stream
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers=STREAM_HEADERS
+    )
+
+
+@app.post("/verify/async", status_code=202)
+async def verify_claim_async(request: VerifyRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Queue a claim for the worker pool; poll GET /claims/{claim_id} for the result
+    """
+    try:
+        pipeline = VerificationPipeline(db)
+        result = await pipeline.enqueue(
+            input_type=request.input_type,
+            raw_input=request.raw_input,
+            user_id=request.user_id
+        )
+        job_pool.notify()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not queue claim: {str(e)}")
+
+
+@app.get("/jobs/stats")
+async def job_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Worker pool counters and queue depth
+    """
+    return {**job_pool.stats(), **await queue_depth(db)}
+
+
+@app.get("/scoring/stats")
+async def get_scoring_stats():
+    """
+    Scoring model version, snippet vector cache, NLP executor, scoring batch
+    and query planner counters
+    """
+    return {
+        **scoring_stats(),
+        "executor": nlp_executor.stats(),
+        "batcher": scoring_batcher.stats(),
+        "query_planner": query_planner_stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics
+    """
+    return metrics_response(REGISTRY)
+
+
+@app.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """
+    Recent duration percentiles of each pipeline stage of single verifications
+    """
+    return stage_timings.stats()
+
+
+@app.delete("/pipeline/stats", status_code=204)
+async def reset_pipeline_stats():
+    """
+    Start the stage percentiles afresh, e.g. after a benchmark's warm-up
+    """
+    stage_timings.reset()
+
+
+@app.post("/verify/batch")
+async def verify_batch(request: VerifyBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Verify many claims in one request
+
+    Results are returned in request order; a claim that could not be
+    verified has an "error" instead of a verdict.
+    """
+    try:
+        pipeline = VerificationPipeline(db)
+        results = await pipeline.run_batch(
+            [claim.model_dump() for claim in request.claims],
+            user_id=request.user_id
+        )
+        return {"results": results}
+    except NLPQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch verification failed: {str(e)}")
+
+
 @app.get("/claims/{claim_id}")
-async def get_claim(claim_id: str, db: Session = Depends(get_db)):
+async def get_claim(claim_id: str, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Get claim details by ID
+
+    Finished claims carry a strong ETag and a long Cache-Control, and a
+    matching If-None-Match gets 304. Unfinished claims are never cached.
     """
     try:
         pipeline = VerificationPipeline(db)
-        result = pipeline.get_claim_details(claim_id)
+        result = await pipeline.get_claim_details(claim_id)
         if result is None:
             raise HTTPException(status_code=404, detail="Claim not found")
-        return result
+        if result["status"] != "done":
+            return JSONResponse(result, headers={"Cache-Control": "no-store"})
+
+        body = json.dumps(result, sort_keys=True, separators=(",", ":")).encode()
+        headers = {"ETag": strong_etag(body), "Cache-Control": f"private, max-age={CLAIM_CACHE_MAX_AGE}, immutable"}
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving claim: {str(e)}")
+
+
+@app.post("/claims/lookup")
+async def lookup_claims(request: LookupRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Get details of many claims with a single query
+
+    Unknown or malformed IDs are listed under "missing".
+    """
+    try:
+        pipeline = VerificationPipeline(db)
+        claims = await pipeline.get_claims_details(request.claim_ids)
+        found = {claim["claim_id"] for claim in claims}
+        missing = [claim_id for claim_id in request.claim_ids if _canonical_id(claim_id) not in found]
+        return {"claims": claims, "missing": missing}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving claims: {str(e)}")
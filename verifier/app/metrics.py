@@ -0,0 +1,44 @@
+"""
+Prometheus metrics of the verifier, served at GET /metrics
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+from shared.metrics import request_histogram, service_registry
+
+REGISTRY = service_registry()
+REQUEST_SECONDS = request_histogram(REGISTRY)
+PIPELINE_STAGE_SECONDS = Histogram(
+    "verifier_pipeline_stage_seconds", "Duration of each stage of a single verification", ["stage"], registry=REGISTRY
+)
+EVIDENCE_REQUEST_SECONDS = Histogram(
+    "verifier_evidence_request_seconds", "Latency of calls to the evidence service", ["call"], registry=REGISTRY
+)
+EVIDENCE_REQUESTS = Counter(
+    "verifier_evidence_requests", "Calls to the evidence service", ["call", "outcome"], registry=REGISTRY
+)
+VERDICTS = Counter(
+    "verifier_verdicts", "Verdicts returned, by label and whether reused from the verdict cache",
+    ["label", "cached"], registry=REGISTRY
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "verifier_db_pool_connections", "Database pool connections by state", ["state"], registry=REGISTRY
+)
+NLP_QUEUE_DEPTH = Gauge("verifier_nlp_queue_depth", "Claims of admitted verifications not finished yet", registry=REGISTRY)
+
+
+def track_db_pool(engine) -> None:
+    """
+    Report the connection pool of an (async) engine; pools without a fixed
+    size (NullPool, StaticPool) report nothing
+    """
+    pool = engine.sync_engine.pool if hasattr(engine, "sync_engine") else engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL_CONNECTIONS.labels("checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels("idle").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels("overflow").set_function(lambda: max(pool.overflow(), 0))
+    DB_POOL_CONNECTIONS.labels("size").set_function(pool.size)
+
+
+def track_nlp_queue(executor) -> None:
+    NLP_QUEUE_DEPTH.set_function(lambda: executor.claims)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Float, DateTime, Text, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Float, Integer, DateTime, Text, ForeignKey, CheckConstraint
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -14,9 +15,19 @@ class Claim(Base):
     user_id = Column(Text)
     input_type = Column(String, CheckConstraint("input_type IN ('text','url')"), nullable=False)
     raw_input = Column(Text, nullable=False)
-    status = Column(String, CheckConstraint("status IN ('pending','done','error')"), default="pending")
+    status = Column(String, CheckConstraint("status IN ('pending','running','done','error')"), default="pending")
+    fingerprint = Column(String(64))  # sha256 of the normalized claim text (indexed in init.sql)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    locked_at = Column(DateTime(timezone=True))  # when a worker (or request) started on it
+    next_attempt_at = Column(DateTime(timezone=True))  # retry backoff for pending claims
+    last_error = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    evidence = relationship(
+        "Evidence", back_populates="claim", order_by="Evidence.score.desc()", passive_deletes=True
+    )
+    verdict = relationship("Verdict", back_populates="claim", uselist=False, passive_deletes=True)
+
 
 class Evidence(Base):
     __tablename__ = "evidence"
@@ -30,6 +41,8 @@ class Evidence(Base):
     score = Column(Float)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    claim = relationship("Claim", back_populates="evidence")
+
 
 class Verdict(Base):
     __tablename__ = "verdicts"
@@ -39,4 +52,7 @@ class Verdict(Base):
     label = Column(String, CheckConstraint("label IN ('support','contradict','insufficient')"), nullable=False)
     confidence = Column(Float, nullable=False)
     explanation = Column(Text)
+    model_version = Column(String)  # scoring model the evidence was scored with
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    claim = relationship("Claim", back_populates="verdict")
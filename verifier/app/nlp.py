@@ -1,8 +1,34 @@
+import asyncio
+import functools
+import hashlib
+import importlib
+import os
 import re
-from typing import List, Set
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+import threading
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from shared.stats import percentile
+
+# Evidence scorer: a name from SCORER_BACKENDS. Backends are imported when
+# first used; with SCORER_WARMUP the service does that at startup instead.
+SCORER_BACKEND = os.getenv("SCORER_BACKEND", "tfidf")
+SCORER_WARMUP = os.getenv("SCORER_WARMUP", "true").lower() in ("1", "true", "yes")
+# Model version recorded for TF-IDF verdicts scored without a fitted artifact
+PER_REQUEST_MODEL_VERSION = "tfidf-per-request"
+
+# Where scoring runs: "thread" or "process" pool, or "inline" on the event loop
+NLP_EXECUTOR = os.getenv("NLP_EXECUTOR", "thread")
+NLP_EXECUTOR_WORKERS = int(os.getenv("NLP_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Jobs queued or running in the executor before new verifications are rejected
+NLP_QUEUE_MAX = int(os.getenv("NLP_QUEUE_MAX", "64"))
+# Scoring jobs of concurrent verifications wait up to this long for others to
+# share one scoring pass with, or until this many claims are waiting (0 or 1: off)
+SCORING_BATCH_MAX_WAIT_MS = float(os.getenv("SCORING_BATCH_MAX_WAIT_MS", "2"))
+SCORING_BATCH_MAX_CLAIMS = int(os.getenv("SCORING_BATCH_MAX_CLAIMS", "32"))
+# Upper bounds of the batch size histogram in ScoringBatcher.stats()
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
 
 
 def simple_keywords(text: str) -> List[str]:
@@ -38,33 +64,164 @@ def simple_keywords(text: str) -> List[str]:
     return unique_keywords[:10]  # Limit to top 10 keywords
 
 
+def normalize_claim(text: str) -> str:
+    """
+    Normalize claim text for matching: lowercase, no punctuation, single spaces
+    """
+    return " ".join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+
+def claim_fingerprint(text: str, input_type: str = "text") -> str:
+    """
+    SHA-256 fingerprint of a claim, identical for claims that differ only in
+    case, whitespace or punctuation. URLs keep their punctuation.
+    """
+    if input_type == "url":
+        normalized = text.strip().lower()
+    else:
+        normalized = normalize_claim(text)
+    return hashlib.sha256(f"{input_type}:{normalized}".encode("utf-8")).hexdigest()
+
+
+class JaccardScorer:
+    """
+    Keyword overlap (Jaccard similarity) of claim and snippet. Needs no
+    third-party packages and nothing to load.
+    """
+    name = "jaccard"
+    version = "jaccard"
+    # Scores of a claim do not depend on the other claims scored with it
+    batch_invariant = True
+
+    def similarity(self, text1: str, text2: str) -> float:
+        if not text1.strip() or not text2.strip():
+            return 0.0
+        return self._jaccard(set(simple_keywords(text1)), text2)
+
+    def scores(self, claim: str, snippets: List[str]) -> List[float]:
+        keywords = set(simple_keywords(claim))
+        return [self._jaccard(keywords, snippet or "") for snippet in snippets]
+
+    def batch_scores(self, claims: List[str], snippet_lists: List[List[str]]) -> List[List[float]]:
+        return [self.scores(claim, snippets) for claim, snippets in zip(claims, snippet_lists)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    @staticmethod
+    def _jaccard(keywords: set, text: str) -> float:
+        other = set(simple_keywords(text))
+        if not keywords or not other:
+            return 0.0
+        return len(keywords & other) / len(keywords | other)
+
+
+# Scorer backends by name: a class, or "module:Class" imported on first use
+# (module names without a dot are looked up next to this module)
+SCORER_BACKENDS: Dict[str, Any] = {
+    "jaccard": JaccardScorer,
+    "tfidf": "scoring_tfidf:TfidfScorer",  # scikit-learn, numpy, scipy
+}
+
+_scorers: Dict[str, Any] = {}
+_scorers_lock = threading.Lock()
+
+
+def register_scorer_backend(name: str, backend: Any) -> None:
+    SCORER_BACKENDS[name] = backend
+    _scorers.pop(name, None)
+
+
+def _backend_class(backend: Any):
+    if not isinstance(backend, str):
+        return backend
+    module_name, class_name = backend.split(":")
+    if "." not in module_name and __package__:
+        module_name = f"{__package__}.{module_name}"
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_scorer(name: Optional[str] = None):
+    """
+    The scorer backend called name (SCORER_BACKEND by default), imported
+    and created on first use
+    """
+    name = name or SCORER_BACKEND
+    scorer = _scorers.get(name)
+    if scorer is None:
+        if name not in SCORER_BACKENDS:
+            raise ValueError(f"Unknown scorer backend {name!r} (available: {', '.join(sorted(SCORER_BACKENDS))})")
+        with _scorers_lock:
+            scorer = _scorers.get(name)
+            if scorer is None:
+                scorer = _scorers[name] = _backend_class(SCORER_BACKENDS[name])()
+    return scorer
+
+
+async def load_scorer(name: Optional[str] = None):
+    """
+    get_scorer() for code on the event loop: a backend that is not loaded
+    yet (SCORER_WARMUP=false) is imported and created in a thread, so
+    loading a model does not stall other requests
+    """
+    scorer = _scorers.get(name or SCORER_BACKEND)
+    if scorer is None:
+        scorer = await asyncio.to_thread(get_scorer, name)
+    return scorer
+
+
+def warm_up_scorer(name: Optional[str] = None):
+    """
+    Import and create the backend and score once, so the first request
+    does not pay for loading it
+    """
+    scorer = get_scorer(name)
+    scorer.batch_scores(["warm up the scorer"], [["the scorer is warmed up"]])
+    return scorer
+
+
+def scoring_model_version() -> str:
+    return get_scorer().version
+
+
+async def current_model_version() -> str:
+    """
+    scoring_model_version() for code on the event loop
+    """
+    return (await load_scorer()).version
+
+
+def scoring_stats() -> Dict[str, Any]:
+    """
+    Backend name and, once it is loaded, its model version and counters
+    """
+    scorer = _scorers.get(SCORER_BACKEND)
+    if scorer is None:
+        return {"backend": SCORER_BACKEND, "loaded": False}
+    return {"backend": SCORER_BACKEND, "loaded": True, "model_version": scorer.version, **scorer.stats()}
+
+
 def similarity_score(text1: str, text2: str) -> float:
     """
-    Calculate similarity between two texts using TF-IDF and cosine similarity
+    Similarity of two texts with the configured backend
     """
-    if not text1.strip() or not text2.strip():
-        return 0.0
-    
-    try:
-        # Create TF-IDF vectorizer
-        vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words='english',
-            ngram_range=(1, 2),
-            max_features=1000
-        )
-        
-        # Fit and transform the texts
-        tfidf_matrix = vectorizer.fit_transform([text1, text2])
-        
-        # Calculate cosine similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        
-        return float(similarity)
-        
-    except Exception as e:
-        print(f"Error calculating similarity: {e}")
-        return 0.0
+    return get_scorer().similarity(text1, text2)
+
+
+def similarity_scores(claim: str, snippets: List[str]) -> List[float]:
+    """
+    Score one claim against many snippets in one backend call
+    """
+    if not snippets:
+        return []
+    return get_scorer().scores(claim, snippets)
+
+
+def batch_similarity_scores(claims: List[str], snippet_lists: List[List[str]]) -> List[List[float]]:
+    """
+    Score many claims against their own snippets in one backend call
+    """
+    return get_scorer().batch_scores(claims, snippet_lists)
 
 
 def detect_refutation_terms(text: str) -> bool:
@@ -87,3 +244,218 @@ def detect_refutation_terms(text: str) -> bool:
             return True
     
     return False
+
+
+def analyze_evidence(claims: List[str], snippet_lists: List[List[str]]) -> List[List[Tuple[float, bool]]]:
+    """
+    The CPU-bound part of verification for many claims in one call: the
+    similarity score of every snippet to its claim and whether the snippet
+    contains refutation terms. One executor job per claim or batch, so a
+    process pool pays one round trip for all of it.
+    """
+    scores = get_scorer().batch_scores(claims, snippet_lists)
+    return [
+        [(score, detect_refutation_terms(snippet or "")) for score, snippet in zip(claim_scores, snippets)]
+        for claim_scores, snippets in zip(scores, snippet_lists)
+    ]
+
+
+class NLPQueueFull(Exception):
+    """
+    NLP_QUEUE_MAX verifications are already admitted and not finished
+    """
+
+
+class NLPExecutor:
+    """
+    Runs NLP jobs off the event loop, so scoring one claim does not stall
+    every other request of the worker. Verifications are admitted when they
+    start (admit) and count until they finish or fail (release), including
+    while they wait for evidence; with max_queue claims admitted new ones
+    are rejected with NLPQueueFull instead of piling up on the executor,
+    while jobs of verifications already admitted always run. Claims are
+    counted rather than jobs, since one job may score a whole batch.
+    """
+
+    def __init__(self, kind: str = NLP_EXECUTOR, workers: int = NLP_EXECUTOR_WORKERS, max_queue: int = NLP_QUEUE_MAX):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown NLP executor {kind!r} (thread, process or inline)")
+        self.kind = kind
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        # Jobs queued or running, and claims of admitted verifications
+        self.depth = 0
+        self.claims = 0
+        self.counters = Counter()
+        self._pool: Optional[Executor] = None
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nlp")
+        return self._pool
+
+    def full(self) -> bool:
+        return self.claims >= self.max_queue
+
+    def admit(self, claims: int = 1) -> None:
+        """
+        Count the claims of a new verification, or reject it up front,
+        before anything is stored for it. Every admit() is paired with a
+        release() once the verification has finished or failed.
+        """
+        if self.full():
+            self.counters["rejected"] += 1
+            raise NLPQueueFull(f"NLP queue is full ({self.claims} claims)")
+        self.claims += claims
+        self.counters["admitted"] += claims
+        self.counters["max_claims"] = max(self.counters["max_claims"], self.claims)
+
+    def release(self, claims: int = 1) -> None:
+        self.claims -= claims
+
+    async def run(self, fn: Callable, *args) -> Any:
+        self.depth += 1
+        self.counters["submitted"] += 1
+        self.counters["max_depth"] = max(self.counters["max_depth"], self.depth)
+        try:
+            if self.kind == "inline":
+                result = fn(*args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor(), functools.partial(fn, *args))
+            self.counters["completed"] += 1
+            return result
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.depth -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "executor": self.kind,
+            "workers": self.workers,
+            "depth": self.depth,
+            "claims": self.claims,
+            "max_queue": self.max_queue,
+        }
+
+
+nlp_executor = NLPExecutor()
+
+
+class ScoringBatcher:
+    """
+    Coalesces the analyze_evidence() jobs of concurrent verifications into
+    one executor job, so the backend scores them in one vectorized pass.
+    The first job waits at most max_wait_ms for others to join; a batch is
+    sent as soon as max_claims claims are waiting.
+
+    Only backends whose scores do not depend on the other claims of a
+    batch (batch_invariant: jaccard, tfidf with a fitted model) are
+    batched; the per-request TF-IDF fit would make a verdict depend on
+    unrelated traffic, so its jobs are scored one by one.
+    """
+
+    def __init__(self, executor: Optional[NLPExecutor] = None, max_wait_ms: float = SCORING_BATCH_MAX_WAIT_MS,
+                 max_claims: int = SCORING_BATCH_MAX_CLAIMS):
+        self.executor = executor or nlp_executor
+        self.max_wait = max_wait_ms / 1000
+        self.max_claims = max_claims
+        self.counters = Counter()
+        self.batch_sizes = Counter()
+        # Seconds from queueing to sending of recent jobs
+        self.waits = deque(maxlen=1000)
+        self._pending: List[Tuple[List[str], List[List[str]], asyncio.Future, float]] = []
+        self._pending_claims = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    def enabled(self, scorer) -> bool:
+        return self.max_wait > 0 and self.max_claims > 1 and getattr(scorer, "batch_invariant", False)
+
+    async def analyze(self, claims: List[str], snippet_lists: List[List[str]]) -> List[List[Tuple[float, bool]]]:
+        """
+        analyze_evidence(claims, snippet_lists), batched with the jobs of
+        concurrent callers
+        """
+        if not claims:
+            return []
+        if not self.enabled(await load_scorer()):
+            self.counters["unbatched"] += 1
+            return await self.executor.run(analyze_evidence, claims, snippet_lists)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((claims, snippet_lists, future, loop.time()))
+        self._pending_claims += len(claims)
+        if self._pending_claims >= self.max_claims:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        jobs, self._pending, self._pending_claims = self._pending, [], 0
+        if jobs:
+            task = asyncio.ensure_future(self._score(jobs))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, jobs) -> None:
+        sent = asyncio.get_running_loop().time()
+        claims = [claim for job_claims, _, _, _ in jobs for claim in job_claims]
+        snippet_lists = [snippets for _, job_lists, _, _ in jobs for snippets in job_lists]
+        self.counters["batches"] += 1
+        self.counters["jobs"] += len(jobs)
+        self.counters["claims"] += len(claims)
+        self.batch_sizes[next((str(b) for b in BATCH_SIZE_BUCKETS if len(claims) <= b), "+Inf")] += 1
+        self.waits.extend(sent - queued for _, _, _, queued in jobs)
+        try:
+            results = await self.executor.run(analyze_evidence, claims, snippet_lists)
+        except Exception as e:
+            self.counters["failed"] += 1
+            for _, _, future, _ in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for job_claims, _, future, _ in jobs:
+            # A caller that gave up has a cancelled future
+            if not future.done():
+                future.set_result(results[offset:offset + len(job_claims)])
+            offset += len(job_claims)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.counters["batches"]
+        waits = [wait * 1000 for wait in self.waits]
+        return {
+            **self.counters,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_claims": self.max_claims,
+            "claims_per_batch": self.counters["claims"] / batches if batches else 0.0,
+            "batch_sizes": {
+                str(b): self.batch_sizes[str(b)] for b in (*BATCH_SIZE_BUCKETS, "+Inf")
+            },
+            "queue_wait_ms": {
+                "p50": percentile(waits, 50),
+                "p95": percentile(waits, 95),
+                "max": max(waits, default=0.0),
+            },
+        }
+
+
+scoring_batcher = ScoringBatcher()
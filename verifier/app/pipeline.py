@@ -1,110 +1,698 @@
-from typing import List, Dict, Any, Tuple
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Dict, Any, Optional, Set, Tuple
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload
+from .metrics import VERDICTS
 from .models import Claim, Evidence, Verdict
-from .nlp import simple_keywords, similarity_score, detect_refutation_terms
+from .nlp import (
+    nlp_executor, scoring_batcher, detect_refutation_terms, claim_fingerprint,
+    current_model_version, PER_REQUEST_MODEL_VERSION
+)
+from .query_planner import plan_queries
+from .timings import stage_timings
 from .wiki_client import wiki_client
+import asyncio
+import os
 import uuid
 
+# Evidence lookups per claim (planned by app.query_planner): results per
+# query, how many run at once, and how long (seconds) the whole fan-out may
+# take before partial results are used
+EVIDENCE_RESULTS_PER_KEYWORD = int(os.getenv("EVIDENCE_RESULTS_PER_KEYWORD", "3"))
+EVIDENCE_CONCURRENCY = int(os.getenv("EVIDENCE_CONCURRENCY", "3"))
+EVIDENCE_DEADLINE_SECONDS = float(os.getenv("EVIDENCE_DEADLINE_SECONDS", "15"))
+# Concurrent lookups for a whole batch (its queries are looked up once per batch)
+EVIDENCE_BATCH_CONCURRENCY = int(os.getenv("EVIDENCE_BATCH_CONCURRENCY", "10"))
+
+# Reuse the verdict of an identical claim verified within this many seconds (0 disables)
+VERDICT_CACHE_SECONDS = int(os.getenv("VERDICT_CACHE_SECONDS", "86400"))
+
+# Write a "running" claim row before verifying, so a claim whose request dies
+# is recovered by the worker pool. When false, a synchronous verification is
+# stored in a single transaction once it has finished.
+WRITE_PENDING_CLAIMS = os.getenv("WRITE_PENDING_CLAIMS", "true").lower() in ("1", "true", "yes")
+
+
+def merge_evidence(result_sets: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merge evidence lists, dropping pages already seen under another keyword
+    """
+    merged = []
+    seen = set()
+    for results in result_sets:
+        for ev in results:
+            key = (ev.get("url") or ev.get("title") or "").strip().lower()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(ev)
+    return merged
+
 
 class VerificationPipeline:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def run_pipeline(self, input_type: str, raw_input: str, user_id: str) -> Dict[str, Any]:
+    async def run_pipeline(
+        self,
+        input_type: str,
+        raw_input: str,
+        user_id: str,
+        write_pending: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Main pipeline for claim verification
+
+        With write_pending=False (default: WRITE_PENDING_CLAIMS) no "running"
+        row is written up front; the claim, its evidence and its verdict are
+        stored together in one transaction once the verdict is known.
         """
+        if write_pending is None:
+            write_pending = WRITE_PENDING_CLAIMS
+        claim = self._new_claim(input_type, raw_input, user_id)
+
+        # Step 0: Serve a recent verdict for the same claim without re-verifying
+        with stage_timings.time("cache_lookup"):
+            cached = await self._cached_result(claim)
+        if cached is not None:
+            return cached
+
+        # Scoring is the bottleneck: turn the claim away before storing anything
+        nlp_executor.admit()
+
+        claim_written = False
         try:
             # Step 1: Create claim record
-            claim = Claim(
-                user_id=user_id,
-                input_type=input_type,
-                raw_input=raw_input,
-                status="pending"
-            )
-            self.db.add(claim)
-            self.db.commit()
-            self.db.refresh(claim)
-
-            # Step 2: Extract keywords
-            keywords = simple_keywords(raw_input)
-            
-            # Step 3: Fetch evidence
-            evidence_list = []
-            for keyword in keywords[:3]:  # Use top 3 keywords
-                evidence = await wiki_client.search_evidence(keyword, limit=3)
-                evidence_list.extend(evidence)
-
-            # Step 4: Score evidence
-            scored_evidence = []
-            for ev in evidence_list:
-                score = similarity_score(raw_input, ev.get("snippet", ""))
-                ev["score"] = score
-                scored_evidence.append(ev)
-
-            # Sort by score and take top 5
-            scored_evidence.sort(key=lambda x: x["score"], reverse=True)
-            top_evidence = scored_evidence[:5]
-
-            # Step 5: Generate verdict
-            verdict_label, confidence, explanation = self._generate_verdict(
-                raw_input, top_evidence
+            if write_pending:
+                with stage_timings.time("claim_insert"):
+                    await self.db.execute(insert(Claim).values(
+                        status="running", attempts=1, locked_at=datetime.now(timezone.utc), **claim
+                    ))
+                    await self.db.commit()
+                claim_written = True
+
+            return await self._verify(claim, claim_exists=claim_written)
+
+        except Exception as e:
+            await self._record_failure(claim, e, claim_exists=claim_written)
+            raise e
+        finally:
+            nlp_executor.release()
+
+    async def stream_pipeline(
+        self,
+        input_type: str,
+        raw_input: str,
+        user_id: str,
+        write_pending: Optional[bool] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the pipeline, yielding an event as each stage completes:
+
+        - {"event": "claim", "claim_id"} straight away
+        - {"event": "keywords", "keywords"} with the planned search queries
+        - {"event": "evidence", "keyword", "evidence"} per query as it
+          arrives, each item scored against the claim (provisional: the
+          final scores come from one fit over all evidence)
+        - {"event": "verdict", ...} with the same body as run_pipeline()
+        - {"event": "error", "detail"} instead of a verdict on failure
+
+        The verification is admitted before the first event, so a full NLP
+        queue raises NLPQueueFull from the first step of the iterator.
+        """
+        if write_pending is None:
+            write_pending = WRITE_PENDING_CLAIMS
+        claim = self._new_claim(input_type, raw_input, user_id)
+        nlp_executor.admit()
+
+        claim_written = False
+        try:
+            yield {"event": "claim", "claim_id": str(claim["id"])}
+
+            # Timed like run_pipeline(); the events are yielded outside the stages
+            with stage_timings.time("cache_lookup"):
+                cached = await self._cached_result(claim)
+            if cached is not None:
+                yield {"event": "verdict", **cached}
+                return
+
+            if write_pending:
+                with stage_timings.time("claim_insert"):
+                    await self.db.execute(insert(Claim).values(
+                        status="running", attempts=1, locked_at=datetime.now(timezone.utc), **claim
+                    ))
+                    await self.db.commit()
+                claim_written = True
+
+            with stage_timings.time("query_planning"):
+                keywords = plan_queries(raw_input)
+            yield {"event": "keywords", "keywords": keywords}
+
+            results = {}
+            async for keyword, evidence in self._timed_lookups(keywords):
+                results[keyword] = evidence
+                analysis = (await scoring_batcher.analyze(
+                    [raw_input], [[ev.get("snippet", "") for ev in evidence]]
+                ))[0]
+                yield {
+                    "event": "evidence",
+                    "keyword": keyword,
+                    "evidence": [dict(ev, score=score) for ev, (score, _) in zip(evidence, analysis)]
+                }
+
+            evidence_list = merge_evidence([results[keyword] for keyword in keywords if keyword in results])
+            result = await self._finish(claim, evidence_list, claim_exists=claim_written)
+            yield {"event": "verdict", **result}
+
+        except Exception as e:
+            await self._record_failure(claim, e, claim_exists=claim_written)
+            yield {"event": "error", "claim_id": str(claim["id"]), "detail": str(e)}
+        finally:
+            nlp_executor.release()
+
+    async def _record_failure(self, claim: Dict[str, Any], error: Exception, claim_exists: bool) -> None:
+        """
+        Record a claim whose verification failed as "error"
+        """
+        await self.db.rollback()
+        try:
+            if claim_exists:
+                await self.db.execute(
+                    update(Claim).where(Claim.id == claim["id"]).values(status="error", last_error=str(error))
+                )
+            else:
+                await self.db.execute(insert(Claim).values(status="error", last_error=str(error), **claim))
+            await self.db.commit()
+        except Exception as db_error:
+            print(f"Error recording failed claim {claim['id']}: {db_error}")
+            await self.db.rollback()
+
+    async def enqueue(self, input_type: str, raw_input: str, user_id: str) -> Dict[str, Any]:
+        """
+        Store a claim as "pending" for the worker pool and return at once
+        """
+        claim = self._new_claim(input_type, raw_input, user_id)
+        await self.db.execute(insert(Claim).values(status="pending", **claim))
+        await self.db.commit()
+        return {"claim_id": str(claim["id"]), "status": "pending"}
+
+    async def process_claim(self, claim: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Verify a claim that is already stored (a job taken by a worker).
+        Errors propagate so the caller can decide whether to retry.
+        """
+        cached = await self._cached_result(claim, claim_exists=True)
+        if cached is not None:
+            return cached
+        return await self._verify(claim, claim_exists=True)
+
+    def _new_claim(self, input_type: str, raw_input: str, user_id: str) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4(),  # generated here so no refresh() is needed
+            "user_id": user_id,
+            "input_type": input_type,
+            "raw_input": raw_input,
+            "fingerprint": claim_fingerprint(raw_input, input_type)
+        }
+
+    async def _cached_result(self, claim: Dict[str, Any], claim_exists: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Store and return the recent verdict of an identical claim, if any.
+        The copy keeps the time of the original verification, so serving
+        it does not extend the freshness window.
+        """
+        source_claim = await self._find_cached_verdict(claim["fingerprint"])
+        if source_claim is None:
+            return None
+        verdict = source_claim.verdict
+        model_version = verdict.model_version or PER_REQUEST_MODEL_VERSION
+        top_evidence = [self._evidence_payload(ev) for ev in source_claim.evidence]
+        await self._save_result(
+            claim, top_evidence, verdict.label, verdict.confidence, verdict.explanation,
+            model_version, claim_exists=claim_exists, verified_at=verdict.created_at
+        )
+        return self._result(
+            claim["id"], verdict.label, verdict.confidence, verdict.explanation, top_evidence,
+            model_version, cached_from=source_claim.id
+        )
+
+    async def _verify(self, claim: Dict[str, Any], claim_exists: bool) -> Dict[str, Any]:
+        # Step 2: Plan search queries
+        with stage_timings.time("query_planning"):
+            keywords = plan_queries(claim["raw_input"])
+
+        # Step 3: Fetch evidence
+        with stage_timings.time("evidence_lookup"):
+            evidence_list = await self._fetch_evidence(keywords)
+
+        return await self._finish(claim, evidence_list, claim_exists)
+
+    async def _finish(
+        self,
+        claim: Dict[str, Any],
+        evidence_list: List[Dict[str, Any]],
+        claim_exists: bool
+    ) -> Dict[str, Any]:
+        """
+        Score the evidence, decide the verdict and store the result
+        """
+        raw_input = claim["raw_input"]
+
+        # Step 4: Score evidence and scan it for refutations (batched with concurrent verifications)
+        model_version = await current_model_version()
+        with stage_timings.time("scoring"):
+            analysis = (await scoring_batcher.analyze(
+                [raw_input], [[ev.get("snippet", "") for ev in evidence_list]]
+            ))[0]
+
+        # Sort by score and take top 5
+        top_evidence, refuted = self._rank_evidence(evidence_list, analysis)
+
+        # Step 5: Generate verdict
+        verdict_label, confidence, explanation = self._generate_verdict(
+            raw_input, top_evidence, refuted
+        )
+
+        # Steps 6-8: Save evidence, verdict and claim status in one transaction
+        with stage_timings.time("store"):
+            await self._save_result(
+                claim, top_evidence, verdict_label, confidence, explanation,
+                model_version, claim_exists=claim_exists
             )
 
-            # Step 6: Save evidence
-            for ev in top_evidence:
-                evidence = Evidence(
-                    claim_id=claim.id,
-                    source=ev.get("source", "wikipedia"),
-                    url=ev.get("url"),
-                    title=ev.get("title"),
-                    snippet=ev.get("snippet"),
-                    score=ev.get("score", 0.0)
+        return self._result(claim["id"], verdict_label, confidence, explanation, top_evidence, model_version)
+
+    async def run_batch(self, items: List[Dict[str, str]], user_id: str) -> List[Dict[str, Any]]:
+        """
+        Verify many claims together; results come back in the order given.
+
+        Cached verdicts are found with one query, search queries are looked up once
+        for the whole batch, all claim/snippet pairs are scored in one
+        vectorized pass and everything is stored in one transaction. A claim
+        that fails gets an "error" entry (and an "error" row); the rest of
+        the batch is unaffected. No "pending" rows are written.
+        """
+        nlp_executor.admit(len(items))
+        try:
+            return await self._run_batch(items, user_id)
+        finally:
+            nlp_executor.release(len(items))
+
+    async def _run_batch(self, items: List[Dict[str, str]], user_id: str) -> List[Dict[str, Any]]:
+        claims = [self._new_claim(item["input_type"], item["raw_input"], user_id) for item in items]
+        # Cached verdicts only match the current model, so one version covers the batch
+        model_version = await current_model_version()
+        # label, confidence, explanation, evidence, source claim and its verification time if reused
+        verdicts: Dict[int, Tuple[str, float, str, List[Dict[str, Any]], Optional[uuid.UUID], Optional[datetime]]] = {}
+        errors: Dict[int, str] = {}
+
+        # Step 0: Recent verdicts, and claims repeated within the batch
+        cached = await self._find_cached_verdicts({claim["fingerprint"] for claim in claims})
+        first_of: Dict[str, int] = {}
+        repeats = []
+        for i, claim in enumerate(claims):
+            source_claim = cached.get(claim["fingerprint"])
+            if source_claim is not None:
+                verdict = source_claim.verdict
+                top_evidence = [self._evidence_payload(ev) for ev in source_claim.evidence]
+                verdicts[i] = (
+                    verdict.label, verdict.confidence, verdict.explanation, top_evidence,
+                    source_claim.id, verdict.created_at
                 )
-                self.db.add(evidence)
-
-            # Step 7: Save verdict
-            verdict = Verdict(
-                claim_id=claim.id,
-                label=verdict_label,
-                confidence=confidence,
-                explanation=explanation
+            elif claim["fingerprint"] in first_of:
+                repeats.append(i)
+            else:
+                first_of[claim["fingerprint"]] = i
+
+        # Step 1: Queries per claim, looked up once across the batch
+        keywords: Dict[int, List[str]] = {}
+        for i in first_of.values():
+            try:
+                keywords[i] = plan_queries(claims[i]["raw_input"])
+            except Exception as e:
+                errors[i] = f"Query planning failed: {e}"
+        lookups = await self._lookup_keywords(
+            list(dict.fromkeys(keyword for kws in keywords.values() for keyword in kws)),
+            EVIDENCE_BATCH_CONCURRENCY
+        )
+
+        # Step 2: Score every claim against its own evidence in one pass
+        order = list(keywords)
+        evidence_lists = [
+            [dict(ev) for ev in merge_evidence([lookups[kw] for kw in keywords[i] if kw in lookups])]
+            for i in order
+        ]
+        try:
+            analyses = await scoring_batcher.analyze(
+                [claims[i]["raw_input"] for i in order],
+                [[ev.get("snippet", "") for ev in evidence] for evidence in evidence_lists]
+            )
+        except Exception as e:
+            # Cached and repeated claims are still answered and stored
+            print(f"Error scoring batch of {len(order)} claims: {e}")
+            analyses = []
+            for i in order:
+                errors[i] = f"Scoring failed: {e}"
+
+        # Step 3: Verdicts
+        for i, evidence, analysis in zip(order, evidence_lists, analyses):
+            try:
+                top_evidence, refuted = self._rank_evidence(evidence, analysis)
+                label, confidence, explanation = self._generate_verdict(claims[i]["raw_input"], top_evidence, refuted)
+                verdicts[i] = (label, confidence, explanation, top_evidence, None, None)
+            except Exception as e:
+                errors[i] = f"Verification failed: {e}"
+
+        for i in repeats:
+            source = first_of[claims[i]["fingerprint"]]
+            if source in verdicts:
+                label, confidence, explanation, top_evidence, _, verified_at = verdicts[source]
+                verdicts[i] = (label, confidence, explanation, top_evidence, claims[source]["id"], verified_at)
+            else:
+                errors[i] = errors[source]
+
+        # Step 4: Save all claims, evidence and verdicts in one transaction
+        await self._save_batch(claims, verdicts, errors, model_version)
+
+        results = []
+        for i, claim in enumerate(claims):
+            if i in verdicts:
+                label, confidence, explanation, top_evidence, cached_from, _ = verdicts[i]
+                results.append(self._result(
+                    claim["id"], label, confidence, explanation, top_evidence, model_version, cached_from=cached_from
+                ))
+            else:
+                results.append({"claim_id": str(claim["id"]), "error": errors.get(i, "Verification failed")})
+        return results
+
+    async def _save_batch(
+        self,
+        claims: List[Dict[str, Any]],
+        verdicts: Dict[int, Tuple[str, float, str, List[Dict[str, Any]], Optional[uuid.UUID], Optional[datetime]]],
+        errors: Dict[int, str],
+        model_version: str
+    ) -> None:
+        """
+        Store a verified batch in one transaction with one multi-row INSERT
+        per table. Claims without a verdict are stored with status "error".
+        """
+        now = datetime.now(timezone.utc)
+        evidence_rows = []
+        verdict_rows = []
+        for i, claim in enumerate(claims):
+            if i not in verdicts:
+                continue
+            label, confidence, explanation, top_evidence, _, verified_at = verdicts[i]
+            evidence_rows.extend(self._evidence_rows(claim["id"], top_evidence))
+            verdict_rows.append({
+                "id": uuid.uuid4(),
+                "claim_id": claim["id"],
+                "label": label,
+                "confidence": confidence,
+                "explanation": explanation,
+                "model_version": model_version,
+                "created_at": verified_at or now
+            })
+
+        try:
+            await self.db.execute(insert(Claim).values([
+                dict(claim, status="done", last_error=None) if i in verdicts
+                else dict(claim, status="error", last_error=errors.get(i))
+                for i, claim in enumerate(claims)
+            ]))
+            if evidence_rows:
+                await self.db.execute(insert(Evidence).values(evidence_rows))
+            if verdict_rows:
+                await self.db.execute(insert(Verdict).values(verdict_rows))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    async def _save_result(
+        self,
+        claim: Dict[str, Any],
+        evidence: List[Dict[str, Any]],
+        label: str,
+        confidence: float,
+        explanation: str,
+        model_version: str,
+        claim_exists: bool = False,
+        verified_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Store a finished claim in one transaction: the claim row (or its
+        status update), one multi-row evidence INSERT and the verdict,
+        dated verified_at when it is copied from an earlier verification
+        """
+        if claim_exists:
+            await self.db.execute(
+                update(Claim).where(Claim.id == claim["id"]).values(status="done", locked_at=None, last_error=None)
             )
-            self.db.add(verdict)
-
-            # Step 8: Update claim status
-            claim.status = "done"
-            self.db.commit()
-
-            return {
-                "claim_id": str(claim.id),
-                "verdict": {
-                    "label": verdict_label,
-                    "confidence": confidence,
-                    "explanation": explanation
-                },
-                "top_evidence": [
-                    {
-                        "source": ev.get("source", "wikipedia"),
-                        "title": ev.get("title"),
-                        "url": ev.get("url"),
-                        "snippet": ev.get("snippet"),
-                        "score": ev.get("score", 0.0)
-                    }
-                    for ev in top_evidence
-                ]
+        else:
+            await self.db.execute(insert(Claim).values(status="done", **claim))
+
+        if evidence:
+            await self.db.execute(insert(Evidence).values(self._evidence_rows(claim["id"], evidence)))
+
+        await self.db.execute(insert(Verdict).values(
+            id=uuid.uuid4(),
+            claim_id=claim["id"],
+            label=label,
+            confidence=confidence,
+            explanation=explanation,
+            model_version=model_version,
+            created_at=verified_at or datetime.now(timezone.utc)
+        ))
+        await self.db.commit()
+
+    def _evidence_rows(self, claim_id: uuid.UUID, evidence: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": uuid.uuid4(),
+                "claim_id": claim_id,
+                "source": ev.get("source", "wikipedia"),
+                "url": ev.get("url"),
+                "title": ev.get("title"),
+                "snippet": ev.get("snippet"),
+                "score": ev.get("score", 0.0)
             }
+            for ev in evidence
+        ]
 
-        except Exception as e:
-            # Update claim status to error
-            if 'claim' in locals():
-                claim.status = "error"
-                self.db.commit()
-            raise e
+    def _result(
+        self,
+        claim_id: uuid.UUID,
+        label: str,
+        confidence: float,
+        explanation: str,
+        evidence: List[Dict[str, Any]],
+        model_version: str,
+        cached_from: Optional[uuid.UUID] = None
+    ) -> Dict[str, Any]:
+        result = {
+            "claim_id": str(claim_id),
+            "verdict": {
+                "label": label,
+                "confidence": confidence,
+                "explanation": explanation,
+                "model_version": model_version
+            },
+            "top_evidence": [
+                {
+                    "source": ev.get("source", "wikipedia"),
+                    "title": ev.get("title"),
+                    "url": ev.get("url"),
+                    "snippet": ev.get("snippet"),
+                    "score": ev.get("score", 0.0)
+                }
+                for ev in evidence
+            ],
+            "cached": cached_from is not None
+        }
+        if cached_from is not None:
+            result["cached_from"] = str(cached_from)
+        VERDICTS.labels(label, str(cached_from is not None).lower()).inc()
+        return result
+
+    async def _find_cached_verdict(self, fingerprint: str) -> Optional[Claim]:
+        """
+        Most recently verified finished claim with the same fingerprint
+        inside the freshness window and scored by the current model, loaded
+        with its verdict and evidence. The window counts from the original
+        verification (Verdict.created_at), which copies served from the
+        cache keep; of those, the original claim is returned.
+        """
+        if VERDICT_CACHE_SECONDS <= 0:
+            return None
 
-    def _generate_verdict(self, claim_text: str, evidence_list: List[Dict[str, Any]]) -> Tuple[str, float, str]:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=VERDICT_CACHE_SECONDS)
+        model_version = await current_model_version()
+        result = await self.db.execute(
+            select(Claim)
+            .join(Claim.verdict)
+            .options(contains_eager(Claim.verdict), joinedload(Claim.evidence))
+            .where(
+                Claim.fingerprint == fingerprint,
+                Claim.status == "done",
+                Verdict.created_at >= cutoff,
+                self._current_model(model_version)
+            )
+            .order_by(Verdict.created_at.desc(), Claim.created_at)
+            .limit(1)
+        )
+        return result.unique().scalars().first()
+
+    @staticmethod
+    def _current_model(model_version: str):
+        # Verdicts stored before model versions were recorded were scored per request
+        return func.coalesce(Verdict.model_version, PER_REQUEST_MODEL_VERSION) == model_version
+
+    async def _find_cached_verdicts(self, fingerprints: Set[str]) -> Dict[str, Claim]:
         """
-        Generate verdict based on evidence
+        Most recently verified finished claim per fingerprint inside the
+        freshness window and scored by the current model, with verdicts and
+        evidence, in one query (see _find_cached_verdict)
+        """
+        if VERDICT_CACHE_SECONDS <= 0 or not fingerprints:
+            return {}
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=VERDICT_CACHE_SECONDS)
+        model_version = await current_model_version()
+        ranked = (
+            select(
+                Claim.id,
+                func.row_number().over(
+                    partition_by=Claim.fingerprint, order_by=(Verdict.created_at.desc(), Claim.created_at)
+                ).label("rank")
+            )
+            .join(Claim.verdict)
+            .where(
+                Claim.fingerprint.in_(fingerprints),
+                Claim.status == "done",
+                Verdict.created_at >= cutoff,
+                self._current_model(model_version)
+            )
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(Claim)
+            .join(ranked, and_(Claim.id == ranked.c.id, ranked.c.rank == 1))
+            .join(Claim.verdict)
+            .options(contains_eager(Claim.verdict), joinedload(Claim.evidence))
+        )
+        return {claim.fingerprint: claim for claim in result.unique().scalars()}
+
+    async def _fetch_evidence(self, keywords: List[str]) -> List[Dict[str, Any]]:
+        """
+        Look up evidence for all keywords concurrently and merge the results.
+
+        Lookups that fail or are still running at the deadline are dropped;
+        whatever has arrived by then is used.
+        """
+        results = await self._lookup_keywords(keywords, EVIDENCE_CONCURRENCY)
+        return merge_evidence([results[keyword] for keyword in keywords if keyword in results])
+
+    async def _lookup_keywords(self, keywords: List[str], concurrency: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Evidence results per keyword, at most `concurrency` lookups at a time.
+        Keywords whose lookup failed or missed the deadline are left out.
+        """
+        return {keyword: results async for keyword, results in self._iter_lookups(keywords, concurrency)}
+
+    async def _timed_lookups(self, keywords: List[str]) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        _iter_lookups() for the stream: the lookups run in a task timed as
+        the evidence_lookup stage, so the time the caller spends between
+        results is not counted (and the stage span is not held open across
+        the caller's yields)
+        """
+        arrivals: asyncio.Queue = asyncio.Queue()
+
+        async def look_up() -> None:
+            try:
+                with stage_timings.time("evidence_lookup"):
+                    async for arrival in self._iter_lookups(keywords, EVIDENCE_CONCURRENCY):
+                        arrivals.put_nowait(arrival)
+            finally:
+                arrivals.put_nowait(None)
+
+        task = asyncio.create_task(look_up())
+        try:
+            while True:
+                arrival = await arrivals.get()
+                if arrival is None:
+                    break
+                yield arrival
+            await task  # raises if the lookups failed
+        finally:
+            task.cancel()
+
+    async def _iter_lookups(
+        self,
+        keywords: List[str],
+        concurrency: int
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield (keyword, results) as each lookup finishes, until all are done
+        or EVIDENCE_DEADLINE_SECONDS have passed
+        """
+        if not keywords:
+            return
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def lookup(keyword: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await wiki_client.search_evidence(keyword, limit=EVIDENCE_RESULTS_PER_KEYWORD)
+
+        tasks = [asyncio.create_task(lookup(keyword)) for keyword in keywords]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EVIDENCE_DEADLINE_SECONDS
+        pending = set(tasks)
+        try:
+            while pending and loop.time() < deadline:
+                done, pending = await asyncio.wait(
+                    pending, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for keyword, task in zip(keywords, tasks):  # keyword order within a wake-up
+                    if task not in done:
+                        continue
+                    if task.exception() is not None:
+                        print(f"Evidence lookup for '{keyword}' failed: {task.exception()}")
+                    else:
+                        yield keyword, task.result()
+            for keyword, task in zip(keywords, tasks):
+                if task in pending:
+                    print(f"Evidence lookup for '{keyword}' missed the deadline")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _rank_evidence(
+        evidence_list: List[Dict[str, Any]],
+        analysis: List[Tuple[float, bool]]
+    ) -> Tuple[List[Dict[str, Any]], List[bool]]:
+        """
+        Store the scores on the evidence and return the top 5 by score with
+        their refutation flags
+        """
+        for ev, (score, _) in zip(evidence_list, analysis):
+            ev["score"] = score
+        ranked = sorted(zip(evidence_list, analysis), key=lambda pair: pair[1][0], reverse=True)[:5]
+        return [ev for ev, _ in ranked], [refutes for _, (_, refutes) in ranked]
+
+    def _generate_verdict(
+        self,
+        claim_text: str,
+        evidence_list: List[Dict[str, Any]],
+        refuted: Optional[List[bool]] = None
+    ) -> Tuple[str, float, str]:
+        """
+        Generate verdict based on evidence; refuted holds the refutation
+        flags of the evidence when they were computed with the scores
         """
         if not evidence_list:
             return "insufficient", 0.0, "No evidence found to verify this claim."
@@ -114,11 +702,9 @@ class VerificationPipeline:
         avg_score = sum(scores) / len(scores) if scores else 0.0
 
         # Check for refutation terms in evidence
-        has_refutation = False
-        for ev in evidence_list:
-            if detect_refutation_terms(ev.get("snippet", "")):
-                has_refutation = True
-                break
+        if refuted is None:
+            refuted = [detect_refutation_terms(ev.get("snippet", "")) for ev in evidence_list]
+        has_refutation = any(refuted)
 
         # Determine verdict based on scores and refutation terms
         if avg_score > 0.3:  # Strong match threshold
@@ -129,35 +715,60 @@ class VerificationPipeline:
         else:
             return "insufficient", avg_score, "Insufficient evidence to determine the accuracy of this claim."
 
-    def get_claim_details(self, claim_id: str) -> Dict[str, Any]:
+    async def get_claim_details(self, claim_id: str) -> Dict[str, Any]:
         """
         Get detailed claim information including evidence and verdict
         """
-        claim = self.db.query(Claim).filter(Claim.id == claim_id).first()
-        if not claim:
-            return None
+        claims = await self.get_claims_details([claim_id])
+        return claims[0] if claims else None
+
+    async def get_claims_details(self, claim_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get details of many claims with one query, in the order requested.
 
-        evidence = self.db.query(Evidence).filter(Evidence.claim_id == claim.id).all()
-        verdict = self.db.query(Verdict).filter(Verdict.claim_id == claim.id).first()
+        Malformed and unknown IDs are left out.
+        """
+        ids = []
+        for claim_id in claim_ids:
+            try:
+                ids.append(uuid.UUID(str(claim_id)))
+            except ValueError:
+                continue
+        if not ids:
+            return []
+
+        result = await self.db.execute(
+            select(Claim)
+            .options(joinedload(Claim.verdict), joinedload(Claim.evidence))
+            .where(Claim.id.in_(ids))
+        )
+        claims = {claim.id: claim for claim in result.unique().scalars()}
+
+        return [self._claim_payload(claims[claim_id]) for claim_id in dict.fromkeys(ids) if claim_id in claims]
 
+    def _claim_payload(self, claim: Claim) -> Dict[str, Any]:
+        verdict = claim.verdict
         return {
             "claim_id": str(claim.id),
             "input_type": claim.input_type,
             "raw_input": claim.raw_input,
             "status": claim.status,
+            "attempts": claim.attempts,
+            "error": claim.last_error,
             "verdict": {
                 "label": verdict.label if verdict else None,
                 "confidence": verdict.confidence if verdict else None,
-                "explanation": verdict.explanation if verdict else None
+                "explanation": verdict.explanation if verdict else None,
+                "model_version": verdict.model_version if verdict else None
             },
-            "evidence": [
-                {
-                    "source": ev.source,
-                    "title": ev.title,
-                    "url": ev.url,
-                    "snippet": ev.snippet,
-                    "score": ev.score
-                }
-                for ev in evidence
-            ]
+            "evidence": [self._evidence_payload(ev) for ev in claim.evidence]
+        }
+
+    def _evidence_payload(self, ev: Evidence) -> Dict[str, Any]:
+        return {
+            "source": ev.source,
+            "title": ev.title,
+            "url": ev.url,
+            "snippet": ev.snippet,
+            "score": ev.score
         }
@@ -0,0 +1,304 @@
+"""
+Evidence query planning: one or two compound search queries per claim
+
+Terms of the claim are ranked by inverse document frequency from a
+precomputed table (python -m app.build_query_df), so rare, specific words
+are searched for and common ones ("causes", "technology") are left out.
+Named entities ("Great Wall of China", "COVID-19") and phrases the table
+knows ("climate change") are kept together as one unit. Without a table
+every word looks equally rare, so claims are searched for by their first
+content words instead, one query each.
+"""
+import gzip
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+# Document-frequency table written by app.build_query_df; without one, the
+# fitted scoring model's IDF weights are used if it is loaded
+QUERY_DF_PATH = os.getenv("QUERY_DF_PATH", "")
+# Compound queries per claim, and words per query
+EVIDENCE_QUERIES = int(os.getenv("EVIDENCE_QUERIES", "2"))
+QUERY_MAX_TERMS = int(os.getenv("QUERY_MAX_TERMS", "4"))
+# Words found in more than this share of documents are too common to search for
+QUERY_MAX_DF_RATIO = float(os.getenv("QUERY_MAX_DF_RATIO", "0.05"))
+# Single-keyword queries per claim when there is no table
+KEYWORD_QUERIES = 3
+# Adjacent words form a phrase when this share of the rarer word's documents has the pair
+PHRASE_MIN_COHESION = 0.3
+ENTITY_BONUS = 1.0
+DF_TABLE_FORMAT = 1
+
+TOKEN_RE = re.compile(r"\w+(?:[-']\w+)*")
+# Lowercase words allowed inside a name ("Bank of America", "Lord of the Rings")
+NAME_CONNECTORS = {"of", "the", "de", "la", "del", "von", "van"}
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below both but by
+can claim claims could did do does doing down during each false few for from further had has have having he
+her here hers him his how i if in into is it its itself just me more most my no nor not now of off on once
+only or other our ours out over own really said same say says she should so some such than that the their
+theirs them then there these they this those through to too true under until up us very was we were what
+when where which while who whom why will with would yes you your
+""".split())
+
+
+def words(text: str) -> List[str]:
+    """
+    Lowercase words of a text, as they are counted in the table
+    """
+    return re.findall(r"\w\w+", text.lower())
+
+
+class DocumentFrequencies:
+    """
+    Number of documents containing each word and each pair of adjacent
+    content words ("climate change") of a reference corpus
+    """
+
+    def __init__(self, documents: int, df: Dict[str, int], info: Optional[Dict[str, Any]] = None):
+        self.documents = documents
+        self.df = df
+        self.info = info or {}
+
+    @classmethod
+    def build(cls, texts: Iterable[str], min_df: int = 2, max_terms: int = 0) -> "DocumentFrequencies":
+        counts = Counter()
+        documents = 0
+        for text in texts:
+            documents += 1
+            tokens = words(text)
+            terms = {token for token in tokens if token not in STOP_WORDS}
+            terms.update(
+                f"{first} {second}" for first, second in zip(tokens, tokens[1:])
+                if first not in STOP_WORDS and second not in STOP_WORDS
+            )
+            counts.update(terms)
+        kept = [(term, count) for term, count in counts.most_common(max_terms or None) if count >= min_df]
+        return cls(documents, dict(kept), {"min_df": min_df})
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, documents: int) -> "DocumentFrequencies":
+        """
+        Invert the smoothed IDF of a fitted TfidfVectorizer,
+        idf = ln((1 + n) / (1 + df)) + 1
+        """
+        idf = vectorizer.idf_
+        dfs = [max(0, round((1 + documents) / math.exp(value - 1) - 1)) for value in idf]
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        return cls(documents, dict(zip(terms, dfs)), {"source": "scoring model"})
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentFrequencies":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("format") != DF_TABLE_FORMAT:
+            raise ValueError(f"Unsupported document-frequency table format: {table.get('format')}")
+        return cls(table["documents"], table["df"], table.get("info"))
+
+    def save(self, path: str) -> None:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            json.dump({"format": DF_TABLE_FORMAT, "documents": self.documents, "info": self.info, "df": self.df}, f)
+
+    def idf(self, term: str) -> float:
+        return math.log((self.documents + 1) / (self.df.get(term, 0) + 1)) + 1
+
+    def ratio(self, term: str) -> float:
+        return self.df.get(term, 0) / self.documents if self.documents else 0.0
+
+
+class Unit:
+    """
+    A word, phrase or name of the claim that is searched for as a whole
+    """
+
+    def __init__(self, text: str, position: int, entity: bool = False):
+        self.text = text
+        self.position = position
+        self.entity = entity
+        self.words = [word for word in words(text) if word not in STOP_WORDS]
+
+    def __repr__(self):
+        return f"Unit({self.text!r}, entity={self.entity})"
+
+
+def _is_name(token: str, first: bool) -> bool:
+    """
+    Capitalised, all caps or with digits ("Einstein", "NASA", "5G"). A
+    capitalised first word of the claim only counts as part of a longer name.
+    """
+    if token.lower() in STOP_WORDS:
+        return False
+    if any(c.isdigit() for c in token) and not token.isdigit():
+        return True
+    if any(c.isupper() for c in token[1:]):
+        return True
+    return token[0].isupper() and not first
+
+
+class QueryPlanner:
+    def __init__(self, frequencies: Optional[DocumentFrequencies] = None,
+                 max_df_ratio: float = QUERY_MAX_DF_RATIO):
+        self.frequencies = frequencies or DocumentFrequencies(0, {})
+        self.max_df_ratio = max_df_ratio
+        self.counters = Counter()
+
+    def units(self, text: str) -> List[Unit]:
+        """
+        Split a claim into names, phrases and single content words
+        """
+        tokens = [re.sub(r"'s$", "", token) for token in TOKEN_RE.findall(text)]
+        units: List[Unit] = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            # Names: runs of name-like tokens, possibly joined by "of", "the", ...
+            if _is_name(token, i == 0) or (
+                i == 0 and _is_name(token, False) and i + 1 < len(tokens) and _is_name(tokens[i + 1], False)
+            ):
+                end = i + 1
+                while end < len(tokens):
+                    # Numbers continue a name ("Apollo 11")
+                    if _is_name(tokens[end], False) or tokens[end].isdigit():
+                        end += 1
+                        continue
+                    connectors = end
+                    while connectors < len(tokens) and tokens[connectors] in NAME_CONNECTORS:
+                        connectors += 1
+                    if connectors > end and connectors < len(tokens) and _is_name(tokens[connectors], False):
+                        end = connectors + 1
+                        continue
+                    break
+                units.append(Unit(" ".join(tokens[i:end]), len(units), entity=True))
+                i = end
+                continue
+
+            lowered = token.lower()
+            if lowered in STOP_WORDS or len(lowered) < 2:
+                i += 1
+                continue
+            # Phrases: adjacent content words that mostly occur together
+            if i + 1 < len(tokens) and self._cohesive(lowered, tokens[i + 1].lower()):
+                units.append(Unit(f"{lowered} {tokens[i + 1].lower()}", len(units)))
+                i += 2
+                continue
+            units.append(Unit(lowered, len(units)))
+            i += 1
+        return units
+
+    def _cohesive(self, first: str, second: str) -> bool:
+        if second in STOP_WORDS:
+            return False
+        df = self.frequencies.df
+        together = df.get(f"{first} {second}", 0)
+        rarer = min(df.get(first, 0), df.get(second, 0))
+        return together > 0 and rarer > 0 and together / rarer >= PHRASE_MIN_COHESION
+
+    def weight(self, unit: Unit) -> float:
+        idf = max((self.frequencies.idf(word) for word in unit.words), default=0.0)
+        if len(unit.words) > 1:
+            idf = max(idf, self.frequencies.idf(" ".join(unit.words)))
+        return idf + (ENTITY_BONUS if unit.entity else 0.0)
+
+    def common(self, unit: Unit) -> bool:
+        """
+        Whether every word of the unit is in too many documents to narrow a search
+        """
+        return not unit.entity and all(self.frequencies.ratio(word) > self.max_df_ratio for word in unit.words)
+
+    def keywords(self, text: str, max_queries: int = KEYWORD_QUERIES) -> List[str]:
+        """
+        The first content words of a claim, one query each
+        """
+        keywords = [word for word in dict.fromkeys(words(text)) if word not in STOP_WORDS and len(word) > 2]
+        return keywords[:max_queries]
+
+    def plan(self, text: str, max_queries: int = EVIDENCE_QUERIES, max_terms: int = QUERY_MAX_TERMS) -> List[str]:
+        """
+        Compound queries for a claim, most specific first: the highest
+        ranked units in claim order, then the strongest name or phrase on
+        its own (its page is usually the best evidence). Without a table,
+        the claim's keywords.
+        """
+        if not self.frequencies.documents:
+            queries = self.keywords(text)
+            self.counters["claims"] += 1
+            self.counters["keyword_claims"] += 1
+            self.counters["queries"] += len(queries)
+            return queries
+
+        units = self.units(text)
+        ranked = sorted(units, key=lambda unit: (-self.weight(unit), unit.position))
+        specific = [unit for unit in ranked if not self.common(unit)] or ranked[:1]
+
+        chosen, terms = [], 0
+        for unit in specific:
+            if chosen and terms + len(unit.words) > max_terms:
+                continue
+            chosen.append(unit)
+            terms += len(unit.words)
+
+        queries = []
+        if chosen:
+            queries.append(" ".join(unit.text for unit in sorted(chosen, key=lambda unit: unit.position)))
+        lead = next((unit for unit in specific if unit.entity or len(unit.words) > 1), None)
+        if lead is not None and lead.text not in queries:
+            queries.append(lead.text)
+        else:
+            rest = [unit for unit in specific if unit not in chosen][:max_terms]
+            if rest:
+                queries.append(" ".join(unit.text for unit in sorted(rest, key=lambda unit: unit.position)))
+
+        queries = queries[:max(1, max_queries)]
+        self.counters["claims"] += 1
+        self.counters["queries"] += len(queries)
+        return queries
+
+    def stats(self) -> Dict[str, Any]:
+        claims = self.counters["claims"]
+        return {
+            **self.counters,
+            "queries_per_claim": self.counters["queries"] / claims if claims else 0.0,
+            "df_documents": self.frequencies.documents,
+            "df_terms": len(self.frequencies.df),
+        }
+
+
+_query_planner = QueryPlanner()
+
+
+def set_query_planner(planner: QueryPlanner) -> None:
+    global _query_planner
+    _query_planner = planner
+
+
+def load_query_planner(path: str = QUERY_DF_PATH, scoring_model=None) -> QueryPlanner:
+    """
+    Plan queries with the table at path, or with the IDF weights of the
+    fitted scoring model when no table is configured. With neither,
+    claims are searched for by keyword.
+    """
+    frequencies = None
+    if path:
+        frequencies = DocumentFrequencies.load(path)
+    elif scoring_model is not None and scoring_model.info.get("documents"):
+        frequencies = DocumentFrequencies.from_vectorizer(scoring_model.vectorizer, scoring_model.info["documents"])
+    else:
+        print(
+            "Warning: no document-frequency table (QUERY_DF_PATH) or fitted scoring model; "
+            f"searching for evidence with the first {KEYWORD_QUERIES} keywords of each claim"
+        )
+    set_query_planner(QueryPlanner(frequencies))
+    return _query_planner
+
+
+def plan_queries(text: str) -> List[str]:
+    return _query_planner.plan(text)
+
+
+def query_planner_stats() -> Dict[str, Any]:
+    return _query_planner.stats()
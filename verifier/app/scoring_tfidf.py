@@ -0,0 +1,380 @@
+"""
+TF-IDF scorer backend ("tfidf")
+
+Cosine similarity of TF-IDF vectors, with a vectorizer fitted per request
+or, with SCORING_MODEL_PATH, fitted offline by app.fit_scoring_model.
+Imports scikit-learn, numpy and scipy, so app.nlp only loads this module
+when the backend is first used.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix
+import joblib
+import numpy as np
+import sklearn
+
+try:  # verifier.app.scoring_tfidf, or scoring_tfidf next to nlp on sys.path
+    from .nlp import PER_REQUEST_MODEL_VERSION
+except ImportError:
+    from nlp import PER_REQUEST_MODEL_VERSION
+
+# Vectorizer artifact written by app.fit_scoring_model; unset to fit per request
+SCORING_MODEL_PATH = os.getenv("SCORING_MODEL_PATH", "")
+SCORING_MODEL_FORMAT = 1
+# Memory budget (bytes) for cached snippet vectors of the fitted model; 0 disables
+SNIPPET_VECTOR_CACHE_BYTES = int(os.getenv("SNIPPET_VECTOR_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Rough per-entry overhead of the cache bookkeeping, on top of the arrays
+SNIPPET_VECTOR_OVERHEAD_BYTES = 200
+
+
+class SnippetVectorCache:
+    """
+    LRU cache of TF-IDF rows of evidence snippets, keyed by a hash of the
+    snippet text and bounded by memory.
+
+    Rows are kept as compact (int32 column, float32 weight) arrays, so a
+    typical snippet costs a few hundred bytes. Safe to use from several
+    threads.
+    """
+
+    def __init__(self, max_bytes: int = SNIPPET_VECTOR_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.counters = Counter()
+        self._entries: "OrderedDict[bytes, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(snippet: str) -> bytes:
+        return hashlib.blake2b(snippet.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _size(row: Tuple[np.ndarray, np.ndarray]) -> int:
+        return row[0].nbytes + row[1].nbytes + SNIPPET_VECTOR_OVERHEAD_BYTES
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, Tuple[np.ndarray, np.ndarray]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._entries.get(key)
+                if row is None:
+                    self.counters["misses"] += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                found[key] = row
+        return found
+
+    def put_many(self, rows: Dict[bytes, Tuple[np.ndarray, np.ndarray]]) -> None:
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            for key, row in rows.items():
+                size = self._size(row)
+                if size > self.max_bytes:
+                    continue
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self.bytes -= self._size(previous)
+                self._entries[key] = row
+                self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= self._size(evicted)
+                self.counters["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+class ScoringModel:
+    """
+    TF-IDF vectorizer fitted offline on a reference corpus.
+
+    The vocabulary and IDF weights come from the corpus, so request-time
+    scoring only calls transform() and scores do not depend on which other
+    snippets happened to be scored alongside. The version is derived from
+    the vocabulary and weights, so it changes whenever the model does.
+    """
+
+    def __init__(
+        self,
+        vectorizer: TfidfVectorizer,
+        version: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+    ):
+        self.vectorizer = vectorizer
+        self.version = version or self._content_version(vectorizer)
+        self.info = info or {}
+        # Rows belong to this vocabulary, so the cache lives and dies with the model
+        self.snippet_cache = SnippetVectorCache()
+
+    @staticmethod
+    def _content_version(vectorizer: TfidfVectorizer) -> str:
+        digest = hashlib.sha256()
+        for term, column in sorted(vectorizer.vocabulary_.items()):
+            digest.update(f"{term}\t{column}\n".encode("utf-8"))
+        digest.update(np.asarray(vectorizer.idf_, dtype=np.float64).tobytes())
+        return f"tfidf-{digest.hexdigest()[:12]}"
+
+    def transform(self, texts: List[str]):
+        return self.vectorizer.transform(texts)
+
+    def transform_snippets(self, snippets: List[str]) -> csr_matrix:
+        """
+        transform() for evidence snippets: rows are served from the snippet
+        cache, and only snippets not seen before are vectorized (in one call)
+        """
+        keys = [SnippetVectorCache.key(snippet) for snippet in snippets]
+        rows = self.snippet_cache.get_many(list(dict.fromkeys(keys)))
+
+        missing = {key: snippet for key, snippet in zip(keys, snippets) if key not in rows}
+        if missing:
+            matrix = self.transform(list(missing.values())).tocsr()
+            fresh = {}
+            for i, key in enumerate(missing):
+                start, end = matrix.indptr[i], matrix.indptr[i + 1]
+                fresh[key] = (
+                    matrix.indices[start:end].astype(np.int32),
+                    matrix.data[start:end].astype(np.float32)
+                )
+            self.snippet_cache.put_many(fresh)
+            rows.update(fresh)
+
+        ordered = [rows[key] for key in keys]
+        lengths = [len(indices) for indices, _ in ordered]
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        indices = np.concatenate([indices for indices, _ in ordered]) if ordered else np.zeros(0, np.int32)
+        data = np.concatenate([data for _, data in ordered]) if ordered else np.zeros(0, np.float32)
+        return csr_matrix((data, indices, indptr), shape=(len(snippets), len(self.vectorizer.vocabulary_)))
+
+    def save(self, path: str) -> None:
+        joblib.dump({
+            "format": SCORING_MODEL_FORMAT,
+            "version": self.version,
+            "sklearn_version": sklearn.__version__,
+            "info": self.info,
+            "vectorizer": self.vectorizer,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ScoringModel":
+        """
+        Load an artifact written by save() (a pickle: only load trusted files)
+        """
+        artifact = joblib.load(path)
+        if artifact.get("format") != SCORING_MODEL_FORMAT:
+            raise ValueError(f"Unsupported scoring model format in {path}")
+        if artifact.get("sklearn_version") != sklearn.__version__:
+            print(f"Scoring model {path} was fitted with scikit-learn {artifact.get('sklearn_version')}, "
+                  f"running {sklearn.__version__}")
+        return cls(artifact["vectorizer"], artifact["version"], artifact.get("info"))
+
+
+def fit_scoring_model(
+    texts: Iterable[str],
+    max_features: int = 100000,
+    min_df: int = 2
+) -> ScoringModel:
+    """
+    Fit the scoring vectorizer on a reference corpus
+    """
+    documents = [text for text in texts if text and text.strip()]
+    vectorizer = TfidfVectorizer(
+        lowercase=True,
+        stop_words='english',
+        ngram_range=(1, 2),
+        max_features=max_features,
+        min_df=min(min_df, len(documents)),
+        dtype=np.float32
+    )
+    vectorizer.fit(documents)
+    return ScoringModel(vectorizer, info={
+        "documents": len(documents),
+        "features": len(vectorizer.vocabulary_),
+        "fitted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    })
+
+
+_scoring_model: Optional[ScoringModel] = None
+
+
+def set_scoring_model(model: Optional[ScoringModel]) -> None:
+    global _scoring_model
+    _scoring_model = model
+
+
+def load_scoring_model(path: str = SCORING_MODEL_PATH) -> Optional[ScoringModel]:
+    """
+    Load the artifact at path (SCORING_MODEL_PATH by default) for all later
+    scoring; without a path, scoring keeps fitting a vectorizer per request
+    """
+    set_scoring_model(ScoringModel.load(path) if path else None)
+    return _scoring_model
+
+
+def scoring_model_version() -> str:
+    return _scoring_model.version if _scoring_model is not None else PER_REQUEST_MODEL_VERSION
+
+
+def _vectorize(texts: List[str], snippets: List[str], max_features: int):
+    """
+    L2-normalised TF-IDF rows of the texts (claims) and of the snippets.
+
+    With a fitted model only the texts are vectorized on a warm path, the
+    snippets come from its cache; otherwise one vectorizer is fitted on all
+    of them together.
+    """
+    if _scoring_model is not None:
+        return _scoring_model.transform(texts), _scoring_model.transform_snippets(snippets)
+    vectorizer = TfidfVectorizer(
+        lowercase=True,
+        stop_words='english',
+        ngram_range=(1, 2),
+        max_features=max_features
+    )
+    tfidf_matrix = vectorizer.fit_transform(list(texts) + list(snippets))
+    return tfidf_matrix[:len(texts)], tfidf_matrix[len(texts):]
+
+
+def similarity_score(text1: str, text2: str) -> float:
+    """
+    Calculate similarity between two texts using TF-IDF and cosine similarity
+    """
+    if not text1.strip() or not text2.strip():
+        return 0.0
+    
+    try:
+        text_rows, snippet_rows = _vectorize([text1], [text2], max_features=1000)
+        
+        # Calculate cosine similarity
+        similarity = cosine_similarity(text_rows, snippet_rows)[0][0]
+        
+        return float(similarity)
+        
+    except Exception as e:
+        print(f"Error calculating similarity: {e}")
+        return 0.0
+
+
+def similarity_scores(claim: str, snippets: List[str]) -> List[float]:
+    """
+    Score one claim against many snippets with a single TF-IDF fit.
+
+    The claim and all snippets are vectorized together and the cosine
+    similarities come out of one sparse matrix product, instead of fitting
+    a new vectorizer for every (claim, snippet) pair.
+    """
+    if not snippets:
+        return []
+    if not claim.strip():
+        return [0.0] * len(snippets)
+
+    try:
+        claim_row, snippet_rows = _vectorize([claim], [s or "" for s in snippets], max_features=1000)
+
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        similarities = (snippet_rows @ claim_row.T).toarray().ravel()
+
+        return [float(score) for score in similarities]
+
+    except ValueError:
+        # Empty vocabulary (e.g. only stop words) - nothing can match
+        return [0.0] * len(snippets)
+    except Exception as e:
+        print(f"Error calculating similarity: {e}")
+        return [0.0] * len(snippets)
+
+
+def batch_similarity_scores(claims: List[str], snippet_lists: List[List[str]]) -> List[List[float]]:
+    """
+    Score many claims against their own snippets with a single TF-IDF fit.
+
+    The claims and the distinct snippets of the whole batch are vectorized
+    once and every claim/snippet similarity comes out of one sparse matrix
+    product. Without a fitted model, IDF weights are those of the batch, so
+    a score can differ slightly from similarity_scores() for the same claim
+    on its own; with one, the scores are identical.
+    """
+    empty = [[0.0] * len(snippets) for snippets in snippet_lists]
+    unique_snippets = list(dict.fromkeys(s or "" for snippets in snippet_lists for s in snippets))
+    if not claims or not unique_snippets:
+        return empty
+
+    try:
+        # Without a fitted model, the single-claim vocabulary budget per claim
+        claim_rows, snippet_rows = _vectorize(list(claims), unique_snippets, max_features=1000 * len(claims))
+        similarities = (claim_rows @ snippet_rows.T).toarray()
+
+        column = {snippet: i for i, snippet in enumerate(unique_snippets)}
+        return [
+            [float(similarities[row, column[s or ""]]) if claim.strip() else 0.0 for s in snippets]
+            for row, (claim, snippets) in enumerate(zip(claims, snippet_lists))
+        ]
+
+    except ValueError:
+        # Empty vocabulary (e.g. only stop words) - nothing can match
+        return empty
+    except Exception as e:
+        print(f"Error calculating similarity: {e}")
+        return empty
+
+
+class TfidfScorer:
+    """
+    Scorer backend over the functions above; loads SCORING_MODEL_PATH when
+    it is created, i.e. when the backend is first used
+    """
+    name = "tfidf"
+
+    def __init__(self, model_path: str = SCORING_MODEL_PATH):
+        if model_path:
+            load_scoring_model(model_path)
+
+    @property
+    def model(self) -> Optional[ScoringModel]:
+        return _scoring_model
+
+    @property
+    def version(self) -> str:
+        return scoring_model_version()
+
+    @property
+    def batch_invariant(self) -> bool:
+        # Without a fitted model the IDF weights are those of the batch
+        return _scoring_model is not None
+
+    def similarity(self, text1: str, text2: str) -> float:
+        return similarity_score(text1, text2)
+
+    def scores(self, claim: str, snippets: List[str]) -> List[float]:
+        return similarity_scores(claim, snippets)
+
+    def batch_scores(self, claims: List[str], snippet_lists: List[List[str]]) -> List[List[float]]:
+        return batch_similarity_scores(claims, snippet_lists)
+
+    def stats(self) -> Dict[str, Any]:
+        if _scoring_model is None:
+            return {}
+        return {"snippet_cache": _scoring_model.snippet_cache.stats()}
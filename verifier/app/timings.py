@@ -0,0 +1,66 @@
+"""
+Durations of the verification pipeline's stages
+
+Each stage keeps its most recent PIPELINE_TIMINGS_WINDOW durations, so
+GET /pipeline/stats can report percentiles without keeping every sample;
+every duration is also observed by the Prometheus stage histogram, and each
+stage is a span ("pipeline evidence_lookup") in the request's trace.
+"""
+import os
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator
+
+from shared.stats import percentile
+
+from .metrics import PIPELINE_STAGE_SECONDS
+from .tracing import tracer
+
+PIPELINE_TIMINGS_WINDOW = int(os.getenv("PIPELINE_TIMINGS_WINDOW", "10000"))
+
+
+class StageTimings:
+    def __init__(self, window: int = PIPELINE_TIMINGS_WINDOW):
+        self.window = window
+        self.counts = Counter()
+        self.samples: Dict[str, Deque[float]] = {}
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            with tracer.start_as_current_span(f"pipeline {stage}"):
+                yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage: str, seconds: float) -> None:
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen=self.window)
+        self.samples[stage].append(seconds)
+        self.counts[stage] += 1
+        PIPELINE_STAGE_SECONDS.labels(stage).observe(seconds)
+
+    def reset(self) -> None:
+        """
+        Forget the recorded durations (the Prometheus histogram keeps them)
+        """
+        self.counts.clear()
+        self.samples.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for stage, samples in self.samples.items():
+            ms = [seconds * 1000 for seconds in samples]
+            stats[stage] = {
+                "count": self.counts[stage],
+                "p50_ms": percentile(ms, 50),
+                "p95_ms": percentile(ms, 95),
+                "p99_ms": percentile(ms, 99),
+                "max_ms": max(ms),
+            }
+        return stats
+
+
+stage_timings = StageTimings()
@@ -0,0 +1,49 @@
+"""
+Distributed tracing of the verifier (OpenTelemetry)
+
+Requests carrying a W3C `traceparent` header (from the gateway) continue
+the caller's trace. Each request gets a server span, with spans for every
+pipeline stage, database transaction and evidence service call under it;
+the trace context is passed on to the evidence service.
+"""
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from sqlalchemy import event
+
+from shared.tracing import service_provider
+
+provider = service_provider("verifier")
+tracer = provider.get_tracer("verifier")
+
+
+def trace_db_transactions(engine) -> None:
+    """
+    A span per database transaction, from BEGIN to COMMIT or ROLLBACK, with
+    the number of statements it ran. Only transactions inside a recorded
+    trace get one, so the job queue's polling adds no root spans.
+    """
+    sync_engine = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+
+    @event.listens_for(sync_engine, "begin")
+    def begin(conn):
+        if not trace.get_current_span().is_recording():
+            return
+        conn.info["trace_span"] = tracer.start_span(
+            "db transaction", kind=SpanKind.CLIENT, attributes={"db.system": conn.dialect.name}
+        )
+        conn.info["trace_statements"] = 0
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "trace_span" in conn.info:
+            conn.info["trace_statements"] += 1
+
+    def end(conn, outcome):
+        span = conn.info.pop("trace_span", None)
+        if span is not None:
+            span.set_attribute("db.statements", conn.info.pop("trace_statements"))
+            span.set_attribute("db.outcome", outcome)
+            span.end()
+
+    event.listen(sync_engine, "commit", lambda conn: end(conn, "commit"))
+    event.listen(sync_engine, "rollback", lambda conn: end(conn, "rollback"))
@@ -1,25 +1,95 @@
 import httpx
 from typing import List, Dict, Any, Optional
 import os
+import time
+from opentelemetry.trace import SpanKind
+from shared.tracing import trace_headers
+from .metrics import EVIDENCE_REQUEST_SECONDS, EVIDENCE_REQUESTS
+from .tracing import tracer
 
 EVIDENCE_URL = os.getenv("EVIDENCE_URL", "http://evidence:8000")
 
+# Connection pool and timeouts for calls to the evidence service
+EVIDENCE_MAX_CONNECTIONS = int(os.getenv("EVIDENCE_MAX_CONNECTIONS", "50"))
+EVIDENCE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("EVIDENCE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+EVIDENCE_KEEPALIVE_EXPIRY = float(os.getenv("EVIDENCE_KEEPALIVE_EXPIRY", "30"))
+EVIDENCE_CONNECT_TIMEOUT = float(os.getenv("EVIDENCE_CONNECT_TIMEOUT", "5"))
+EVIDENCE_READ_TIMEOUT = float(os.getenv("EVIDENCE_READ_TIMEOUT", "30"))
+EVIDENCE_POOL_TIMEOUT = float(os.getenv("EVIDENCE_POOL_TIMEOUT", "10"))
+# HTTP/2 needs the h2 package and an evidence service (or proxy) that speaks it
+EVIDENCE_HTTP2 = os.getenv("EVIDENCE_HTTP2", "false").lower() in ("1", "true", "yes")
+
+
+def create_session() -> httpx.AsyncClient:
+    """
+    HTTP client with keep-alive connections to the evidence service
+    """
+    http2 = EVIDENCE_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("EVIDENCE_HTTP2 is set but h2 is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=EVIDENCE_MAX_CONNECTIONS,
+            max_keepalive_connections=EVIDENCE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=EVIDENCE_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(
+            connect=EVIDENCE_CONNECT_TIMEOUT,
+            read=EVIDENCE_READ_TIMEOUT,
+            write=EVIDENCE_READ_TIMEOUT,
+            pool=EVIDENCE_POOL_TIMEOUT
+        )
+    )
+
 
 class WikiClient:
-    def __init__(self):
+    def __init__(self, session: Optional[httpx.AsyncClient] = None):
         self.base_url = EVIDENCE_URL
-        self.session = httpx.AsyncClient(timeout=30.0)
+        self._session = session
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """
+        The pooled client, created on first use (and again after close())
+        """
+        if self._session is None or self._session.is_closed:
+            self._session = create_session()
+        return self._session
+
+    async def _get(self, call: str, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        GET from the evidence service, counted and timed per call type, in a
+        client span whose context is passed on to the evidence service
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        with tracer.start_as_current_span(f"evidence {call}", kind=SpanKind.CLIENT) as span:
+            try:
+                response = await self.session.get(url, params=params, headers=trace_headers())
+                span.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status()
+                outcome = "ok"
+                return response
+            finally:
+                EVIDENCE_REQUEST_SECONDS.labels(call).observe(time.perf_counter() - started)
+                EVIDENCE_REQUESTS.labels(call, outcome).inc()
 
     async def search_evidence(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Search for evidence using the evidence service
         """
         try:
-            response = await self.session.get(
+            response = await self._get(
+                "search",
                 f"{self.base_url}/wikipedia/search",
                 params={"query": query, "limit": limit}
             )
-            response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error searching evidence: {e}")
@@ -30,15 +100,16 @@ class WikiClient:
         Get Wikipedia page summary by title
         """
         try:
-            response = await self.session.get(f"{self.base_url}/wikipedia/summary/{title}")
-            response.raise_for_status()
+            response = await self._get("summary", f"{self.base_url}/wikipedia/summary/{title}")
             return response.json()
         except Exception as e:
             print(f"Error getting summary for {title}: {e}")
             return None
 
     async def close(self):
-        await self.session.aclose()
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
 
 
 # Global client instance
@@ -0,0 +1,244 @@
+"""
+Worker pool for asynchronous verification
+
+Claims stored as "pending" (POST /verify/async) form a queue in the claims
+table. A worker takes the oldest pending claim with
+SELECT ... FOR UPDATE SKIP LOCKED, marks it "running" and verifies it. A
+failed claim goes back to "pending" after a backoff until JOB_MAX_ATTEMPTS
+is reached, then becomes "error". Claims left "running" for longer than
+JOB_STUCK_SECONDS (crashed worker, or a synchronous request whose process
+died) are put back in the queue.
+
+The pool runs inside the verifier API when JOB_WORKERS > 0, or on its own:
+    python -m app.worker
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from opentelemetry.trace import Status, StatusCode
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from .database import SessionLocal, engine
+from .models import Claim
+from .nlp import SCORER_WARMUP, claim_fingerprint, nlp_executor, warm_up_scorer
+from .pipeline import VerificationPipeline
+from .query_planner import load_query_planner
+from .tracing import provider as trace_provider, trace_db_transactions, tracer
+import asyncio
+import os
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Retry n waits n * JOB_RETRY_DELAY_SECONDS
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "10"))
+JOB_STUCK_SECONDS = float(os.getenv("JOB_STUCK_SECONDS", "300"))
+JOB_RECOVER_INTERVAL_SECONDS = float(os.getenv("JOB_RECOVER_INTERVAL_SECONDS", "60"))
+
+
+async def take_job(db: AsyncSession) -> Optional[Dict[str, Any]]:
+    """
+    Mark the oldest due pending claim as running and return it, or None.
+    Concurrent workers skip rows another worker has locked.
+    """
+    now = datetime.now(timezone.utc)
+    next_claim = (
+        select(Claim.id)
+        .where(
+            Claim.status == "pending",
+            or_(Claim.next_attempt_at.is_(None), Claim.next_attempt_at <= now)
+        )
+        .order_by(Claim.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Claim)
+        .where(Claim.id == next_claim, Claim.status == "pending")
+        .values(status="running", attempts=Claim.attempts + 1, locked_at=now)
+        .returning(Claim.id, Claim.user_id, Claim.input_type, Claim.raw_input, Claim.fingerprint, Claim.attempts)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.mappings().first()
+    await db.commit()
+    if row is None:
+        return None
+
+    claim = dict(row)
+    if not claim["fingerprint"]:  # queued before fingerprints existed
+        claim["fingerprint"] = claim_fingerprint(claim["raw_input"], claim["input_type"])
+    return claim
+
+
+async def fail_job(db: AsyncSession, claim: Dict[str, Any], error: Exception) -> str:
+    """
+    Put a failed claim back in the queue with a backoff, or mark it as an
+    error once it has used all its attempts. Returns the new status.
+    """
+    await db.rollback()
+    if claim["attempts"] >= JOB_MAX_ATTEMPTS:
+        values = {"status": "error"}
+    else:
+        delay = JOB_RETRY_DELAY_SECONDS * claim["attempts"]
+        values = {"status": "pending", "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay)}
+    await db.execute(
+        update(Claim)
+        .where(Claim.id == claim["id"], Claim.status == "running")
+        .values(locked_at=None, last_error=str(error), **values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return values["status"]
+
+
+async def recover_stuck(db: AsyncSession) -> int:
+    """
+    Requeue claims that have been running for longer than
+    JOB_STUCK_SECONDS; those out of attempts become errors.
+    Returns the number of claims recovered.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=JOB_STUCK_SECONDS)
+    stuck = and_(Claim.status == "running", Claim.locked_at < cutoff)
+    message = f"No result after {JOB_STUCK_SECONDS:g}s"
+
+    requeued = await db.execute(
+        update(Claim)
+        .where(stuck, Claim.attempts < JOB_MAX_ATTEMPTS)
+        .values(status="pending", locked_at=None, next_attempt_at=None, last_error=message)
+        .execution_options(synchronize_session=False)
+    )
+    failed = await db.execute(
+        update(Claim)
+        .where(stuck, Claim.attempts >= JOB_MAX_ATTEMPTS)
+        .values(status="error", locked_at=None, last_error=message)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return requeued.rowcount + failed.rowcount
+
+
+async def queue_depth(db: AsyncSession) -> Dict[str, int]:
+    result = await db.execute(
+        select(Claim.status, func.count())
+        .where(Claim.status.in_(["pending", "running"]))
+        .group_by(Claim.status)
+    )
+    return {"pending": 0, "running": 0, **dict(result.all())}
+
+
+class WorkerPool:
+    """
+    A fixed number of worker tasks taking claims from the queue, plus a
+    task that recovers stuck claims every JOB_RECOVER_INTERVAL_SECONDS
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = SessionLocal,
+        workers: int = JOB_WORKERS,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        recover_interval: float = JOB_RECOVER_INTERVAL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.recover_interval = recover_interval
+        self.counters = Counter()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """
+        Wake idle workers now instead of at their next poll
+        """
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "running": bool(self._tasks), **self.counters}
+
+    async def run_once(self) -> bool:
+        """
+        Process one queued claim. Returns False if the queue had nothing due.
+        """
+        async with self.session_factory() as db:
+            claim = await take_job(db)
+            if claim is None:
+                return False
+            # Each job starts its own trace
+            with tracer.start_as_current_span("verification job", attributes={
+                "claim.id": str(claim["id"]), "claim.attempt": claim["attempts"]
+            }) as span:
+                try:
+                    await VerificationPipeline(db).process_claim(claim)
+                    self.counters["done"] += 1
+                except Exception as e:
+                    print(f"Error verifying claim {claim['id']} (attempt {claim['attempts']}): {e}")
+                    span.record_exception(e)
+                    span.set_status(Status(StatusCode.ERROR, str(e)))
+                    status = await fail_job(db, claim, e)
+                    self.counters["retried" if status == "pending" else "failed"] += 1
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                found = await self.run_once()
+            except Exception as e:
+                print(f"Error taking a job from the queue: {e}")
+                found = False
+            if found:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _recover(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    recovered = await recover_stuck(db)
+                if recovered:
+                    print(f"Recovered {recovered} stuck claims")
+                    self.counters["recovered"] += recovered
+                    self.notify()
+            except Exception as e:
+                print(f"Error recovering stuck claims: {e}")
+            await asyncio.sleep(self.recover_interval)
+
+
+job_pool = WorkerPool()
+
+
+async def main():
+    trace_db_transactions(engine)
+    scorer = warm_up_scorer() if SCORER_WARMUP else None
+    load_query_planner(scoring_model=getattr(scorer, "model", None))
+    pool = WorkerPool(workers=max(JOB_WORKERS, 1))
+    pool.start()
+    print(f"🚀 Verification workers started ({pool.workers})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        nlp_executor.shutdown()
+        await engine.dispose()
+        trace_provider.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())